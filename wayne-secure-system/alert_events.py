@@ -0,0 +1,66 @@
+import asyncio
+import threading
+from typing import Dict, Optional, Set
+from config import ALERT_STREAM_QUEUE_SIZE
+
+class AlertSubscription:
+    """Fila de eventos de um cliente conectado ao stream de alertas"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, max_queue: int):
+        self.loop = loop
+        self.queue: "asyncio.Queue[Optional[Dict]]" = asyncio.Queue(maxsize=max_queue)
+        self.overflowed = False
+
+    def _deliver(self, event: Optional[Dict]):
+        # Roda no loop do cliente; cliente lento demais é desconectado e retoma pelo Last-Event-ID
+        if self.overflowed:
+            return
+        if event is not None and self.queue.qsize() >= self.queue.maxsize - 1:
+            self.overflowed = True
+            event = None
+        self.queue.put_nowait(event)
+
+
+class AlertBroker:
+    """Pub/sub em processo dos eventos de alertas (created, updated, resolved)"""
+
+    def __init__(self, max_queue: int = ALERT_STREAM_QUEUE_SIZE):
+        self.max_queue = max_queue
+        self._subscribers: Set[AlertSubscription] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def has_subscribers(self) -> bool:
+        return bool(self._subscribers)
+
+    def subscribe(self) -> AlertSubscription:
+        """Registra um cliente; deve ser chamado de dentro do loop asyncio"""
+        subscription = AlertSubscription(asyncio.get_running_loop(), self.max_queue)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: AlertSubscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, event_type: str, alert: Dict):
+        """Entrega o evento a todos os clientes; pode ser chamado de qualquer thread"""
+        self._broadcast({"type": event_type, "alert": alert})
+
+    def close(self):
+        """Encerra todos os streams abertos (desligamento da aplicação)"""
+        self._broadcast(None)
+
+    def _broadcast(self, event: Optional[Dict]):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._deliver, event)
+            except RuntimeError:
+                # Loop já encerrado
+                self.unsubscribe(subscription)
+
+# Instância global do pub/sub de alertas
+alert_broker = AlertBroker()
@@ -0,0 +1,51 @@
+"""
+Taxonomia das ações de auditoria
+
+Cada ação (texto gravado em audit_log.action) é registrada uma única vez na
+tabela audit_actions com uma categoria; audit_log.action_id aponta para ela.
+Os relatórios filtram por categoria com igualdade em vez de LIKE no texto.
+"""
+
+# Categorias
+LOGIN_SUCCESS = "login_success"
+LOGIN_FAILURE = "login_failure"
+LOGOUT = "logout"
+ACCESS_DENIED = "access_denied"
+RATE_LIMITED = "rate_limited"
+SECURITY = "security"
+ADMIN = "admin"
+VIEW = "view"
+OTHER = "other"
+
+KNOWN_ACTIONS = {
+    "SECURITY_SUCCESSFUL_LOGIN": LOGIN_SUCCESS,
+    "SECURITY_FAILED_LOGIN": LOGIN_FAILURE,
+    "SECURITY_UNAUTHORIZED_ACCESS": ACCESS_DENIED,
+    "SECURITY_RATE_LIMIT_EXCEEDED": RATE_LIMITED,
+    "LOGOUT": LOGOUT,
+    "CREATE_BACKUP": ADMIN,
+    "RESTORE_BACKUP": ADMIN,
+    "CLEANUP_SESSIONS": ADMIN,
+    "CREATE_USER": ADMIN,
+    "MAINTAIN_AUDIT_PARTITIONS": ADMIN,
+    "VIEW_SECURITY_REPORT": VIEW,
+    "VIEW_RESOURCE_REPORT": VIEW,
+    "VIEW_AUDIT_LOGS": VIEW,
+    "SEARCH_AUDIT_LOGS": VIEW,
+    "SEARCH_ALERTS": VIEW,
+    "EXPORT_AUDIT_LOGS": VIEW,
+    "EXPORT_ALERTS": VIEW,
+    "EXPORT_RESOURCES": VIEW,
+}
+
+
+def classify_action(action: str) -> str:
+    """Categoria de uma ação; ações novas caem pelo prefixo em security/view/other"""
+    category = KNOWN_ACTIONS.get(action)
+    if category:
+        return category
+    if action.startswith("SECURITY_"):
+        return SECURITY
+    if action.startswith("VIEW_"):
+        return VIEW
+    return OTHER
@@ -0,0 +1,143 @@
+"""
+Partições mensais do log de auditoria
+
+audit_log recebe todas as escritas (e dispara os triggers dos agregados); os meses
+já encerrados são movidos para tabelas audit_log_AAAAMM, registradas no catálogo
+audit_partitions. A view audit_log_all une audit_log e as partições ainda online.
+Partições mais antigas que a retenção são arquivadas em NDJSON comprimido e removidas.
+"""
+
+import re
+import sqlite3
+from datetime import datetime, timezone
+from typing import List, Optional
+
+AUDIT_LOG_COLUMNS = (
+    "id, username, action, action_id, resource_type, resource_id, details, timestamp, ip_address, user_agent"
+)
+AUDIT_VIEW = "audit_log_all"
+
+_MONTH = re.compile(r"\d{4}-\d{2}")
+
+
+def partition_name(month: str) -> str:
+    """Nome da tabela do mês 'AAAA-MM'"""
+    return f"audit_log_{month.replace('-', '')}"
+
+
+def month_bounds(month: str) -> tuple:
+    """Início e fim (exclusivo) do mês 'AAAA-MM' no formato dos timestamps de auditoria"""
+    year, number = int(month[:4]), int(month[5:7])
+    end = f"{year + 1}-01" if number == 12 else f"{year}-{number + 1:02d}"
+    return f"{month}-01 00:00:00", f"{end}-01 00:00:00"
+
+
+def shift_month(month: str, months: int) -> str:
+    index = int(month[:4]) * 12 + int(month[5:7]) - 1 + months
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def current_month(now: Optional[datetime] = None) -> str:
+    return (now or datetime.now(timezone.utc)).strftime("%Y-%m")
+
+
+def create_partition(conn: sqlite3.Connection, month: str) -> str:
+    """Cria a tabela do mês (mesmas colunas e índices de audit_log) e sua linha no catálogo"""
+    name = partition_name(month)
+    range_start, range_end = month_bounds(month)
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {name} (
+            id INTEGER PRIMARY KEY,
+            username TEXT NOT NULL,
+            action TEXT NOT NULL,
+            action_id INTEGER REFERENCES audit_actions (id),
+            resource_type TEXT,
+            resource_id INTEGER,
+            details TEXT,
+            timestamp TIMESTAMP,
+            ip_address TEXT,
+            user_agent TEXT
+        )
+    """)
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{name}_timestamp ON {name} (timestamp)")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{name}_username_timestamp ON {name} (username, timestamp)")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{name}_action_id_timestamp ON {name} (action_id, timestamp)")
+    conn.execute("""
+        INSERT OR IGNORE INTO audit_partitions (name, month, range_start, range_end, row_count, status)
+        VALUES (?, ?, ?, ?, 0, 'online')
+    """, (name, month, range_start, range_end))
+    return name
+
+
+def rotate_audit_log(conn: sqlite3.Connection, before_month: str) -> int:
+    """
+    Move de audit_log para as partições os eventos dos meses anteriores a before_month.
+    Meses já arquivados ficam em audit_log. Retorna o número de linhas movidas.
+    """
+    before, _ = month_bounds(before_month)
+    months = [
+        row[0] for row in conn.execute(
+            "SELECT DISTINCT substr(timestamp, 1, 7) FROM audit_log WHERE timestamp < ?", (before,)
+        )
+        if row[0] and _MONTH.fullmatch(row[0])
+    ]
+    archived = {
+        row[0] for row in conn.execute("SELECT month FROM audit_partitions WHERE status = 'archived'")
+    }
+    moved = 0
+    for month in sorted(set(months) - archived):
+        name = create_partition(conn, month)
+        range_start, range_end = month_bounds(month)
+        # audit_log não tem trigger de DELETE: os agregados do relatório não mudam
+        count = conn.execute(f"""
+            INSERT INTO {name} ({AUDIT_LOG_COLUMNS})
+            SELECT {AUDIT_LOG_COLUMNS} FROM audit_log WHERE timestamp >= ? AND timestamp < ?
+        """, (range_start, range_end)).rowcount
+        conn.execute("DELETE FROM audit_log WHERE timestamp >= ? AND timestamp < ?", (range_start, range_end))
+        conn.execute(
+            "UPDATE audit_partitions SET row_count = row_count + ? WHERE name = ?", (count, name)
+        )
+        moved += count
+        # Estatísticas do planejador para a tabela nova (os índices dela começam sem sqlite_stat1)
+        conn.execute(f"ANALYZE {name}")
+    if months:
+        refresh_audit_view(conn)
+    return moved
+
+
+def refresh_audit_view(conn: sqlite3.Connection):
+    """Recria audit_log_all com audit_log e as partições online"""
+    selects = [f"SELECT {AUDIT_LOG_COLUMNS} FROM audit_log"] + [
+        f"SELECT {AUDIT_LOG_COLUMNS} FROM {row[0]}"
+        for row in conn.execute("SELECT name FROM audit_partitions WHERE status = 'online' ORDER BY month DESC")
+    ]
+    conn.execute(f"DROP VIEW IF EXISTS {AUDIT_VIEW}")
+    conn.execute(f"CREATE VIEW {AUDIT_VIEW} AS {' UNION ALL '.join(selects)}")
+
+
+def tables_for_range(conn: sqlite3.Connection, since: Optional[str] = None, until: Optional[str] = None,
+                     through: Optional[str] = None) -> List[str]:
+    """
+    Tabelas que podem ter eventos com since <= timestamp < until (e timestamp <= through):
+    audit_log sempre (mês corrente e atrasados) e as partições online cujo mês cruza o intervalo
+    """
+    conditions, params = ["status = 'online'"], []
+    if since is not None:
+        conditions.append("range_end > ?")
+        params.append(since)
+    if until is not None:
+        conditions.append("range_start < ?")
+        params.append(until)
+    if through is not None:
+        conditions.append("range_start <= ?")
+        params.append(through)
+    rows = conn.execute(
+        f"SELECT name FROM audit_partitions WHERE {' AND '.join(conditions)} ORDER BY month DESC", params
+    ).fetchall()
+    return ["audit_log"] + [row[0] for row in rows]
+
+
+def partition_current_log(conn: sqlite3.Connection):
+    """Passo de migração: particiona o histórico existente até o mês corrente"""
+    rotate_audit_log(conn, current_month())
+    refresh_audit_view(conn)
@@ -0,0 +1,229 @@
+import atexit
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from typing import Callable, List, Tuple
+from metrics import metrics
+from config import (
+    AUDIT_DURABILITY, AUDIT_BATCH_SIZE, AUDIT_FLUSH_INTERVAL,
+    AUDIT_QUEUE_SIZE, AUDIT_ENQUEUE_TIMEOUT, AUDIT_WRITE_RETRIES, AUDIT_RETRY_BACKOFF
+)
+
+logger = logging.getLogger("wayne.audit")
+
+audit_write_failures = metrics.counter(
+    "wayne_audit_write_failures_total", "Tentativas de gravação de lotes de auditoria que falharam"
+)
+audit_events_dropped = metrics.counter(
+    "wayne_audit_events_dropped_total",
+    "Eventos de auditoria descartados por motivo (invalid: rejeitado pelo banco, overflow: excesso retido, "
+    "shutdown: não gravado no encerramento)", ("reason",)
+)
+
+
+def is_transient(error: Exception) -> bool:
+    """Falhas que podem passar numa nova tentativa (banco ocupado, pool de conexões esgotado)"""
+    return isinstance(error, sqlite3.OperationalError)
+
+class AuditWriter:
+    """Fila em memória de eventos de auditoria gravados em lotes por uma thread dedicada"""
+
+    def __init__(self, write_batch: Callable[[List[Tuple]], None], mode: str = AUDIT_DURABILITY,
+                 batch_size: int = AUDIT_BATCH_SIZE, flush_interval: float = AUDIT_FLUSH_INTERVAL,
+                 max_queue: int = AUDIT_QUEUE_SIZE, enqueue_timeout: float = AUDIT_ENQUEUE_TIMEOUT,
+                 retries: int = AUDIT_WRITE_RETRIES, retry_backoff: float = AUDIT_RETRY_BACKOFF):
+        if mode not in ("batched", "sync"):
+            raise ValueError(f"Modo de auditoria inválido: {mode}")
+        self.write_batch = write_batch
+        self.mode = mode
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.max_retained = max_queue
+        # Eventos de lotes que falharam por erro transitório, regravados antes dos próximos
+        self._retained: List[Tuple] = []
+        self._retained_lock = threading.Lock()
+        self._queue: "queue.Queue[Tuple]" = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        # Serializa gravações da thread de fundo com flush() chamado por requisições
+        self._write_lock = threading.Lock()
+
+    @property
+    def depth(self) -> int:
+        """Eventos aguardando gravação, incluindo os de lotes que falharam (aproximado)"""
+        return self._queue.qsize() + len(self._retained)
+
+    def submit(self, row: Tuple):
+        """Enfileira um evento; grava direto no modo sync ou se a fila estiver cheia"""
+        if self.mode == "sync" or self._stop.is_set():
+            self.write_batch([row])
+            return
+        self._ensure_started()
+        try:
+            self._queue.put(row, timeout=self.enqueue_timeout)
+        except queue.Full:
+            # Contrapressão: a requisição paga a escrita em vez de descartar o evento, mas sem
+            # esperar: se a thread estiver gravando (ou se a escrita falhar), o evento fica retido
+            self._write([row], retry=False, wait=False)
+
+    def flush(self, timeout: float = 5.0):
+        """Garante que tudo o que foi enfileirado até agora esteja gravado"""
+        if self._thread is None or not self._thread.is_alive():
+            self._flush_directly()
+            return
+        # O marcador entra na fila atrás dos eventos pendentes; a thread grava o
+        # lote em andamento ao encontrá-lo e então libera quem pediu o flush
+        marker = threading.Event()
+        try:
+            self._queue.put(marker, timeout=timeout)
+        except queue.Full:
+            self._flush_directly()
+            return
+        deadline = time.monotonic() + timeout
+        while not marker.wait(min(0.05, max(deadline - time.monotonic(), 0))):
+            if not self._thread.is_alive():
+                # A thread terminou (shutdown) antes de chegar ao marcador: grava o que sobrou aqui
+                self._flush_directly()
+                return
+            if time.monotonic() >= deadline:
+                return
+
+    def shutdown(self):
+        """Para a thread de fundo e grava os eventos pendentes"""
+        self._stop.set()
+        if self._thread is not None and self._thread.is_alive():
+            self.flush()
+            self._thread.join(timeout=max(self.flush_interval * 2, 1))
+        self._flush_directly()
+        remaining = self._take_retained()
+        if remaining:
+            # O processo está terminando: o que não foi gravado agora se perde
+            audit_events_dropped.inc("shutdown", amount=len(remaining))
+            logger.error(f"{len(remaining)} eventos de auditoria não gravados no encerramento")
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.shutdown)
+
+    def _flush_directly(self):
+        while True:
+            batch, markers = [], []
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if isinstance(item, threading.Event):
+                    markers.append(item)
+                else:
+                    batch.append(item)
+            if batch or self._retained:
+                self._write(batch)
+            for marker in markers:
+                marker.set()
+            if not batch and not markers:
+                return
+
+    def _run(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                if self._retained:
+                    self._write([])
+                continue
+            # Acumula até completar o lote, estourar o intervalo ou achar um marcador de flush
+            batch, markers = [], []
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if isinstance(item, threading.Event):
+                    markers.append(item)
+                    break
+                batch.append(item)
+                remaining = deadline - time.monotonic()
+                if len(batch) >= self.batch_size or remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if batch:
+                self._write(batch)
+            for marker in markers:
+                marker.set()
+
+    def _write(self, batch: List[Tuple], retry: bool = True, wait: bool = True):
+        """
+        Grava os eventos retidos e o lote. Erros transitórios são repetidos com espera exponencial
+        (fora do lock de escrita) e, esgotadas as tentativas, os eventos ficam retidos em memória;
+        outros erros fazem o lote ser regravado evento a evento para isolar os que o banco rejeita.
+        """
+        rows = self._take_retained() + batch
+        if not rows:
+            return
+        attempts = self.retries + 1 if retry else 1
+        for attempt in range(attempts):
+            if not self._write_lock.acquire(blocking=wait):
+                self._retain(rows)
+                return
+            try:
+                self.write_batch(rows)
+                return
+            except Exception as e:
+                error = e
+            finally:
+                self._write_lock.release()
+            audit_write_failures.inc()
+            logger.warning(
+                f"Falha ao gravar lote de {len(rows)} eventos de auditoria "
+                f"(tentativa {attempt + 1}/{attempts}): {error}"
+            )
+            if not is_transient(error):
+                self._write_each(rows)
+                return
+            if attempt + 1 < attempts:
+                time.sleep(self.retry_backoff * 2 ** attempt)
+        self._retain(rows)
+
+    def _write_each(self, rows: List[Tuple]):
+        """Grava evento a evento: descarta os rejeitados e retém o resto no primeiro erro transitório"""
+        for index, row in enumerate(rows):
+            with self._write_lock:
+                try:
+                    self.write_batch([row])
+                    continue
+                except Exception as e:
+                    error = e
+            if is_transient(error):
+                self._retain(rows[index:])
+                return
+            audit_events_dropped.inc("invalid")
+            logger.error(f"Evento de auditoria rejeitado pelo banco e descartado: {row!r} ({error})")
+
+    def _take_retained(self) -> List[Tuple]:
+        with self._retained_lock:
+            rows, self._retained = self._retained, []
+        return rows
+
+    def _retain(self, rows: List[Tuple]):
+        with self._retained_lock:
+            # Retidos antes dos que chegaram enquanto estes eram gravados, preservando a ordem
+            rows = rows + self._retained
+            overflow = len(rows) - self.max_retained
+            if overflow > 0:
+                # Só aqui há perda de eventos válidos: os mais antigos saem para respeitar o limite de memória
+                audit_events_dropped.inc("overflow", amount=overflow)
+                logger.error(f"{overflow} eventos de auditoria descartados: gravação falhando há várias tentativas")
+                rows = rows[overflow:]
+            self._retained = rows
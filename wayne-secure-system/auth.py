@@ -1,12 +1,14 @@
 import os
 from dotenv import load_dotenv
-import bcrypt
 from datetime import datetime, timedelta, timezone
 from jose import JWTError, jwt
 from models.user import User, UserRole
 from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from database_manager import db_manager
 from security_manager import security_manager
+from session_cache import session_cache
+from password_hasher import password_hasher
 
 load_dotenv()
 
@@ -18,10 +20,16 @@ if not SECRET_KEY:
     raise Exception("SECRET_KEY não definido! Verifique seu arquivo .env")
 
 def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return password_hasher.hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+    return password_hasher.verify(plain_password, hashed_password)
+
+async def hash_password_async(password: str) -> str:
+    return await password_hasher.hash_async(password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_hasher.verify_async(plain_password, hashed_password)
 
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
@@ -33,6 +41,10 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     
     return token
 
+async def create_access_token_async(data: dict, expires_delta: timedelta = None):
+    """Como create_access_token, para handlers async: a sessão é gravada no threadpool"""
+    return await run_in_threadpool(create_access_token, data, expires_delta)
+
 def decode_access_token(token: str):
     
     credentials_exception = HTTPException(
@@ -62,11 +74,20 @@ def init_default_users():
             db_manager.add_user(username, password_hash, role)
             print(f"Usuário {username} criado com sucesso.")
 
-init_default_users()
-
 def authenticate_user(username: str, password: str):
     user_data = db_manager.get_user(username)
-    if user_data and verify_password(password, user_data["password_hash"]):
+    valid = bool(user_data) and verify_password(password, user_data["password_hash"])
+    return _finish_authentication(username, user_data if valid else None)
+
+async def authenticate_user_async(username: str, password: str):
+    """Como authenticate_user, para handlers async: o bcrypt é aguardado sem prender uma thread"""
+    user_data = await run_in_threadpool(db_manager.get_user, username)
+    valid = bool(user_data) and await verify_password_async(password, user_data["password_hash"])
+    return await run_in_threadpool(_finish_authentication, username, user_data if valid else None)
+
+def _finish_authentication(username: str, user_data):
+    """Registra o resultado do login; user_data é None se as credenciais forem inválidas"""
+    if user_data:
         db_manager.update_last_login(username)
         
         user = User(
@@ -105,7 +126,13 @@ def get_current_user(token: str):
         if username is None:
             logger.warning(f"Token sem campo 'sub'. Token: {token}")
             raise credentials_exception
-        if not security_manager.validate_session(token):
+        # Sessões já validadas dispensam a consulta de sessão e de usuário
+        token_hash = security_manager.hash_token(token)
+        cached_user = session_cache.get(token_hash)
+        if cached_user is not None:
+            return cached_user
+        expires_at = security_manager.get_session_expiry(token)
+        if expires_at is None:
             logger.warning(f"Sessão inválida para token: {token}")
             raise credentials_exception
         # Busca usuário no banco de dados
@@ -119,6 +146,7 @@ def get_current_user(token: str):
             password=user_data["password_hash"],
             role=UserRole(user_data["role"])
         )
+        session_cache.set(token_hash, user, expires_at)
         return user
     except JWTError as e:
         logger.error(f"JWTError ao decodificar token: {token}. Erro: {e}")
@@ -135,7 +163,8 @@ def check_permission(user, allowed_roles):
         db_manager.add_alert(
             "ACESSO_NEGADO",
             f"Tentativa de acesso não autorizada por '{user.username}'.",
-            "ALTO"
+            "ALTO",
+            subject=user.username
         )
         
         raise HTTPException(
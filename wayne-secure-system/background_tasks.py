@@ -0,0 +1,106 @@
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger("wayne.tasks")
+
+class PeriodicTask:
+    """Função executada a cada interval segundos em uma thread própria"""
+
+    def __init__(self, name: str, func: Callable[[], object], interval: float, run_at_start: bool = False):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.run_at_start = run_at_start
+        self.runs = 0
+        self.last_run: Optional[float] = None
+        self.last_duration: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        # A espera entre execuções é interrompida; uma execução em andamento termina antes
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run_once(self):
+        started = time.monotonic()
+        try:
+            self.func()
+            self.last_error = None
+        except Exception as e:
+            self.last_error = str(e)
+            logger.error(f"Erro na tarefa {self.name}: {e}")
+        self.runs += 1
+        self.last_run = time.time()
+        self.last_duration = time.monotonic() - started
+
+    def _run(self):
+        if self.run_at_start:
+            self.run_once()
+        while not self._stop.wait(self.interval):
+            self.run_once()
+
+    def status(self) -> Dict:
+        return {
+            "name": self.name,
+            "interval_seconds": self.interval,
+            "running": self.running,
+            "runs": self.runs,
+            "last_run": self.last_run,
+            "last_duration_seconds": self.last_duration,
+            "last_error": self.last_error,
+        }
+
+
+class BackgroundTaskRegistry:
+    """Tarefas periódicas da aplicação; registradas e iniciadas pelo lifespan, nunca na importação"""
+
+    def __init__(self):
+        self._tasks: Dict[str, PeriodicTask] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, func: Callable[[], object], interval: float,
+                 run_at_start: bool = False) -> PeriodicTask:
+        """Registra (ou substitui, se parada) uma tarefa; intervalo <= 0 desativa a tarefa"""
+        with self._lock:
+            existing = self._tasks.get(name)
+            if existing is not None and existing.running:
+                raise ValueError(f"Tarefa {name} já está em execução")
+            task = PeriodicTask(name, func, interval, run_at_start)
+            self._tasks[name] = task
+            return task
+
+    def start_all(self):
+        with self._lock:
+            tasks = list(self._tasks.values())
+        for task in tasks:
+            if task.interval > 0:
+                task.start()
+
+    def stop_all(self, timeout: float = 5.0):
+        with self._lock:
+            tasks = list(self._tasks.values())
+        for task in tasks:
+            task.stop(timeout)
+
+    def status(self) -> List[Dict]:
+        with self._lock:
+            return [task.status() for task in self._tasks.values()]
+
+# Registro global das tarefas em segundo plano
+background_tasks = BackgroundTaskRegistry()
@@ -0,0 +1,223 @@
+import gzip
+import hashlib
+import os
+import shutil
+import struct
+from pathlib import Path
+from typing import Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # dependência opcional; sem ela os backups usam gzip
+    zstandard = None
+
+CHUNK_SIZE = 1024 * 1024
+
+EXTENSIONS = {"zstd": ".zst", "gzip": ".gz", "none": ""}
+
+# Backups incrementais: cabeçalho + registros (número da página, conteúdo) das páginas alteradas
+INCREMENTAL_MAGIC = b"WAYNEINC1"
+# Manifesto de páginas: um hash de PAGE_DIGEST_SIZE bytes por página, em ordem
+MANIFEST_SUFFIX = ".pages"
+PAGE_DIGEST_SIZE = 16
+
+
+def default_compression() -> str:
+    return "zstd" if zstandard is not None else "gzip"
+
+
+def fsync_directory(path: Path):
+    """Persiste a entrada de um arquivo recém-criado no diretório (no-op onde não é suportado)"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class _HashingWriter:
+    """Arquivo de saída que calcula o SHA-256 do que é gravado"""
+
+    def __init__(self, f):
+        self._f = f
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data) -> int:
+        self.sha256.update(data)
+        self.size += len(data)
+        return self._f.write(data)
+
+    def flush(self):
+        self._f.flush()
+
+
+class CompressedWriter:
+    """
+    Gravação comprimida em fluxo; size e checksum do arquivo ficam disponíveis ao fechar.
+    Com durable=True o conteúdo e a entrada no diretório vão para o disco (fsync) antes do fechamento.
+    """
+
+    def __init__(self, destination: Path, compression: str, durable: bool = False):
+        if compression == "zstd" and zstandard is None:
+            raise ValueError("Compressão zstd requer o pacote zstandard")
+        if compression not in EXTENSIONS:
+            raise ValueError(f"Compressão inválida: {compression}")
+        self.destination = destination
+        self.compression = compression
+        self.durable = durable
+        self.size = 0
+        self.checksum = None
+
+    def __enter__(self):
+        self._raw = open(self.destination, "wb")
+        self._out = _HashingWriter(self._raw)
+        if self.compression == "zstd":
+            self._writer = zstandard.ZstdCompressor(level=3).stream_writer(self._out, closefd=False)
+        elif self.compression == "gzip":
+            self._writer = gzip.GzipFile(fileobj=self._out, mode="wb", compresslevel=6)
+        else:
+            self._writer = self._out
+        return self._writer
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if self._writer is not self._out:
+                self._writer.close()
+            if self.durable and exc_type is None:
+                self._raw.flush()
+                os.fsync(self._raw.fileno())
+        finally:
+            self._raw.close()
+        if self.durable and exc_type is None:
+            fsync_directory(self.destination.parent)
+        self.size = self._out.size
+        self.checksum = self._out.sha256.hexdigest()
+        return False
+
+
+def open_reader(source: Path):
+    """Abre um backup para leitura descomprimida (formato identificado pela extensão)"""
+    if source.suffix == ".zst":
+        if zstandard is None:
+            raise ValueError("Backup zstd requer o pacote zstandard")
+        return zstandard.ZstdDecompressor().stream_reader(open(source, "rb"), closefd=True)
+    if source.suffix == ".gz":
+        return gzip.open(source, "rb")
+    return open(source, "rb")
+
+
+def compress_file(source: Path, destination: Path, compression: str) -> Tuple[int, str]:
+    """Comprime source em destination em blocos; retorna (tamanho, sha256) do arquivo gravado"""
+    writer = CompressedWriter(destination, compression)
+    with open(source, "rb") as src, writer as out:
+        shutil.copyfileobj(src, out, CHUNK_SIZE)
+    return writer.size, writer.checksum
+
+
+def decompress_file(source: Path, destination: Path):
+    """Descomprime um backup completo em destination"""
+    with open_reader(source) as src, open(destination, "wb") as dst:
+        shutil.copyfileobj(src, dst, CHUNK_SIZE)
+
+
+def file_sha256(path: Path) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def _page_digest(page: bytes) -> bytes:
+    return hashlib.blake2b(page, digest_size=PAGE_DIGEST_SIZE).digest()
+
+
+def _iter_pages(path: Path, page_size: int):
+    with open(path, "rb") as f:
+        for page in iter(lambda: f.read(page_size), b""):
+            yield page
+
+
+def page_hashes(path: Path, page_size: int) -> bytes:
+    """Hashes de todas as páginas do arquivo de banco, concatenados"""
+    return b"".join(_page_digest(page) for page in _iter_pages(path, page_size))
+
+
+def manifest_path(backup_path: Path) -> Path:
+    return backup_path.with_name(backup_path.name + MANIFEST_SUFFIX)
+
+
+def write_manifest(backup_path: Path, page_size: int, hashes: bytes):
+    with open(manifest_path(backup_path), "wb") as f:
+        f.write(struct.pack(">I", page_size))
+        f.write(hashes)
+
+
+def read_manifest(backup_path: Path) -> Optional[Tuple[int, bytes]]:
+    """Retorna (page_size, hashes) do manifesto do backup, se existir"""
+    path = manifest_path(backup_path)
+    if not path.exists():
+        return None
+    data = path.read_bytes()
+    return struct.unpack(">I", data[:4])[0], data[4:]
+
+
+def write_incremental(snapshot: Path, destination: Path, compression: str, page_size: int,
+                      base_hashes: bytes) -> Tuple[int, str, int, bytes]:
+    """
+    Grava só as páginas do snapshot que diferem do manifesto base.
+    Retorna (tamanho, sha256, páginas alteradas, hashes de todas as páginas do snapshot).
+    """
+    page_count = snapshot.stat().st_size // page_size
+    hashes = []
+    changed = 0
+    writer = CompressedWriter(destination, compression)
+    with writer as out:
+        out.write(INCREMENTAL_MAGIC + struct.pack(">II", page_size, page_count))
+        for index, page in enumerate(_iter_pages(snapshot, page_size)):
+            digest = _page_digest(page)
+            hashes.append(digest)
+            if base_hashes[index * PAGE_DIGEST_SIZE:(index + 1) * PAGE_DIGEST_SIZE] != digest:
+                out.write(struct.pack(">I", index + 1))
+                out.write(page)
+                changed += 1
+    return writer.size, writer.checksum, changed, b"".join(hashes)
+
+
+def _read_exact(src, size: int) -> bytes:
+    # Leitores de fluxo comprimido podem devolver menos bytes que o pedido
+    chunks = []
+    while size > 0:
+        chunk = src.read(size)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def apply_incremental(target: Path, incremental: Path):
+    """Aplica as páginas de um backup incremental sobre um arquivo de banco já restaurado"""
+    with open_reader(incremental) as src, open(target, "r+b") as dst:
+        header = _read_exact(src, len(INCREMENTAL_MAGIC) + 8)
+        if not header.startswith(INCREMENTAL_MAGIC):
+            raise ValueError(f"Arquivo não é um backup incremental: {incremental}")
+        page_size, page_count = struct.unpack(">II", header[len(INCREMENTAL_MAGIC):])
+        # O banco pode ter encolhido (VACUUM) ou crescido desde o backup anterior
+        dst.truncate(page_count * page_size)
+        while True:
+            record = _read_exact(src, 4)
+            if not record:
+                break
+            pgno = struct.unpack(">I", record)[0]
+            page = _read_exact(src, page_size)
+            if len(page) != page_size:
+                raise ValueError(f"Backup incremental truncado: {incremental}")
+            dst.seek((pgno - 1) * page_size)
+            dst.write(page)
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos caminhos quentes da API e do DatabaseManager
+
+Cria um banco sintético com o esquema atual, sobe a aplicação no próprio processo
+(httpx + transporte ASGI, com o lifespan) e mede vazão e latência p50/p95/p99 dos
+endpoints mais usados, com N requisições concorrentes. Depois mede os métodos do
+DatabaseManager chamados por esses endpoints. O resultado pode ser salvo em JSON e
+comparado com uma execução anterior (--compare), falhando se o p95 piorar além da tolerância.
+
+Uso: python benchmarks/bench_hot_paths.py [--audit-rows N] [--requests N] [--concurrency N]
+                                          [--repeat N] [--json arquivo] [--compare arquivo]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(APP_DIR))
+
+from bench_indexes import seed
+
+BENCH_USER = ("bench", "bench123", "admin")
+
+
+def configure_environment(tmp: Path):
+    """Variáveis lidas por config.py: precisam estar definidas antes de importar a aplicação"""
+    os.environ.update({
+        "DATABASE_PATH": str(tmp / "bench.db"),
+        "BACKUP_DIR": str(tmp / "backups"),
+        "AUDIT_ARCHIVE_DIR": str(tmp / "audit_archive"),
+        "RATE_LIMIT_BACKEND": "memory",
+        # O login é limitado por IP e todas as requisições do benchmark vêm do mesmo cliente
+        "RATE_LIMIT_REQUESTS": "1000000",
+        "SEED_DEFAULT_USERS": "false",
+        "SQL_PROFILE": "off",
+        # Sem tarefas periódicas disputando o banco durante as medições
+        "COUNTER_RECONCILE_INTERVAL": "0",
+        "AUDIT_MAINTENANCE_INTERVAL": "0",
+        "BACKUP_INTERVAL": "0",
+    })
+
+
+def build_database(audit_rows: int):
+    """Banco com todas as migrações, dados sintéticos, o usuário do benchmark e partições mensais"""
+    from database_manager import db_manager
+    from auth import hash_password
+    from audit_actions import classify_action
+
+    db_manager.init_database()
+    with db_manager.writer() as conn:
+        seed(conn, audit_rows)
+        actions = [row[0] for row in conn.execute("SELECT DISTINCT action FROM audit_log")]
+        conn.executemany(
+            "INSERT OR IGNORE INTO audit_actions (name, category) VALUES (?, ?)",
+            [(action, classify_action(action)) for action in actions]
+        )
+        conn.execute(
+            "UPDATE audit_log SET action_id = (SELECT id FROM audit_actions WHERE name = audit_log.action)"
+        )
+    username, password, role = BENCH_USER
+    db_manager.add_user(username, hash_password(password), role)
+    db_manager.maintain_audit_partitions()
+    db_manager.reconcile_dashboard_counters()
+    with db_manager.writer() as conn:
+        conn.execute("ANALYZE")
+
+
+def percentiles(samples: list) -> dict:
+    ordered = sorted(samples)
+    cuts = statistics.quantiles(ordered, n=100, method="inclusive") if len(ordered) > 1 else ordered * 99
+    return {
+        "p50_ms": round(cuts[49] * 1000, 3),
+        "p95_ms": round(cuts[94] * 1000, 3),
+        "p99_ms": round(cuts[98] * 1000, 3),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+async def run_endpoint(client, request, total: int, concurrency: int, warmup: int) -> dict:
+    """Dispara total requisições com concurrency clientes simultâneos; latência por requisição"""
+    for _ in range(warmup):
+        await request(client)
+    latencies, errors = [], 0
+    pending = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for _ in pending:
+            started = time.perf_counter()
+            response = await request(client)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": round(total / elapsed, 1),
+        **percentiles(latencies),
+    }
+
+
+def endpoint_scenarios(token: str) -> dict:
+    """Requisições medidas; o token vai no cabeçalho e na query (parte das rotas lê da query)"""
+    auth = {"headers": {"Authorization": f"Bearer {token}"}, "params": {"token": token}}
+    username, password, _ = BENCH_USER
+    return {
+        "POST /auth/login": lambda c: c.post("/auth/login", data={"username": username, "password": password}),
+        "GET /auth/validate": lambda c: c.get("/auth/validate", **auth),
+        "GET /dashboard/": lambda c: c.get("/dashboard/", **auth),
+        "GET /resources/": lambda c: c.get("/resources/", **auth),
+        "GET /dashboard/alerts": lambda c: c.get("/dashboard/alerts", **auth),
+        "GET /admin/reports/security": lambda c: c.get("/admin/admin/reports/security", **auth),
+        "GET /admin/audit-logs": lambda c: c.get("/admin/admin/audit-logs", **auth),
+    }
+
+
+async def bench_endpoints(args) -> dict:
+    import httpx
+    import main
+
+    results = {}
+    async with main.lifespan(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            username, password, _ = BENCH_USER
+            response = await client.post("/auth/login", data={"username": username, "password": password})
+            token = response.json()["data"]["access_token"]
+            for name, request in endpoint_scenarios(token).items():
+                # bcrypt domina o login: menos requisições para o benchmark não se arrastar
+                total = args.login_requests if name == "POST /auth/login" else args.requests
+                results[name] = await run_endpoint(client, request, total, args.concurrency, args.warmup)
+    return results
+
+
+def db_scenarios() -> dict:
+    from database_manager import db_manager
+    from security_manager import SecurityManager
+
+    username = BENCH_USER[0]
+    since = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=30)
+    token_hash = SecurityManager.hash_token("bench-token")
+    sample_user = db_manager.get_audit_logs(limit=1)[0]["username"]
+    return {
+        "get_user": lambda: db_manager.get_user(username),
+        "get_session_expiry": lambda: db_manager.get_session_expiry(token_hash),
+        "get_dashboard_stats": db_manager.get_dashboard_stats,
+        "get_data_generation": db_manager.get_data_generation,
+        "get_resources_page": lambda: db_manager.get_resources_page(limit=50),
+        "get_alerts_page": lambda: db_manager.get_alerts_page(limit=50),
+        "get_audit_logs_page": lambda: db_manager.get_audit_logs_page(limit=100),
+        "get_audit_logs_page(username)": lambda: db_manager.get_audit_logs_page(limit=100, username=sample_user),
+        "get_audit_activity(30d)": lambda: db_manager.get_audit_activity(since),
+        "get_alert_counts_by_level(30d)": lambda: db_manager.get_alert_counts_by_level(since),
+        "search_audit_logs": lambda: db_manager.search_audit_logs("sintético", limit=50),
+        "log_audit": lambda: db_manager.log_audit(username, "VIEW_AUDIT_LOGS", details="benchmark"),
+    }
+
+
+def bench_db_methods(repeat: int) -> dict:
+    from database_manager import db_manager
+
+    results = {}
+    for name, call in db_scenarios().items():
+        call()
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            call()
+            timings.append(time.perf_counter() - started)
+        results[name] = {"calls": repeat, **percentiles(timings)}
+    db_manager.audit_writer.flush()
+    return results
+
+
+def compare(results: dict, baseline_path: str, tolerance: float) -> list:
+    """Linhas cujo p95 piorou mais que tolerance em relação à execução salva"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = []
+    print(f"\nComparação com {baseline_path} (p95)")
+    for section in ("endpoints", "db_methods"):
+        for name, current in results[section].items():
+            previous = baseline.get(section, {}).get(name)
+            if not previous:
+                continue
+            change = (current["p95_ms"] - previous["p95_ms"]) / previous["p95_ms"] if previous["p95_ms"] else 0.0
+            flag = "⚠️" if change > tolerance else "  "
+            print(f"{flag} {name:<36}{previous['p95_ms']:>10.3f} → {current['p95_ms']:>9.3f} ms ({change:+.0%})")
+            if change > tolerance:
+                regressions.append(name)
+    return regressions
+
+
+def print_table(title: str, rows: dict, first_column: str):
+    print(f"\n{title}")
+    print(f"{first_column:<36}{'rps':>9}{'p50 (ms)':>11}{'p95 (ms)':>11}{'p99 (ms)':>11}{'erros':>7}")
+    for name, row in rows.items():
+        rps = f"{row['throughput_rps']:.1f}" if "throughput_rps" in row else "-"
+        print(f"{name:<36}{rps:>9}{row['p50_ms']:>11.3f}{row['p95_ms']:>11.3f}{row['p99_ms']:>11.3f}"
+              f"{row.get('errors', '-'):>7}")
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=APP_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--audit-rows", type=int, default=50_000)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--login-requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--json", dest="json_path")
+    parser.add_argument("--compare", dest="baseline_path")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="piora máxima aceita no p95 (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_environment(Path(tmp))
+        os.chdir(APP_DIR)
+        print(f"📦 Populando banco sintético ({args.audit_rows} linhas de auditoria)...")
+        started = time.perf_counter()
+        build_database(args.audit_rows)
+        print(f"   pronto em {time.perf_counter() - started:.1f}s")
+
+        endpoints = asyncio.run(bench_endpoints(args))
+        db_methods = bench_db_methods(args.repeat)
+
+        from database_manager import db_manager
+        db_manager.close_connections()
+
+    results = {
+        "meta": {
+            "revision": git_revision(),
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "audit_rows": args.audit_rows,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "repeat": args.repeat,
+        },
+        "endpoints": endpoints,
+        "db_methods": db_methods,
+    }
+    print_table("Endpoints", endpoints, "endpoint")
+    print_table("DatabaseManager", db_methods, "método")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    if args.baseline_path and compare(results, args.baseline_path, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos índices da migração v2
+
+Cria um banco sintético no esquema inicial (v1), mede o plano de execução e a
+latência das consultas quentes do DatabaseManager, aplica as migrações
+restantes e mede de novo.
+
+Uso: python benchmarks/bench_indexes.py [--audit-rows N] [--repeat N] [--json arquivo]
+"""
+
+import argparse
+import json
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from migrations import apply_migrations
+from audit_partitions import tables_for_range
+
+# Mesmas consultas usadas pelo DatabaseManager
+HOT_QUERIES = {
+    "get_user": (
+        "SELECT id, username, password_hash, role, created_at, last_login, is_active "
+        "FROM users WHERE username = ? AND is_active = 1",
+        ("user_4242",),
+    ),
+    "is_session_valid": (
+        "SELECT COUNT(*) FROM active_sessions WHERE token_hash = ? AND expires_at > CURRENT_TIMESTAMP",
+        ("hash_4242",),
+    ),
+    "get_alerts_unresolved": (
+        "SELECT id, alert_type, message, level, timestamp, is_resolved, resolved_by, resolved_at "
+        "FROM alerts WHERE is_resolved = 0 ORDER BY timestamp DESC LIMIT 100",
+        (),
+    ),
+    "get_audit_logs": (
+        "SELECT id, username, action, resource_type, resource_id, details, timestamp, ip_address, user_agent "
+        "FROM audit_log ORDER BY timestamp DESC LIMIT 100",
+        (),
+    ),
+    "audit_by_username": (
+        "SELECT COUNT(*) FROM audit_log WHERE username = ? AND timestamp >= ?",
+        ("user_42", "2000-01-01"),
+    ),
+    "audit_by_action": (
+        "SELECT COUNT(*) FROM audit_log WHERE action = ? AND timestamp >= ?",
+        ("SECURITY_UNAUTHORIZED_ACCESS", "2000-01-01"),
+    ),
+    "get_resources": (
+        "SELECT id, name, type, description, status, created_at, updated_at, created_by "
+        "FROM resources ORDER BY created_at DESC LIMIT 100",
+        (),
+    ),
+    "users_by_role": (
+        "SELECT role, COUNT(*) FROM users WHERE is_active = 1 GROUP BY role",
+        (),
+    ),
+}
+
+def migrated_queries(conn: sqlite3.Connection) -> dict:
+    """
+    Consultas que mudam de forma depois das migrações: o log de auditoria passa a ser lido
+    em audit_log e nas partições mensais (cada uma com o filtro, como faz o DatabaseManager),
+    e a ação é filtrada pelo id interno
+    """
+    tables = tables_for_range(conn)
+
+    def per_partition(where: str, params: tuple) -> tuple:
+        counts = " UNION ALL ".join(f"SELECT COUNT(*) AS n FROM {table} WHERE {where}" for table in tables)
+        return f"SELECT SUM(n) FROM ({counts})", params * len(tables)
+
+    return {
+        "get_audit_logs": (
+            "SELECT id, username, action, resource_type, resource_id, details, timestamp, ip_address, user_agent "
+            "FROM audit_log_all ORDER BY timestamp DESC LIMIT 100",
+            (),
+        ),
+        "audit_by_username": per_partition("username = ? AND timestamp >= ?", ("user_42", "2000-01-01")),
+        "audit_by_action": per_partition(
+            "action_id = (SELECT id FROM audit_actions WHERE name = ?) AND timestamp >= ?",
+            ("SECURITY_UNAUTHORIZED_ACCESS", "2000-01-01"),
+        ),
+    }
+
+ACTIONS = [
+    "SECURITY_SUCCESSFUL_LOGIN", "SECURITY_FAILED_LOGIN", "SECURITY_UNAUTHORIZED_ACCESS",
+    "LOGOUT", "VIEW_AUDIT_LOGS", "VIEW_SECURITY_REPORT", "CREATE_BACKUP",
+]
+
+
+def _timestamp(rng: random.Random, days: int = 365) -> str:
+    moment = datetime.now() - timedelta(seconds=rng.randint(0, days * 86400))
+    return moment.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def seed(conn: sqlite3.Connection, audit_rows: int):
+    """Popula o banco com dados sintéticos proporcionais a audit_rows"""
+    rng = random.Random(42)
+    users = max(audit_rows // 40, 100)
+    conn.executemany(
+        "INSERT INTO users (username, password_hash, role, is_active) VALUES (?, ?, ?, ?)",
+        ((f"user_{i}", "x", rng.choice(["admin", "gerente", "empregado", "user"]), int(rng.random() > 0.1))
+         for i in range(users))
+    )
+    conn.executemany(
+        "INSERT INTO active_sessions (username, token_hash, expires_at) VALUES (?, ?, ?)",
+        ((f"user_{i % users}", f"hash_{i}", _timestamp(rng, 2)) for i in range(audit_rows // 10))
+    )
+    conn.executemany(
+        "INSERT INTO alerts (alert_type, message, level, timestamp, is_resolved) VALUES (?, ?, ?, ?, ?)",
+        ((rng.choice(["FAILED_LOGIN", "ACESSO_NEGADO"]), "alerta sintético",
+          rng.choice(["ALTO", "MÉDIO", "BAIXO"]), _timestamp(rng), int(rng.random() > 0.05))
+         for _ in range(audit_rows // 10))
+    )
+    conn.executemany(
+        "INSERT INTO audit_log (username, action, resource_type, details, timestamp) VALUES (?, ?, ?, ?, ?)",
+        ((f"user_{rng.randrange(users)}", rng.choice(ACTIONS), rng.choice([None, "resource", "user"]),
+          "evento sintético", _timestamp(rng))
+         for _ in range(audit_rows))
+    )
+    conn.executemany(
+        "INSERT INTO resources (name, type, status, created_at) VALUES (?, ?, ?, ?)",
+        ((f"recurso_{i}", "vehicle", rng.choice(["active", "maintenance", "inactive"]), _timestamp(rng))
+         for i in range(audit_rows // 20))
+    )
+    conn.commit()
+
+
+def measure(conn: sqlite3.Connection, repeat: int, queries: dict = HOT_QUERIES) -> dict:
+    results = {}
+    for name, (sql, params) in queries.items():
+        plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            conn.execute(sql, params).fetchall()
+            timings.append((time.perf_counter() - start) * 1000)
+        results[name] = {"plan": plan, "median_ms": round(statistics.median(timings), 4)}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--audit-rows", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", dest="json_path")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(Path(tmp) / "bench.db")
+        apply_migrations(conn, target=1)
+        print(f"📦 Populando banco sintético ({args.audit_rows} linhas de auditoria)...")
+        seed(conn, args.audit_rows)
+
+        before = measure(conn, args.repeat)
+        start = time.perf_counter()
+        apply_migrations(conn)
+        migration_seconds = time.perf_counter() - start
+        after = measure(conn, args.repeat, {**HOT_QUERIES, **migrated_queries(conn)})
+        conn.close()
+
+    print(f"⏱️ Migrações aplicadas em {migration_seconds:.2f}s\n")
+    print(f"{'consulta':<24}{'antes (ms)':>12}{'depois (ms)':>13}{'ganho':>9}")
+    for name in HOT_QUERIES:
+        b, a = before[name]["median_ms"], after[name]["median_ms"]
+        speedup = b / a if a else float("inf")
+        print(f"{name:<24}{b:>12.3f}{a:>13.3f}{speedup:>8.1f}x")
+        print(f"    antes:  {' | '.join(before[name]['plan'])}")
+        print(f"    depois: {' | '.join(after[name]['plan'])}")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "audit_rows": args.audit_rows,
+                "migration_seconds": round(migration_seconds, 3),
+                "before": before,
+                "after": after,
+            }, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark da inicialização da API
+
+Em processos Python novos (como um worker do uvicorn ou um ciclo do --reload), mede o
+tempo de `import main`, confere que a importação não cria o banco e mede o lifespan
+da aplicação com o banco vazio (frio: todas as migrações) e já migrado (quente).
+
+Uso: python benchmarks/bench_startup.py [--runs N] [--seed] [--json arquivo]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+# Executado em cada processo filho; imprime as medidas em JSON na última linha
+CHILD = """
+import asyncio, json, os, time
+start = time.perf_counter()
+import main
+import_ms = (time.perf_counter() - start) * 1000
+database_created = os.path.exists(os.environ["DATABASE_PATH"])
+
+async def run():
+    start = time.perf_counter()
+    async with main.lifespan(main.app):
+        startup_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+    return startup_ms, (time.perf_counter() - start) * 1000
+
+startup_ms, shutdown_ms = asyncio.run(run())
+print(json.dumps({
+    "import_ms": import_ms,
+    "database_created_on_import": database_created,
+    "startup_ms": startup_ms,
+    "shutdown_ms": shutdown_ms,
+}))
+"""
+
+
+def run_child(tmp: Path, seed: bool) -> dict:
+    env = {
+        **os.environ,
+        "DATABASE_PATH": str(tmp / "bench.db"),
+        "RATE_LIMIT_DB_PATH": str(tmp / "rate_limits.db"),
+        "BACKUP_DIR": str(tmp / "backups"),
+        "AUDIT_ARCHIVE_DIR": str(tmp / "audit_archive"),
+        "SEED_DEFAULT_USERS": "true" if seed else "false",
+        "PYTHONDONTWRITEBYTECODE": "1",
+    }
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD], cwd=APP_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def summarize(samples: list, key: str) -> dict:
+    values = [sample[key] for sample in samples]
+    return {
+        "median_ms": round(statistics.median(values), 2),
+        "min_ms": round(min(values), 2),
+        "max_ms": round(max(values), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--seed", action="store_true", help="liga SEED_DEFAULT_USERS (bcrypt no lifespan)")
+    parser.add_argument("--json", dest="json_path")
+    args = parser.parse_args()
+
+    cold, warm = [], []
+    for _ in range(args.runs):
+        with tempfile.TemporaryDirectory() as tmp:
+            cold.append(run_child(Path(tmp), args.seed))
+            warm.append(run_child(Path(tmp), args.seed))
+
+    results = {
+        "runs": args.runs,
+        "seed_default_users": args.seed,
+        "database_created_on_import": any(s["database_created_on_import"] for s in cold),
+        "import": summarize(cold + warm, "import_ms"),
+        "cold_startup": summarize(cold, "startup_ms"),
+        "warm_startup": summarize(warm, "startup_ms"),
+        "shutdown": summarize(cold + warm, "shutdown_ms"),
+    }
+
+    print(f"{'etapa':<16}{'mediana (ms)':>14}{'mín (ms)':>11}{'máx (ms)':>11}")
+    for name in ("import", "cold_startup", "warm_startup", "shutdown"):
+        row = results[name]
+        print(f"{name:<16}{row['median_ms']:>14.2f}{row['min_ms']:>11.2f}{row['max_ms']:>11.2f}")
+    if results["database_created_on_import"]:
+        print("⚠️ A importação de main criou o banco de dados")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
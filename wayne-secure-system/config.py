@@ -0,0 +1,171 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Banco de dados
+DATABASE_PATH = os.getenv("DATABASE_PATH", "wayne_secure.db")
+# Cria os usuários de teste (auth.init_default_users) na inicialização da aplicação;
+# desligado por padrão, ligar só em desenvolvimento
+SEED_DEFAULT_USERS = os.getenv("SEED_DEFAULT_USERS", "false").lower() in ("1", "true", "yes")
+
+# Pool de conexões SQLite (somente leitura; as escritas usam uma conexão dedicada)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))
+
+# Perfil de armazenamento do SQLite
+# "performance": WAL + synchronous=NORMAL (padrão)
+# "durable": WAL + synchronous=FULL
+# "legacy": journal de rollback, comportamento original do SQLite
+STORAGE_PROFILES = {
+    "performance": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -16000,
+        "temp_store": "MEMORY",
+    },
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "busy_timeout": 5000,
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -16000,
+        "temp_store": "MEMORY",
+    },
+    "legacy": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "busy_timeout": 5000,
+        "mmap_size": 0,
+        "cache_size": -2000,
+        "temp_store": "DEFAULT",
+    },
+}
+
+DB_STORAGE_PROFILE = os.getenv("DB_STORAGE_PROFILE", "performance")
+if DB_STORAGE_PROFILE not in STORAGE_PROFILES:
+    raise Exception(f"DB_STORAGE_PROFILE inválido: {DB_STORAGE_PROFILE}")
+
+# Cada PRAGMA pode ser sobrescrito individualmente (ex.: DB_MMAP_SIZE=0)
+STORAGE_PROFILE = dict(STORAGE_PROFILES[DB_STORAGE_PROFILE])
+for _pragma, _default in STORAGE_PROFILE.items():
+    _override = os.getenv(f"DB_{_pragma.upper()}")
+    if _override is not None:
+        STORAGE_PROFILE[_pragma] = type(_default)(_override)
+
+# Cache de sessões validadas (get_current_user)
+# O TTL limita por quanto tempo um logout feito em outro worker pode passar despercebido
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "10000"))
+SESSION_CACHE_TTL = float(os.getenv("SESSION_CACHE_TTL", "60"))
+
+# Hash de senhas (bcrypt) em executor dedicado
+# Requisições além de PASSWORD_WORKERS + PASSWORD_QUEUE_SIZE recebem 503 imediatamente.
+# Os handlers de login, cadastro e criação de usuário são async e aguardam o executor sem
+# ocupar as threads do threadpool do anyio (40 por padrão), usadas pelos endpoints síncronos;
+# só chamadas síncronas (scripts, init_default_users) bloqueiam a thread durante o bcrypt
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_QUEUE_SIZE = int(os.getenv("PASSWORD_QUEUE_SIZE", "32"))
+
+# Gravação de auditoria
+# "batched": eventos vão para uma fila em memória e são gravados em lotes
+#            (um crash pode perder até AUDIT_FLUSH_INTERVAL segundos de eventos)
+# "sync": cada evento é gravado na própria requisição
+# Lotes que falham (pool esgotado, banco ocupado) são repetidos AUDIT_WRITE_RETRIES vezes com
+# espera exponencial a partir de AUDIT_RETRY_BACKOFF segundos e depois ficam retidos em memória
+# para a próxima gravação; só o que passar de AUDIT_QUEUE_SIZE eventos retidos é descartado.
+# Lotes com erro não transitório são regravados evento a evento e só os rejeitados pelo banco
+# são descartados (ambos contados em wayne_audit_events_dropped_total, por motivo)
+AUDIT_DURABILITY = os.getenv("AUDIT_DURABILITY", "batched")
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "200"))
+AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "0.5"))
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+AUDIT_WRITE_RETRIES = int(os.getenv("AUDIT_WRITE_RETRIES", "5"))
+AUDIT_RETRY_BACKOFF = float(os.getenv("AUDIT_RETRY_BACKOFF", "0.2"))
+# Tempo máximo que uma requisição espera por espaço na fila antes de gravar direto
+AUDIT_ENQUEUE_TIMEOUT = float(os.getenv("AUDIT_ENQUEUE_TIMEOUT", "0.05"))
+
+# Alertas repetidos com a mesma chave (tipo, assunto, nível) dentro da janela
+# incrementam o contador do alerta aberto em vez de criar outra linha (0 desativa)
+ALERT_DEDUP_WINDOW = int(os.getenv("ALERT_DEDUP_WINDOW", "300"))
+
+# Intervalo (segundos) da reconciliação dos contadores materializados do dashboard
+COUNTER_RECONCILE_INTERVAL = float(os.getenv("COUNTER_RECONCILE_INTERVAL", "3600"))
+
+# Cache de respostas dos endpoints consultados periodicamente pelo dashboard
+# A validade real vem do ETag (geração dos dados); o TTL só limita quanto tempo
+# um corpo já montado fica em memória
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "256"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "30"))
+
+# Stream de alertas (SSE em /dashboard/alerts/stream)
+# A cada heartbeat o stream também busca no banco alertas criados por outros workers
+ALERT_STREAM_HEARTBEAT = float(os.getenv("ALERT_STREAM_HEARTBEAT", "15"))
+ALERT_STREAM_QUEUE_SIZE = int(os.getenv("ALERT_STREAM_QUEUE_SIZE", "100"))
+ALERT_STREAM_CATCHUP_LIMIT = int(os.getenv("ALERT_STREAM_CATCHUP_LIMIT", "500"))
+
+# Rate limiting (balde de tokens por IP)
+# "memory": estado por processo; "sqlite": arquivo compartilhado entre os workers
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_DB_PATH = os.getenv("RATE_LIMIT_DB_PATH", "rate_limits.db")
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+# Rajada máxima e janela de reabastecimento aplicadas a /auth/login e /auth/register
+RATE_LIMIT_REQUESTS = int(os.getenv("RATE_LIMIT_REQUESTS", "10"))
+RATE_LIMIT_WINDOW = float(os.getenv("RATE_LIMIT_WINDOW", "60"))
+
+# Backups online (API de backup do SQLite, copiada em passos de N páginas)
+# Entre os passos a cópia dorme BACKUP_STEP_SLEEP segundos para não disputar IO com as requisições
+BACKUP_DIR = os.getenv("BACKUP_DIR", "backups")
+BACKUP_COMPRESSION = os.getenv("BACKUP_COMPRESSION", "")  # zstd | gzip | none (vazio: zstd se instalado)
+BACKUP_PAGES_PER_STEP = int(os.getenv("BACKUP_PAGES_PER_STEP", "1024"))
+BACKUP_STEP_SLEEP = float(os.getenv("BACKUP_STEP_SLEEP", "0.005"))
+# Backups automáticos são incrementais (páginas alteradas desde o backup anterior);
+# a cada BACKUP_FULL_EVERY incrementais a cadeia recomeça com um backup completo
+BACKUP_FULL_EVERY = int(os.getenv("BACKUP_FULL_EVERY", "7"))
+# Retenção dos backups automáticos: o mais recente de cada um dos últimos N dias
+# e de cada uma das últimas M semanas (mais os backups dos quais eles dependem)
+BACKUP_KEEP_DAILY = int(os.getenv("BACKUP_KEEP_DAILY", "7"))
+BACKUP_KEEP_WEEKLY = int(os.getenv("BACKUP_KEEP_WEEKLY", "4"))
+# Intervalo (segundos) entre backups automáticos (0 desativa)
+BACKUP_INTERVAL = float(os.getenv("BACKUP_INTERVAL", "86400"))
+
+# Partições mensais do log de auditoria
+# Meses encerrados saem de audit_log para tabelas audit_log_AAAAMM; partições com mais de
+# AUDIT_RETENTION_MONTHS meses são arquivadas em NDJSON comprimido e removidas do banco.
+# Desativado por padrão (0): o arquivamento remove dados do banco e deve ser ligado explicitamente
+AUDIT_RETENTION_MONTHS = int(os.getenv("AUDIT_RETENTION_MONTHS", "0"))
+AUDIT_ARCHIVE_DIR = os.getenv("AUDIT_ARCHIVE_DIR", "audit_archive")
+AUDIT_ARCHIVE_COMPRESSION = os.getenv("AUDIT_ARCHIVE_COMPRESSION", "")  # zstd | gzip | none
+AUDIT_MAINTENANCE_INTERVAL = float(os.getenv("AUDIT_MAINTENANCE_INTERVAL", "3600"))
+
+# Busca textual: a ordenação por relevância (bm25) considera só as SEARCH_RANK_WINDOW
+# ocorrências mais recentes do termo, mantendo termos muito comuns abaixo de ~100ms (0: todas)
+SEARCH_RANK_WINDOW = int(os.getenv("SEARCH_RANK_WINDOW", "20000"))
+
+# Exportação em fluxo (NDJSON/CSV): linhas lidas do cursor do banco por lote
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "1000"))
+# Cada exportação usa uma conexão própria, fora do pool de leitura, e mantém um instantâneo
+# aberto até o fim do envio (o checkpoint do WAL não passa dele); acima de EXPORT_MAX_CONCURRENT
+# exportações simultâneas as novas recebem 503
+EXPORT_MAX_CONCURRENT = int(os.getenv("EXPORT_MAX_CONCURRENT", "2"))
+
+# Health checks (/health/ready)
+# O resultado fica em cache por HEALTH_CACHE_TTL segundos para que as sondas do balanceador
+# sejam baratas; a instância deixa de ficar pronta se o banco ou o lock de escrita passarem de
+# HEALTH_MAX_DB_LATENCY_MS, se uma tarefa periódica parar ou se o disco dos backups tiver
+# menos de HEALTH_MIN_FREE_MB livres
+HEALTH_CACHE_TTL = float(os.getenv("HEALTH_CACHE_TTL", "2"))
+HEALTH_PROBE_TIMEOUT = float(os.getenv("HEALTH_PROBE_TIMEOUT", "1"))
+HEALTH_MAX_DB_LATENCY_MS = float(os.getenv("HEALTH_MAX_DB_LATENCY_MS", "500"))
+HEALTH_MIN_FREE_MB = int(os.getenv("HEALTH_MIN_FREE_MB", "512"))
+
+# Profiler de SQL e log de consultas lentas
+# "off": conexões sem instrumentação (padrão); "header": perfila as requisições com o cabeçalho
+# X-SQL-Profile: 1; "always": perfila todas. Fora de "off", comandos acima de SQL_SLOW_QUERY_MS
+# vão para o log "wayne.sql" com o plano de execução (0 desativa)
+SQL_PROFILE = os.getenv("SQL_PROFILE", "off")
+SQL_SLOW_QUERY_MS = float(os.getenv("SQL_SLOW_QUERY_MS", "100"))
+# Um mesmo comando repetido N vezes na requisição é apontado como possível N+1
+SQL_PROFILE_REPEAT_THRESHOLD = int(os.getenv("SQL_PROFILE_REPEAT_THRESHOLD", "5"))
@@ -1,142 +1,588 @@
 import sqlite3
-from datetime import datetime
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 import json
-from typing import List, Dict, Optional
+from typing import Callable, Iterator, List, Dict, Optional
 from models.user import User, UserRole
 from schemas.resource import ResourceOut
+from migrations import apply_migrations, rebuild_dashboard_counters
+from audit_writer import AuditWriter
+from audit_actions import classify_action, OTHER
+from audit_partitions import (
+    AUDIT_LOG_COLUMNS, AUDIT_VIEW, tables_for_range, rotate_audit_log, refresh_audit_view,
+    current_month, shift_month
+)
+from alert_events import alert_broker
+from search_index import (
+    AUDIT_SEARCH, ALERT_SEARCH, AUDIT_SEARCH_COLUMNS, ALERT_SEARCH_COLUMNS, search_enabled, query_terms,
+    match_expression, like_pattern, search_query, rank_floor_query, forget_audit_rows
+)
+from backup_storage import (
+    EXTENSIONS, CompressedWriter, compress_file, decompress_file, default_compression, file_sha256, page_hashes,
+    MANIFEST_SUFFIX, manifest_path, write_manifest, read_manifest, write_incremental, apply_incremental
+)
+from metrics import instrument_methods, record_statement
+from sql_profiler import connection_factory
+from utils.pagination import encode_cursor, decode_cursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from config import (
+    DATABASE_PATH, DB_POOL_SIZE, DB_POOL_TIMEOUT, STORAGE_PROFILE, ALERT_DEDUP_WINDOW,
+    BACKUP_DIR, BACKUP_COMPRESSION, BACKUP_PAGES_PER_STEP, BACKUP_STEP_SLEEP,
+    BACKUP_FULL_EVERY, BACKUP_KEEP_DAILY, BACKUP_KEEP_WEEKLY, AUDIT_RETENTION_MONTHS, AUDIT_ARCHIVE_DIR,
+    AUDIT_ARCHIVE_COMPRESSION, SEARCH_RANK_WINDOW, EXPORT_CHUNK_SIZE,
+    EXPORT_MAX_CONCURRENT
+)
+
+class ExportLimitError(Exception):
+    """Limite de exportações simultâneas atingido"""
+
+
+class ConnectionPool:
+    """Pool limitado de conexões SQLite reutilizáveis entre requisições"""
+
+    def __init__(self, db_path: Path, max_size: int = DB_POOL_SIZE, timeout: float = DB_POOL_TIMEOUT,
+                 read_only: bool = False, isolation_level: str = "", pragmas: Dict = None):
+        self.db_path = db_path
+        self.max_size = max_size
+        self.timeout = timeout
+        self.read_only = read_only
+        self.isolation_level = isolation_level
+        self.pragmas = pragmas or {}
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        # Conexões de gerações anteriores são fechadas ao serem devolvidas
+        self._generation = 0
+        self._generations: Dict[int, int] = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        """Abre uma conexão e aplica os PRAGMAs uma única vez"""
+        # check_same_thread=False: a conexão é usada por uma thread de cada vez,
+        # mas pode ser devolvida ao pool e reutilizada por outra thread do threadpool
+        if self.read_only:
+            database, uri = f"{self.db_path.resolve().as_uri()}?mode=ro", True
+        else:
+            database, uri = str(self.db_path), False
+        conn = sqlite3.connect(
+            database,
+            uri=uri,
+            timeout=self.timeout,
+            isolation_level=self.isolation_level,
+            check_same_thread=False,
+            factory=connection_factory()
+        )
+        for pragma, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {pragma} = {value}")
+        # Conta os comandos SQL no método do DatabaseManager que os executou
+        conn.set_trace_callback(record_statement)
+        return conn
+
+    def open_detached(self) -> sqlite3.Connection:
+        """Conexão com a configuração do pool, mas fora do limite dele (quem abre, fecha)"""
+        return self._connect()
+
+    def acquire(self, timeout: Optional[float] = None) -> sqlite3.Connection:
+        """Obtém uma conexão ociosa ou abre uma nova se o limite permitir"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_create = self._created < self.max_size
+            if can_create:
+                self._created += 1
+                generation = self._generation
+
+        if can_create:
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+            self._generations[id(conn)] = generation
+            return conn
+
+        try:
+            return self._idle.get(timeout=self.timeout if timeout is None else timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError("Pool de conexões esgotado")
+
+    def release(self, conn: sqlite3.Connection):
+        """Devolve a conexão ao pool (ou a fecha se estiver obsoleta)"""
+        if conn.in_transaction:
+            conn.rollback()
+        if self._generations.get(id(conn)) != self._generation:
+            self._discard(conn)
+            return
+        self._idle.put(conn)
+
+    def _discard(self, conn: sqlite3.Connection):
+        self._generations.pop(id(conn), None)
+        with self._lock:
+            self._created -= 1
+        conn.close()
+
+    def close_all(self):
+        """Fecha as conexões ociosas e invalida as que estão em uso"""
+        with self._lock:
+            self._generation += 1
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+    @contextmanager
+    def connection(self):
+        """Empresta uma conexão; commit ao sair sem erro, rollback em caso de exceção"""
+        conn = self.acquire()
+        try:
+            yield conn
+            if conn.in_transaction:
+                conn.commit()
+        except Exception:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            self.release(conn)
 
 class DatabaseManager:
-    def __init__(self, db_path: str = "wayne_secure.db"):
+    def __init__(self, db_path: str = DATABASE_PATH, storage_profile: Dict = None):
         self.db_path = Path(db_path)
-        self.init_database()
+        self.storage_profile = dict(storage_profile or STORAGE_PROFILE)
+        busy_timeout = self.storage_profile["busy_timeout"] / 1000
+        connection_pragmas = {
+            "busy_timeout": self.storage_profile["busy_timeout"],
+            "synchronous": self.storage_profile["synchronous"],
+            "cache_size": self.storage_profile["cache_size"],
+            "mmap_size": self.storage_profile["mmap_size"],
+            "temp_store": self.storage_profile["temp_store"],
+        }
+        # Escritor único: serializa as escritas do processo e usa BEGIN IMMEDIATE
+        # para que a disputa entre workers seja resolvida pelo busy_timeout
+        self.writer_pool = ConnectionPool(
+            self.db_path,
+            max_size=1,
+            timeout=busy_timeout,
+            isolation_level="IMMEDIATE",
+            pragmas={"foreign_keys": "ON", **connection_pragmas}
+        )
+        self.reader_pool = ConnectionPool(
+            self.db_path,
+            read_only=True,
+            pragmas={"query_only": "ON", **connection_pragmas}
+        )
+        # Exportações não emprestam conexões do pool: usam conexões próprias, em número limitado
+        self._export_slots = threading.BoundedSemaphore(EXPORT_MAX_CONCURRENT)
+        self.audit_writer = AuditWriter(self._write_audit_batch)
+        self.alert_dedup_window = ALERT_DEDUP_WINDOW
+        # O banco não é tocado na importação: as migrações rodam no lifespan da aplicação
+        # ou, em scripts, no primeiro uso de uma conexão
+        self._initialized = False
+        self._init_lock = threading.Lock()
+        self._full_text_search = False
+
+    def writer(self):
+        """Empresta a conexão de escrita (uma por processo)"""
+        self._ensure_initialized()
+        return self.writer_pool.connection()
+
+    def reader(self):
+        """Empresta uma conexão somente leitura do pool"""
+        self._ensure_initialized()
+        return self.reader_pool.connection()
+
+    @property
+    def initialized(self) -> bool:
+        return self._initialized
+
+    @property
+    def full_text_search(self) -> bool:
+        """Se os índices FTS5 existem (sem FTS5 no SQLite a busca usa LIKE)"""
+        self._ensure_initialized()
+        return self._full_text_search
+
+    def _ensure_initialized(self):
+        if self._initialized:
+            return
+        with self._init_lock:
+            if not self._initialized:
+                self.init_database()
+
+    def probe(self, timeout: float) -> Dict[str, float]:
+        """
+        Latência (ms) de uma consulta trivial no pool de leitura e da espera pelo lock de
+        escrita (conexão do pool + BEGIN IMMEDIATE), cada uma limitada a timeout segundos
+        """
+        started = time.perf_counter()
+        conn = self.reader_pool.acquire(timeout)
+        try:
+            conn.execute("SELECT 1").fetchone()
+        finally:
+            self.reader_pool.release(conn)
+        read_ms = (time.perf_counter() - started) * 1000
+        
+        started = time.perf_counter()
+        conn = self.writer_pool.acquire(timeout)
+        try:
+            conn.execute(f"PRAGMA busy_timeout = {int(timeout * 1000)}")
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute("ROLLBACK")
+            finally:
+                conn.execute(f"PRAGMA busy_timeout = {self.storage_profile['busy_timeout']}")
+        finally:
+            self.writer_pool.release(conn)
+        write_lock_ms = (time.perf_counter() - started) * 1000
+        return {"read_ms": round(read_ms, 3), "write_lock_ms": round(write_lock_ms, 3)}
     
+    def close_connections(self):
+        """Fecha as conexões de leitura e escrita"""
+        self.writer_pool.close_all()
+        self.reader_pool.close_all()
+
     def init_database(self):
-        """Inicializa o banco de dados com as tabelas necessárias"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            # Tabela de usuários
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS users (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    username TEXT UNIQUE NOT NULL,
-                    password_hash TEXT NOT NULL,
-                    role TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    last_login TIMESTAMP,
-                    is_active BOOLEAN DEFAULT 1
-                )
-            """)
-            
-            # Tabela de recursos
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS resources (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    type TEXT,
-                    description TEXT,
-                    status TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    created_by TEXT
-                )
-            """)
+        """Inicializa o banco de dados aplicando as migrações pendentes"""
+        # Usa o pool direto: writer() chamaria a inicialização de novo
+        with self.writer_pool.connection() as conn:
+            # journal_mode é persistente no arquivo e não pode mudar dentro de transação
+            conn.execute(f"PRAGMA journal_mode = {self.storage_profile['journal_mode']}")
+            apply_migrations(conn)
+            self._full_text_search = search_enabled(conn)
+        self._initialized = True
             
-            # Tabela de alertas
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS alerts (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    alert_type TEXT NOT NULL,
-                    message TEXT NOT NULL,
-                    level TEXT NOT NULL,
-                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    is_resolved BOOLEAN DEFAULT 0,
-                    resolved_by TEXT,
-                    resolved_at TIMESTAMP
-                )
-            """)
-            
-            # Tabela de sessões ativas
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS active_sessions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    username TEXT NOT NULL,
-                    token_hash TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    expires_at TIMESTAMP NOT NULL,
-                    last_activity TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            # Tabela de auditoria
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS audit_log (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    username TEXT NOT NULL,
-                    action TEXT NOT NULL,
-                    resource_type TEXT,
-                    resource_id INTEGER,
-                    details TEXT,
-                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    ip_address TEXT,
-                    user_agent TEXT
-                )
-            """)
-            
-            # Tabela de backups
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS backups (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    backup_type TEXT NOT NULL,
-                    file_path TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    size_bytes INTEGER,
-                    checksum TEXT
-                )
-            """)
-            
-            conn.commit()
-            
-    def create_backup(self, backup_type: str = "full") -> str:
-        """Cria um backup do banco de dados"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_path = Path(f"backups/backup_{backup_type}_{timestamp}.db")
-        backup_path.parent.mkdir(exist_ok=True)
+    def create_backup(self, backup_type: str = "full", incremental: bool = False) -> str:
+        """
+        Cria um backup online do banco (API de backup do SQLite), comprimido e com checksum.
+        Com incremental=True grava só as páginas alteradas desde o último backup do mesmo tipo,
+        desde que a cadeia não tenha chegado a BACKUP_FULL_EVERY incrementais.
+        """
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        backup_dir = Path(BACKUP_DIR)
+        backup_dir.mkdir(exist_ok=True)
+        compression = BACKUP_COMPRESSION or default_compression()
+        snapshot_path = backup_dir / f".snapshot_{backup_type}_{timestamp}.db"
+        backup_path = None
         
-        # Copia o banco atual
-        import shutil
-        shutil.copy2(self.db_path, backup_path)
+        try:
+            self._snapshot_to(snapshot_path)
+            page_size = self._page_size(snapshot_path)
+            page_count = snapshot_path.stat().st_size // page_size
+            base = self._incremental_base(backup_type, page_size) if incremental else None
+            if base is not None:
+                base_id, base_hashes = base
+                backup_path = backup_dir / f"backup_{backup_type}_{timestamp}.inc{EXTENSIONS[compression]}"
+                size_bytes, checksum, changed_pages, hashes = write_incremental(
+                    snapshot_path, backup_path, compression, page_size, base_hashes
+                )
+            else:
+                base_id = None
+                backup_path = backup_dir / f"backup_{backup_type}_{timestamp}.db{EXTENSIONS[compression]}"
+                size_bytes, checksum = compress_file(snapshot_path, backup_path, compression)
+                changed_pages, hashes = page_count, page_hashes(snapshot_path, page_size)
+            write_manifest(backup_path, page_size, hashes)
+        except Exception:
+            if backup_path is not None:
+                backup_path.unlink(missing_ok=True)
+                manifest_path(backup_path).unlink(missing_ok=True)
+            raise
+        finally:
+            snapshot_path.unlink(missing_ok=True)
         
         # Registra o backup
-        with sqlite3.connect(self.db_path) as conn:
+        with self.writer() as conn:
             cursor = conn.cursor()
             cursor.execute("""
-                INSERT INTO backups (backup_type, file_path, size_bytes)
-                VALUES (?, ?, ?)
-            """, (backup_type, str(backup_path), backup_path.stat().st_size))
+                INSERT INTO backups (backup_type, file_path, size_bytes, checksum, kind, base_backup_id,
+                                     page_size, page_count, changed_pages)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (backup_type, str(backup_path), size_bytes, checksum,
+                  "full" if base_id is None else "incremental", base_id, page_size, page_count, changed_pages))
             conn.commit()
             
         return str(backup_path)
     
+    def _snapshot_to(self, target_path: Path):
+        """Copia um instantâneo consistente do banco para target_path, em passos de páginas"""
+        target = sqlite3.connect(str(target_path))
+        try:
+            # A transação de leitura aberta fixa o instantâneo: no modo WAL os escritores
+            # continuam, e a cópia não recomeça a cada escrita feita entre os passos
+            with self.reader() as conn:
+                conn.execute("BEGIN")
+                conn.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchall()
+                conn.backup(target, pages=BACKUP_PAGES_PER_STEP, sleep=BACKUP_STEP_SLEEP)
+        finally:
+            target.close()
+    
+    @staticmethod
+    def _page_size(db_file: Path) -> int:
+        conn = sqlite3.connect(str(db_file))
+        try:
+            return conn.execute("PRAGMA page_size").fetchone()[0]
+        finally:
+            conn.close()
+    
+    def _incremental_base(self, backup_type: str, page_size: int):
+        """Retorna (id, hashes das páginas) do backup base para um incremental, ou None se for a vez de um completo"""
+        with self.reader() as conn:
+            row = conn.execute("""
+                SELECT id, file_path FROM backups
+                WHERE backup_type = ? ORDER BY created_at DESC, id DESC LIMIT 1
+            """, (backup_type,)).fetchone()
+        if row is None:
+            return None
+        try:
+            chain = self.resolve_restore_chain(row[1])
+        except ValueError:
+            return None
+        if len(chain) > BACKUP_FULL_EVERY or not all(Path(link["file_path"]).exists() for link in chain):
+            return None
+        manifest = read_manifest(Path(row[1]))
+        if manifest is None or manifest[0] != page_size:
+            return None
+        return row[0], manifest[1]
+    
+    def resolve_restore_chain(self, backup_path: str) -> List[Dict]:
+        """
+        Backups necessários para restaurar backup_path, do completo até ele.
+        Arquivos fora do catálogo são tratados como backups completos.
+        """
+        with self.reader() as conn:
+            rows = conn.execute("""
+                WITH RECURSIVE chain (id, base_backup_id, file_path, checksum, kind, depth) AS (
+                    SELECT id, base_backup_id, file_path, checksum, kind, 0
+                    FROM backups WHERE file_path = ?
+                    UNION ALL
+                    SELECT b.id, b.base_backup_id, b.file_path, b.checksum, b.kind, chain.depth + 1
+                    FROM backups b JOIN chain ON b.id = chain.base_backup_id
+                )
+                SELECT file_path, checksum, kind FROM chain ORDER BY depth DESC
+            """, (backup_path,)).fetchall()
+        if not rows:
+            return [{"file_path": backup_path, "checksum": None, "kind": "full"}]
+        chain = [{"file_path": r[0], "checksum": r[1], "kind": r[2]} for r in rows]
+        if chain[0]["kind"] != "full":
+            raise ValueError(f"Cadeia de backups incompleta para {backup_path}")
+        return chain
+    
+    def get_backup_checksum(self, backup_path: str) -> Optional[str]:
+        with self.reader() as conn:
+            row = conn.execute(
+                "SELECT checksum FROM backups WHERE file_path = ? ORDER BY id DESC LIMIT 1", (backup_path,)
+            ).fetchone()
+        return row[0] if row else None
+    
     def restore_backup(self, backup_path: str) -> bool:
-        """Restaura um backup do banco de dados"""
+        """Restaura um backup do banco de dados (aplicando a cadeia de incrementais, se houver)"""
+        snapshot_path = None
         try:
             backup_file = Path(backup_path)
             if not backup_file.exists():
                 return False
+            
+            # Todos os elos da cadeia são conferidos antes de qualquer mudança
+            chain = self.resolve_restore_chain(backup_path)
+            for link in chain:
+                link_file = Path(link["file_path"])
+                if not link_file.exists():
+                    print(f"Erro ao restaurar backup: arquivo da cadeia ausente: {link_file}")
+                    return False
+                if link["checksum"] and file_sha256(link_file) != link["checksum"]:
+                    print(f"Erro ao restaurar backup: checksum não confere para {link_file}")
+                    return False
                 
             # Cria backup do estado atual antes de restaurar
             self.create_backup("pre_restore")
             
-            # Restaura o backup
-            import shutil
-            shutil.copy2(backup_file, self.db_path)
+            snapshot_path = backup_file.with_name(f".restore_{backup_file.name}.db")
+            decompress_file(Path(chain[0]["file_path"]), snapshot_path)
+            for link in chain[1:]:
+                apply_incremental(snapshot_path, Path(link["file_path"]))
+            
+            source = sqlite3.connect(str(snapshot_path))
+            try:
+                if len(chain) > 1 and source.execute("PRAGMA quick_check").fetchone()[0] != "ok":
+                    print("Erro ao restaurar backup: banco reconstruído da cadeia está corrompido")
+                    return False
+                
+                # O catálogo de backups do arquivo restaurado é mais antigo que o atual
+                with self.reader() as conn:
+                    catalog = conn.execute(f"SELECT {self.BACKUP_COLUMNS} FROM backups").fetchall()
+                
+                # A API de backup grava pelo SQLite (respeitando o WAL e os locks), então as
+                # conexões do pool continuam válidas e passam a ver o conteúdo restaurado
+                with self.writer() as conn:
+                    source.backup(conn, pages=BACKUP_PAGES_PER_STEP)
+            finally:
+                source.close()
+            
+            # Backups antigos podem estar em uma versão anterior do esquema
+            self.init_database()
+            
+            with self.writer() as conn:
+                conn.execute("DELETE FROM backups")
+                conn.executemany(
+                    f"INSERT INTO backups ({self.BACKUP_COLUMNS}) VALUES ({', '.join('?' * len(catalog[0]))})",
+                    catalog
+                )
+            
+            # Nova época: o contador de geração restaurado pode repetir valores já servidos
+            with self.writer() as conn:
+                conn.execute(
+                    "UPDATE data_generation SET epoch = lower(hex(randomblob(8))) WHERE name = 'dashboard'"
+                )
             
             return True
         except Exception as e:
             print(f"Erro ao restaurar backup: {e}")
             return False
+        finally:
+            if snapshot_path is not None:
+                snapshot_path.unlink(missing_ok=True)
+    
+    BACKUP_COLUMNS = """id, backup_type, file_path, created_at, size_bytes, checksum, kind, base_backup_id,
+                        page_size, page_count, changed_pages, missing"""
+    
+    @staticmethod
+    def _backup_from_row(row) -> Dict:
+        return {
+            "id": row[0],
+            "backup_type": row[1],
+            "file_path": row[2],
+            "created_at": row[3],
+            "size_bytes": row[4],
+            "checksum": row[5],
+            "kind": row[6],
+            "base_backup_id": row[7],
+            "page_size": row[8],
+            "page_count": row[9],
+            "changed_pages": row[10],
+            "available": not row[11]
+        }
+    
+    def get_backup_list(self, limit: int = DEFAULT_PAGE_SIZE, backup_type: str = None) -> List[Dict]:
+        """Lista o catálogo de backups (mais recentes primeiro) com o tamanho da cadeia de restauração"""
+        where, params = ("WHERE backup_type = ?", [backup_type]) if backup_type else ("", [])
+        with self.reader() as conn:
+            rows = conn.execute(f"""
+                SELECT {self.BACKUP_COLUMNS} FROM backups {where}
+                ORDER BY created_at DESC, id DESC LIMIT ?
+            """, (*params, min(limit, MAX_PAGE_SIZE))).fetchall()
+            # Profundidade da cadeia: quantos backups precisam ser aplicados para restaurar cada um
+            depths = dict(conn.execute("""
+                WITH RECURSIVE chain (id, depth) AS (
+                    SELECT id, 1 FROM backups WHERE base_backup_id IS NULL
+                    UNION ALL
+                    SELECT b.id, chain.depth + 1 FROM backups b JOIN chain ON b.base_backup_id = chain.id
+                )
+                SELECT id, depth FROM chain
+            """).fetchall())
+        backups = []
+        for row in rows:
+            backup = self._backup_from_row(row)
+            backup["chain_length"] = depths.get(backup["id"])
+            backups.append(backup)
+        return backups
+    
+    def count_backups(self) -> int:
+        """Backups catalogados cujo arquivo está no disco"""
+        with self.reader() as conn:
+            return conn.execute("SELECT COUNT(*) FROM backups WHERE missing = 0").fetchone()[0]
+    
+    def reconcile_backup_catalog(self) -> Dict[str, int]:
+        """
+        Sincroniza o catálogo de backups com BACKUP_DIR: marca linhas cujo arquivo sumiu,
+        desmarca as que voltaram e cataloga arquivos de backup desconhecidos
+        """
+        backup_dir = Path(BACKUP_DIR)
+        on_disk = {
+            str(path): path for path in backup_dir.glob("backup_*")
+            if path.is_file() and not path.name.endswith(MANIFEST_SUFFIX)
+        } if backup_dir.exists() else {}
+        
+        with self.reader() as conn:
+            catalog = dict(conn.execute("SELECT file_path, missing FROM backups").fetchall())
+        
+        missing = [(path,) for path, flag in catalog.items() if not flag and path not in on_disk]
+        found = [(path,) for path, flag in catalog.items() if flag and path in on_disk]
+        added = []
+        for file_path, path in on_disk.items():
+            if file_path in catalog:
+                continue
+            # Nome no formato backup_{tipo}_{AAAAMMDD}_{HHMMSS}[_{micro}].{db|inc}[.gz|.zst]
+            name = path.name.split(".")[0]
+            parts = name[len("backup_"):].split("_")
+            backup_type = "_".join(p for p in parts if not p.isdigit()) or "unknown"
+            kind = "incremental" if ".inc" in path.suffixes else "full"
+            stat = path.stat()
+            created_at = datetime.fromtimestamp(stat.st_mtime, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+            added.append((backup_type, file_path, created_at, stat.st_size, file_sha256(path), kind))
+        
+        with self.writer() as conn:
+            conn.executemany("UPDATE backups SET missing = 1 WHERE file_path = ?", missing)
+            conn.executemany("UPDATE backups SET missing = 0 WHERE file_path = ?", found)
+            # Incrementais órfãos entram sem base: a cadeia deles não pode ser resolvida
+            conn.executemany("""
+                INSERT INTO backups (backup_type, file_path, created_at, size_bytes, checksum, kind)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, added)
+        
+        result = {"added": len(added), "missing": len(missing), "found": len(found)}
+        if added or missing or found:
+            logging.getLogger("wayne.db").info(f"Catálogo de backups reconciliado: {result}")
+        return result
+    
+    def apply_backup_retention(self, backup_type: str = "automatic", keep_daily: int = BACKUP_KEEP_DAILY,
+                               keep_weekly: int = BACKUP_KEEP_WEEKLY) -> List[str]:
+        """
+        Remove backups do tipo fora da política de retenção: fica o mais recente de cada um
+        dos últimos keep_daily dias e keep_weekly semanas, mais os backups dos quais estes
+        dependem. Retorna os arquivos removidos.
+        """
+        with self.reader() as conn:
+            rows = conn.execute("""
+                SELECT id, file_path, created_at, base_backup_id FROM backups
+                WHERE backup_type = ? ORDER BY created_at DESC, id DESC
+            """, (backup_type,)).fetchall()
+        
+        keep = set()
+        days, weeks = set(), set()
+        for backup_id, _, created_at, _ in rows:
+            moment = datetime.fromisoformat(created_at)
+            day, week = moment.date(), moment.isocalendar()[:2]
+            if day not in days and len(days) < keep_daily:
+                days.add(day)
+                keep.add(backup_id)
+            if week not in weeks and len(weeks) < keep_weekly:
+                weeks.add(week)
+                keep.add(backup_id)
+        
+        # Incrementais mantidos precisam da cadeia inteira até o backup completo
+        base_of = {row[0]: row[3] for row in rows}
+        for backup_id in list(keep):
+            base_id = base_of.get(backup_id)
+            while base_id is not None and base_id not in keep:
+                keep.add(base_id)
+                base_id = base_of.get(base_id)
+        
+        removed = [(row[0], row[1]) for row in rows if row[0] not in keep]
+        if not removed:
+            return []
+        with self.writer() as conn:
+            conn.executemany("DELETE FROM backups WHERE id = ?", [(backup_id,) for backup_id, _ in removed])
+        for _, file_path in removed:
+            Path(file_path).unlink(missing_ok=True)
+            manifest_path(Path(file_path)).unlink(missing_ok=True)
+        return [file_path for _, file_path in removed]
     
     def add_user(self, username: str, password_hash: str, role: str) -> Optional[int]:
         """Adiciona um novo usuário ao banco (sempre ativo)"""
@@ -145,7 +591,7 @@ class DatabaseManager:
         #     INSERT INTO users (username, password_hash, role)
         #     VALUES (?, ?, ?)
         # """, (username, password_hash, role))
-        with sqlite3.connect(self.db_path) as conn:
+        with self.writer() as conn:
             cursor = conn.cursor()
             try:
                 cursor.execute("""
@@ -159,7 +605,7 @@ class DatabaseManager:
     
     def get_user(self, username: str) -> Optional[Dict]:
         """Busca um usuário pelo username"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.reader() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT id, username, password_hash, role, created_at, last_login, is_active
@@ -181,7 +627,7 @@ class DatabaseManager:
     
     def update_last_login(self, username: str):
         """Atualiza o último login do usuário"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.writer() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 UPDATE users SET last_login = CURRENT_TIMESTAMP
@@ -189,9 +635,40 @@ class DatabaseManager:
             """, (username,))
             conn.commit()
     
+    def get_active_users(self) -> List[Dict]:
+        """Lista os usuários ativos"""
+        with self.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT username, role FROM users WHERE is_active = 1")
+            return [{"username": row[0], "role": row[1]} for row in cursor.fetchall()]
+    
+    def update_user_role(self, username: str, role: str) -> bool:
+        """Altera o perfil de um usuário"""
+        with self.writer() as conn:
+            cursor = conn.cursor()
+            cursor.execute("UPDATE users SET role = ? WHERE username = ?", (role, username))
+            conn.commit()
+            return cursor.rowcount > 0
+    
+    def update_user_password(self, username: str, password_hash: str) -> bool:
+        """Altera a senha de um usuário"""
+        with self.writer() as conn:
+            cursor = conn.cursor()
+            cursor.execute("UPDATE users SET password_hash = ? WHERE username = ?", (password_hash, username))
+            conn.commit()
+            return cursor.rowcount > 0
+    
+    def deactivate_user(self, username: str) -> bool:
+        """Desativa um usuário (exclusão lógica)"""
+        with self.writer() as conn:
+            cursor = conn.cursor()
+            cursor.execute("UPDATE users SET is_active = 0 WHERE username = ?", (username,))
+            conn.commit()
+            return cursor.rowcount > 0
+    
     def add_resource(self, name: str, type: str, description: str, status: str, created_by: str) -> int:
         """Adiciona um novo recurso"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.writer() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 INSERT INTO resources (name, type, description, status, created_by)
@@ -200,33 +677,47 @@ class DatabaseManager:
             conn.commit()
             return cursor.lastrowid
     
+    RESOURCE_COLUMNS = "id, name, type, description, status, created_at, updated_at, created_by"
+    
+    @staticmethod
+    def _resource_from_row(row) -> Dict:
+        return {
+            "id": row[0],
+            "name": row[1],
+            "type": row[2],
+            "description": row[3],
+            "status": row[4],
+            "created_at": row[5],
+            "updated_at": row[6],
+            "created_by": row[7]
+        }
+    
     def get_resources(self) -> List[Dict]:
         """Busca todos os recursos"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.reader() as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                SELECT id, name, type, description, status, created_at, updated_at, created_by
+            cursor.execute(f"""
+                SELECT {self.RESOURCE_COLUMNS}
                 FROM resources ORDER BY created_at DESC
             """)
-            rows = cursor.fetchall()
-            
-            return [
-                {
-                    "id": row[0],
-                    "name": row[1],
-                    "type": row[2],
-                    "description": row[3],
-                    "status": row[4],
-                    "created_at": row[5],
-                    "updated_at": row[6],
-                    "created_by": row[7]
-                }
-                for row in rows
-            ]
+            return [self._resource_from_row(row) for row in cursor.fetchall()]
+    
+    def get_resources_page(self, limit: int = DEFAULT_PAGE_SIZE, cursor: str = None, status: str = None,
+                           type: str = None, created_by: str = None, since: str = None,
+                           until: str = None) -> Dict:
+        """Busca uma página de recursos (mais recentes primeiro) com filtros"""
+        conditions, params = self._filters(
+            ("status = ?", status), ("type = ?", type), ("created_by = ?", created_by),
+            ("created_at >= ?", since), ("created_at < ?", until)
+        )
+        return self._fetch_page(
+            f"SELECT {self.RESOURCE_COLUMNS} FROM resources", "created_at",
+            conditions, params, limit, cursor, self._resource_from_row
+        )
     
     def update_resource(self, resource_id: int, name: str, type: str, description: str, status: str) -> bool:
         """Atualiza um recurso existente"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.writer() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 UPDATE resources 
@@ -238,56 +729,114 @@ class DatabaseManager:
     
     def delete_resource(self, resource_id: int) -> bool:
         """Remove um recurso"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.writer() as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM resources WHERE id = ?", (resource_id,))
             conn.commit()
             return cursor.rowcount > 0
     
-    def add_alert(self, alert_type: str, message: str, level: str) -> int:
-        """Adiciona um novo alerta"""
-        with sqlite3.connect(self.db_path) as conn:
+    def add_alert(self, alert_type: str, message: str, level: str, subject: str = None) -> int:
+        """Adiciona um alerta, agregando repetições da mesma chave dentro da janela"""
+        subject = message if subject is None else subject
+        with self.writer() as conn:
             cursor = conn.cursor()
+            # BEGIN explícito: a busca e a escrita precisam ser atômicas entre workers
+            cursor.execute("BEGIN IMMEDIATE")
+            if self.alert_dedup_window > 0:
+                cursor.execute("""
+                    SELECT id FROM alerts
+                    WHERE alert_type = ? AND level = ? AND subject = ? AND is_resolved = 0
+                      AND last_seen >= datetime('now', ?)
+                    ORDER BY last_seen DESC LIMIT 1
+                """, (alert_type, level, subject, f"-{self.alert_dedup_window} seconds"))
+                row = cursor.fetchone()
+                if row:
+                    cursor.execute("""
+                        UPDATE alerts SET occurrences = occurrences + 1, last_seen = CURRENT_TIMESTAMP
+                        WHERE id = ?
+                    """, (row[0],))
+                    conn.commit()
+                    self._publish_alert(conn, "updated", row[0])
+                    return row[0]
             cursor.execute("""
-                INSERT INTO alerts (alert_type, message, level)
-                VALUES (?, ?, ?)
-            """, (alert_type, message, level))
+                INSERT INTO alerts (alert_type, message, level, subject, last_seen)
+                VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+            """, (alert_type, message, level, subject))
             conn.commit()
+            self._publish_alert(conn, "created", cursor.lastrowid)
             return cursor.lastrowid
     
+    def _publish_alert(self, conn: sqlite3.Connection, event_type: str, alert_id: int):
+        """Publica o estado atual do alerta para os streams conectados"""
+        if not alert_broker.has_subscribers:
+            return
+        row = conn.execute(f"SELECT {self.ALERT_COLUMNS} FROM alerts WHERE id = ?", (alert_id,)).fetchone()
+        if row:
+            alert_broker.publish(event_type, self._alert_from_row(row))
+    
+    ALERT_COLUMNS = """id, alert_type, message, level, timestamp, is_resolved, resolved_by, resolved_at,
+                       occurrences, last_seen"""
+    
+    @staticmethod
+    def _alert_from_row(row) -> Dict:
+        return {
+            "id": row[0],
+            "type": row[1],
+            "message": row[2],
+            "level": row[3],
+            "timestamp": row[4],
+            "is_resolved": row[5],
+            "resolved_by": row[6],
+            "resolved_at": row[7],
+            "occurrences": row[8],
+            "last_seen": row[9]
+        }
+    
     def get_alerts(self, include_resolved: bool = False) -> List[Dict]:
         """Busca alertas"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.reader() as conn:
             cursor = conn.cursor()
             if include_resolved:
-                cursor.execute("""
-                    SELECT id, alert_type, message, level, timestamp, is_resolved, resolved_by, resolved_at
+                cursor.execute(f"""
+                    SELECT {self.ALERT_COLUMNS}
                     FROM alerts ORDER BY timestamp DESC
                 """)
             else:
-                cursor.execute("""
-                    SELECT id, alert_type, message, level, timestamp, is_resolved, resolved_by, resolved_at
+                cursor.execute(f"""
+                    SELECT {self.ALERT_COLUMNS}
                     FROM alerts WHERE is_resolved = 0 ORDER BY timestamp DESC
                 """)
-            
-            rows = cursor.fetchall()
-            return [
-                {
-                    "id": row[0],
-                    "type": row[1],
-                    "message": row[2],
-                    "level": row[3],
-                    "timestamp": row[4],
-                    "is_resolved": row[5],
-                    "resolved_by": row[6],
-                    "resolved_at": row[7]
-                }
-                for row in rows
-            ]
+            return [self._alert_from_row(row) for row in cursor.fetchall()]
+    
+    def get_alerts_page(self, limit: int = DEFAULT_PAGE_SIZE, cursor: str = None,
+                        include_resolved: bool = False, level: str = None, alert_type: str = None,
+                        since: str = None, until: str = None) -> Dict:
+        """Busca uma página de alertas (mais recentes primeiro) com filtros"""
+        conditions, params = self._filters(
+            ("is_resolved = ?", None if include_resolved else 0), ("level = ?", level),
+            ("alert_type = ?", alert_type), ("timestamp >= ?", since), ("timestamp < ?", until)
+        )
+        return self._fetch_page(
+            f"SELECT {self.ALERT_COLUMNS} FROM alerts", "timestamp",
+            conditions, params, limit, cursor, self._alert_from_row
+        )
+    
+    def get_alerts_after(self, last_id: int, limit: int) -> List[Dict]:
+        """Alertas criados depois de last_id, em ordem (retomada do stream de alertas)"""
+        with self.reader() as conn:
+            cursor = conn.execute(f"""
+                SELECT {self.ALERT_COLUMNS}
+                FROM alerts WHERE id > ? ORDER BY id LIMIT ?
+            """, (last_id, limit))
+            return [self._alert_from_row(row) for row in cursor.fetchall()]
+    
+    def get_last_alert_id(self) -> int:
+        with self.reader() as conn:
+            return conn.execute("SELECT COALESCE(MAX(id), 0) FROM alerts").fetchone()[0]
     
     def resolve_alert(self, alert_id: int, resolved_by: str) -> bool:
         """Marca um alerta como resolvido"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.writer() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 UPDATE alerts 
@@ -295,59 +844,402 @@ class DatabaseManager:
                 WHERE id = ?
             """, (resolved_by, alert_id))
             conn.commit()
-            return cursor.rowcount > 0
+            if cursor.rowcount == 0:
+                return False
+            self._publish_alert(conn, "resolved", alert_id)
+            return True
     
     def log_audit(self, username: str, action: str, resource_type: str = None, 
                   resource_id: int = None, details: str = None, ip_address: str = None, 
                   user_agent: str = None):
-        """Registra uma ação de auditoria"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO audit_log (username, action, resource_type, resource_id, details, ip_address, user_agent)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (username, action, resource_type, resource_id, details, ip_address, user_agent))
+        """Registra uma ação de auditoria (gravada em lote pelo AuditWriter)"""
+        # O horário é capturado agora, no mesmo formato UTC de CURRENT_TIMESTAMP,
+        # para não depender de quando o lote for gravado
+        timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        self.audit_writer.submit(
+            (username, action, resource_type, resource_id, details, timestamp, ip_address, user_agent)
+        )
+    
+    def _write_audit_batch(self, rows: List[tuple]):
+        """Grava um lote de eventos de auditoria em uma única transação"""
+        actions = {row[1] for row in rows}
+        with self.writer() as conn:
+            # Ações novas são cadastradas na hora; os ids nunca mudam depois de criados
+            conn.executemany(
+                "INSERT OR IGNORE INTO audit_actions (name, category) VALUES (?, ?)",
+                [(action, classify_action(action)) for action in actions]
+            )
+            placeholders = ", ".join("?" * len(actions))
+            action_ids = dict(conn.execute(
+                f"SELECT name, id FROM audit_actions WHERE name IN ({placeholders})", tuple(actions)
+            ).fetchall())
+            conn.executemany("""
+                INSERT INTO audit_log (username, action, action_id, resource_type, resource_id, details,
+                                       timestamp, ip_address, user_agent)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [(row[0], row[1], action_ids[row[1]], *row[2:]) for row in rows])
             conn.commit()
     
+    AUDIT_COLUMNS = "id, username, action, resource_type, resource_id, details, timestamp, ip_address, user_agent"
+    
+    @staticmethod
+    def _audit_from_row(row) -> Dict:
+        return {
+            "id": row[0],
+            "username": row[1],
+            "action": row[2],
+            "resource_type": row[3],
+            "resource_id": row[4],
+            "details": row[5],
+            "timestamp": row[6],
+            "ip_address": row[7],
+            "user_agent": row[8]
+        }
+    
     def get_audit_logs(self, limit: int = 100) -> List[Dict]:
         """Busca logs de auditoria"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT id, username, action, resource_type, resource_id, details, timestamp, ip_address, user_agent
-                FROM audit_log ORDER BY timestamp DESC LIMIT ?
-            """, (limit,))
-            
-            rows = cursor.fetchall()
-            return [
-                {
-                    "id": row[0],
-                    "username": row[1],
-                    "action": row[2],
-                    "resource_type": row[3],
-                    "resource_id": row[4],
-                    "details": row[5],
-                    "timestamp": row[6],
-                    "ip_address": row[7],
-                    "user_agent": row[8]
-                }
-                for row in rows
-            ]
+        self.audit_writer.flush()
+        with self.reader() as conn:
+            conn.execute("BEGIN")
+            # Cada partição é lida pelo índice de timestamp e o SQLite intercala os resultados
+            union = " UNION ALL ".join(
+                f"SELECT {self.AUDIT_COLUMNS} FROM {table}" for table in tables_for_range(conn)
+            )
+            cursor = conn.execute(f"{union} ORDER BY timestamp DESC LIMIT ?", (limit,))
+            return [self._audit_from_row(row) for row in cursor.fetchall()]
+    
+    def get_audit_logs_page(self, limit: int = DEFAULT_PAGE_SIZE, cursor: str = None, username: str = None,
+                            action: str = None, resource_type: str = None, since: str = None,
+                            until: str = None) -> Dict:
+        """Busca uma página de logs de auditoria (mais recentes primeiro) com filtros"""
+        self.audit_writer.flush()
+        conditions, params = self._filters(
+            ("username = ?", username),
+            ("action_id = (SELECT id FROM audit_actions WHERE name = ?)", action),
+            ("resource_type = ?", resource_type),
+            ("timestamp >= ?", since), ("timestamp < ?", until)
+        )
+        # Só as partições cujo mês cruza o intervalo (e que estão antes do cursor) são lidas
+        return self._fetch_page(
+            f"SELECT {self.AUDIT_COLUMNS} FROM {{table}}", "timestamp",
+            conditions, params, limit, cursor, self._audit_from_row,
+            route=lambda conn, through: tables_for_range(conn, since, until, through)
+        )
+    
+    def iter_audit_logs(self, username: str = None, action: str = None, resource_type: str = None,
+                        since: str = None, until: str = None) -> Iterator[List[Dict]]:
+        """Logs de auditoria em ordem cronológica, em lotes (exportação com memória constante)"""
+        self.audit_writer.flush()
+        conditions, params = self._filters(
+            ("username = ?", username),
+            ("action_id = (SELECT id FROM audit_actions WHERE name = ?)", action),
+            ("resource_type = ?", resource_type),
+            ("timestamp >= ?", since), ("timestamp < ?", until)
+        )
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        
+        def build(conn):
+            tables = tables_for_range(conn, since, until)
+            union = " UNION ALL ".join(f"SELECT {self.AUDIT_COLUMNS} FROM {table} {where}" for table in tables)
+            return f"{union} ORDER BY timestamp, id", params * len(tables)
+        
+        return self._iter_query(build, self._audit_from_row)
+    
+    def iter_alerts(self, include_resolved: bool = True, level: str = None, alert_type: str = None,
+                    since: str = None, until: str = None) -> Iterator[List[Dict]]:
+        """Alertas em ordem de criação, em lotes"""
+        conditions, params = self._filters(
+            ("is_resolved = ?", None if include_resolved else 0), ("level = ?", level),
+            ("alert_type = ?", alert_type), ("timestamp >= ?", since), ("timestamp < ?", until)
+        )
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return self._iter_query(
+            lambda conn: (f"SELECT {self.ALERT_COLUMNS} FROM alerts {where} ORDER BY id", params),
+            self._alert_from_row
+        )
+    
+    def iter_resources(self, status: str = None, type: str = None) -> Iterator[List[Dict]]:
+        """Recursos em ordem de cadastro, em lotes"""
+        conditions, params = self._filters(("status = ?", status), ("type = ?", type))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return self._iter_query(
+            lambda conn: (f"SELECT {self.RESOURCE_COLUMNS} FROM resources {where} ORDER BY id", params),
+            self._resource_from_row
+        )
+    
+    def _iter_query(self, build: Callable, from_row, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[List[Dict]]:
+        """
+        Percorre o cursor da consulta build(conn) -> (sql, params) em lotes de chunk_size, numa
+        conexão somente leitura própria (fora do pool) aberta até o fim da iteração ou até o
+        gerador ser fechado. Sem vaga para mais uma exportação, levanta ExportLimitError na hora.
+        """
+        self._ensure_initialized()
+        if not self._export_slots.acquire(blocking=False):
+            raise ExportLimitError("Muitas exportações em andamento. Tente novamente em instantes.")
+        try:
+            conn = self.reader_pool.open_detached()
+        except Exception:
+            self._export_slots.release()
+            raise
+        chunks = self._iter_chunks(conn, build, from_row, chunk_size)
+        # Entra no try do gerador já aqui: mesmo que a resposta nunca seja lida, a conexão
+        # e a vaga são liberadas quando o gerador for fechado ou coletado
+        next(chunks)
+        return chunks
+    
+    def _iter_chunks(self, conn: sqlite3.Connection, build: Callable, from_row, chunk_size: int):
+        try:
+            yield
+            # Instantâneo único: a exportação não vê escritas feitas durante o envio
+            conn.execute("BEGIN")
+            sql, params = build(conn)
+            cursor = conn.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield [from_row(row) for row in rows]
+        finally:
+            conn.close()
+            self._export_slots.release()
+    
+    SEARCH_ORDERS = ("relevance", "recent")
+    
+    def search_audit_logs(self, query: str, limit: int = DEFAULT_PAGE_SIZE, cursor: str = None,
+                          order: str = "relevance") -> Dict:
+        """Busca textual em usuário, ação e detalhes dos logs de auditoria, com destaques"""
+        self.audit_writer.flush()
+        terms = query_terms(query)
+        if not self.full_text_search:
+            conditions, params = self._like_conditions(terms, AUDIT_SEARCH_COLUMNS)
+            return self._without_ranking(self._fetch_page(
+                f"SELECT {self.AUDIT_COLUMNS} FROM {{table}}", "timestamp",
+                conditions, params, limit, cursor, self._audit_from_row,
+                route=lambda conn, through: tables_for_range(conn, through=through)
+            ))
+        
+        def load(conn, ids):
+            placeholders = ", ".join("?" * len(ids))
+            rows = conn.execute(
+                f"SELECT {self.AUDIT_COLUMNS} FROM {AUDIT_VIEW} WHERE id IN ({placeholders})", ids
+            ).fetchall()
+            return {row[0]: self._audit_from_row(row) for row in rows}
+        
+        return self._search(AUDIT_SEARCH, AUDIT_SEARCH_COLUMNS, terms, order, limit, cursor, load)
+    
+    def search_alerts(self, query: str, limit: int = DEFAULT_PAGE_SIZE, cursor: str = None,
+                      order: str = "relevance") -> Dict:
+        """Busca textual em tipo e mensagem dos alertas, com destaques"""
+        terms = query_terms(query)
+        if not self.full_text_search:
+            conditions, params = self._like_conditions(terms, ALERT_SEARCH_COLUMNS)
+            return self._without_ranking(self._fetch_page(
+                f"SELECT {self.ALERT_COLUMNS} FROM alerts", "timestamp",
+                conditions, params, limit, cursor, self._alert_from_row
+            ))
+        
+        def load(conn, ids):
+            placeholders = ", ".join("?" * len(ids))
+            rows = conn.execute(
+                f"SELECT {self.ALERT_COLUMNS} FROM alerts WHERE id IN ({placeholders})", ids
+            ).fetchall()
+            return {row[0]: self._alert_from_row(row) for row in rows}
+        
+        return self._search(ALERT_SEARCH, ALERT_SEARCH_COLUMNS, terms, order, limit, cursor, load)
+    
+    def _search(self, index: str, columns: List[str], terms: List[str], order: str, limit: int,
+                cursor: Optional[str], load) -> Dict:
+        """
+        Página de resultados do índice FTS5: por relevância (bm25, cursor em (rank, id))
+        ou dos mais recentes (cursor em id). load(conn, ids) busca as linhas completas.
+        
+        A relevância é calculada só nas SEARCH_RANK_WINDOW ocorrências mais recentes; o
+        limite inferior dessa janela vai no cursor para as páginas seguintes não mudarem.
+        """
+        if order not in self.SEARCH_ORDERS:
+            raise ValueError(f"Ordenação inválida: {order}")
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        match = match_expression(terms)
+        after, floor = None, None
+        if cursor:
+            sort_value, last_id = decode_cursor(cursor, parts=2 if order == "relevance" else 1)
+            if order == "relevance":
+                rank, floor = sort_value
+                after = (rank, last_id)
+            else:
+                after = (sort_value, last_id)
+        with self.reader() as conn:
+            # Índice e linhas lidos no mesmo instantâneo
+            conn.execute("BEGIN")
+            if order == "relevance" and cursor is None and SEARCH_RANK_WINDOW > 0:
+                row = conn.execute(rank_floor_query(index), (match, SEARCH_RANK_WINDOW - 1)).fetchone()
+                floor = row[0] if row else None
+            sql, params = search_query(index, columns, match, order, after, limit + 1, floor)
+            hits = conn.execute(sql, params).fetchall()
+            rows = load(conn, [hit[0] for hit in hits[:limit]]) if hits else {}
+        
+        items = []
+        for hit in hits[:limit]:
+            item = rows.get(hit[0])
+            if item is None:
+                continue
+            item["rank"] = hit[1]
+            item["highlight"] = dict(zip(columns, hit[2:]))
+            items.append(item)
+        next_cursor = None
+        if len(hits) > limit:
+            last = hits[limit - 1]
+            sort_value = [last[1], floor] if order == "relevance" else last[0]
+            next_cursor = encode_cursor(sort_value, last[0])
+        return {"items": items, "next_cursor": next_cursor}
+    
+    @staticmethod
+    def _like_conditions(terms: List[str], columns: List[str]) -> tuple:
+        """Condições LIKE (todos os termos, cada um em qualquer coluna) para a busca sem FTS5"""
+        conditions, params = [], []
+        for term in terms:
+            conditions.append("(" + " OR ".join(f"{column} LIKE ? ESCAPE '\\'" for column in columns) + ")")
+            params.extend([like_pattern(term)] * len(columns))
+        return conditions, params
+    
+    @staticmethod
+    def _without_ranking(page: Dict) -> Dict:
+        for item in page["items"]:
+            item["rank"] = None
+            item["highlight"] = None
+        return page
+    
+    @staticmethod
+    def _filters(*candidates) -> tuple:
+        """Monta as condições WHERE ignorando filtros não informados (None)"""
+        conditions, params = [], []
+        for condition, value in candidates:
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+        return conditions, params
+    
+    def _fetch_page(self, select_sql: str, sort_column: str, conditions: List[str],
+                    params: List, limit: int, cursor: Optional[str], from_row, route=None) -> Dict:
+        """Paginação por keyset em (coluna de ordenação, id), sempre decrescente.
+        
+        O cursor guarda a posição da última linha entregue, então cada página custa
+        uma busca no índice em vez de um OFFSET que cresce com a tabela.
+        Com route(conn, valor do cursor), select_sql usa {table} e a consulta é a
+        união das tabelas devolvidas, cada uma com as mesmas condições.
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        conditions, params = list(conditions), list(params)
+        sort_value = None
+        if cursor:
+            sort_value, last_id = decode_cursor(cursor)
+            conditions.append(f"({sort_column}, id) < (?, ?)")
+            params.extend([sort_value, last_id])
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self.reader() as conn:
+            if route is not None:
+                # A lista de tabelas e a leitura veem o mesmo instantâneo do catálogo
+                conn.execute("BEGIN")
+                tables = route(conn, sort_value)
+                sql = " UNION ALL ".join(f"{select_sql.format(table=table)} {where}" for table in tables)
+                params = params * len(tables)
+            else:
+                sql = f"{select_sql} {where}"
+            rows = conn.execute(
+                f"{sql} ORDER BY {sort_column} DESC, id DESC LIMIT ?",
+                (*params, limit + 1)
+            ).fetchall()
+        items = [from_row(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = items[-1]
+            next_cursor = encode_cursor(last[sort_column], last["id"])
+        return {"items": items, "next_cursor": next_cursor}
+    
+    @staticmethod
+    def _rollup_segments(since: datetime) -> List[tuple]:
+        """
+        Divide [since, agora) entre as fontes do relatório: linhas brutas até a primeira hora
+        cheia, agregados horários até o primeiro dia cheio, diários até hoje e horários de hoje
+        """
+        since = since.replace(microsecond=0)
+        hour_start = since.replace(minute=0, second=0)
+        if hour_start < since:
+            hour_start += timedelta(hours=1)
+        day_start = hour_start.replace(hour=0)
+        if day_start < hour_start:
+            day_start += timedelta(days=1)
+        day_end = datetime.now(timezone.utc).replace(tzinfo=None, hour=0, minute=0, second=0, microsecond=0)
+        
+        fmt = "%Y-%m-%d %H:%M:%S"
+        segments = []
+        if since < hour_start:
+            segments.append(("raw", since.strftime(fmt), hour_start.strftime(fmt)))
+        if day_start < day_end:
+            if hour_start < day_start:
+                segments.append(("hourly", hour_start.strftime(fmt), day_start.strftime(fmt)))
+            segments.append(("daily", day_start.strftime("%Y-%m-%d"), day_end.strftime("%Y-%m-%d")))
+            segments.append(("hourly", day_end.strftime(fmt), None))
+        else:
+            segments.append(("hourly", hour_start.strftime(fmt), None))
+        return segments
+    
+    def _rollup_query(self, since: datetime, dimensions: str, raw_table: str, raw_dimensions: str,
+                      rollup_table: str) -> tuple:
+        parts, params = [], []
+        for source, lower, upper in self._rollup_segments(since):
+            if source == "raw":
+                parts.append(f"""
+                    SELECT {raw_dimensions}, COUNT(*) AS count FROM {raw_table}
+                    WHERE timestamp >= ? AND timestamp < ? GROUP BY {dimensions}
+                """)
+                params += [lower, upper]
+            else:
+                upper_sql = " AND bucket < ?" if upper else ""
+                parts.append(f"SELECT {dimensions}, count FROM {rollup_table}_{source} WHERE bucket >= ?{upper_sql}")
+                params += [lower, upper] if upper else [lower]
+        return " UNION ALL ".join(parts), params
+    
+    def get_audit_activity(self, since: datetime) -> List[tuple]:
+        """
+        Contagem de eventos de auditoria por (usuário, categoria da ação, tipo de recurso) desde
+        since (UTC), somando os agregados horários/diários e só as linhas brutas da primeira hora incompleta
+        """
+        union, params = self._rollup_query(
+            since, "username, action, resource_type", AUDIT_VIEW,
+            "username, action, COALESCE(resource_type, '') AS resource_type", "audit_rollup"
+        )
+        with self.reader() as conn:
+            return conn.execute(f"""
+                SELECT r.username, COALESCE(a.category, ?), NULLIF(r.resource_type, ''), SUM(r.count)
+                FROM ({union}) r
+                LEFT JOIN audit_actions a ON a.name = r.action
+                GROUP BY r.username, a.category, r.resource_type
+            """, [OTHER, *params]).fetchall()
+    
+    def get_alert_counts_by_level(self, since: datetime) -> List[tuple]:
+        """Alertas criados desde since (UTC) por nível, a partir dos agregados"""
+        union, params = self._rollup_query(since, "level", "alerts", "level", "alert_rollup")
+        with self.reader() as conn:
+            return conn.execute(f"""
+                SELECT level, SUM(count) FROM ({union})
+                GROUP BY level HAVING SUM(count) != 0
+            """, params).fetchall()
     
     def add_session(self, username: str, token_hash: str, expires_at: datetime) -> int:
         """Adiciona uma sessão ativa"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.writer() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 INSERT INTO active_sessions (username, token_hash, expires_at)
                 VALUES (?, ?, ?)
-            """, (username, token_hash, expires_at.isoformat()))
+            """, (username, token_hash, self._session_timestamp(expires_at)))
             conn.commit()
             return cursor.lastrowid
     
     def invalidate_session(self, token_hash: str) -> bool:
         """Invalida uma sessão"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.writer() as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM active_sessions WHERE token_hash = ?", (token_hash,))
             conn.commit()
@@ -355,7 +1247,7 @@ class DatabaseManager:
     
     def is_session_valid(self, token_hash: str) -> bool:
         """Verifica se uma sessão é válida"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.reader() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT COUNT(*) FROM active_sessions 
@@ -363,44 +1255,175 @@ class DatabaseManager:
             """, (token_hash,))
             return cursor.fetchone()[0] > 0
     
+    def get_session_expiry(self, token_hash: str) -> Optional[datetime]:
+        """Retorna a expiração de uma sessão válida (ou None se inválida)"""
+        with self.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT expires_at FROM active_sessions 
+                WHERE token_hash = ? AND expires_at > CURRENT_TIMESTAMP
+                LIMIT 1
+            """, (token_hash,))
+            row = cursor.fetchone()
+            return datetime.fromisoformat(row[0]).replace(tzinfo=timezone.utc) if row else None
+    
+    @staticmethod
+    def _session_timestamp(moment: datetime) -> str:
+        """Expiração em UTC no formato de CURRENT_TIMESTAMP, para as comparações em SQL serem corretas"""
+        if moment.tzinfo is not None:
+            moment = moment.astimezone(timezone.utc)
+        return moment.strftime("%Y-%m-%d %H:%M:%S")
+    
+    def count_active_sessions(self) -> int:
+        """Número de sessões ainda não expiradas"""
+        with self.reader() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM active_sessions WHERE expires_at > CURRENT_TIMESTAMP"
+            ).fetchone()[0]
+    
     def cleanup_expired_sessions(self):
         """Remove sessões expiradas"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.writer() as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM active_sessions WHERE expires_at <= CURRENT_TIMESTAMP")
             conn.commit()
     
     def get_dashboard_stats(self) -> Dict:
-        """Retorna estatísticas para o dashboard"""
-        with sqlite3.connect(self.db_path) as conn:
+        """Retorna estatísticas para o dashboard (contadores mantidos por triggers)"""
+        with self.reader() as conn:
             cursor = conn.cursor()
+            cursor.execute("SELECT scope, key, value FROM dashboard_counters WHERE value != 0")
+            counters = {}
+            for scope, key, value in cursor.fetchall():
+                counters.setdefault(scope, {})[key] = value
             
-            # Contadores de recursos por status
-            cursor.execute("""
-                SELECT status, COUNT(*) FROM resources GROUP BY status
-            """)
-            resource_stats = dict(cursor.fetchall())
-            
-            # Contadores de usuários por role
-            cursor.execute("""
-                SELECT role, COUNT(*) FROM users WHERE is_active = 1 GROUP BY role
-            """)
-            user_stats = dict(cursor.fetchall())
-            
-            # Total de alertas não resolvidos
-            cursor.execute("SELECT COUNT(*) FROM alerts WHERE is_resolved = 0")
-            unresolved_alerts = cursor.fetchone()[0]
-            
-            # Total de recursos
-            cursor.execute("SELECT COUNT(*) FROM resources")
-            total_resources = cursor.fetchone()[0]
-            
+            resource_stats = counters.get("resources_by_status", {})
             return {
                 "resources_by_status": resource_stats,
-                "users_by_role": user_stats,
-                "unresolved_alerts": unresolved_alerts,
-                "total_resources": total_resources
+                "users_by_role": counters.get("users_by_role", {}),
+                "unresolved_alerts": counters.get("alerts", {}).get("unresolved", 0),
+                "total_resources": sum(resource_stats.values())
             }
+    
+    def get_data_generation(self) -> str:
+        """Versão dos dados exibidos no dashboard (época + contador mantido por triggers)"""
+        with self.reader() as conn:
+            row = conn.execute(
+                "SELECT epoch, value FROM data_generation WHERE name = 'dashboard'"
+            ).fetchone()
+        return f"{row[0]}-{row[1]}" if row else "0"
+    
+    def reconcile_dashboard_counters(self) -> bool:
+        """Recalcula os contadores do dashboard; retorna True se havia divergência"""
+        with self.writer() as conn:
+            # BEGIN explícito: leitura e reconstrução na mesma transação de escrita
+            conn.execute("BEGIN IMMEDIATE")
+            before = conn.execute(
+                "SELECT scope, key, value FROM dashboard_counters WHERE value != 0 ORDER BY scope, key"
+            ).fetchall()
+            rebuild_dashboard_counters(conn)
+            after = conn.execute(
+                "SELECT scope, key, value FROM dashboard_counters WHERE value != 0 ORDER BY scope, key"
+            ).fetchall()
+            conn.commit()
+        if before != after:
+            logging.getLogger("wayne.db").warning(
+                f"Contadores do dashboard divergentes corrigidos: {before} -> {after}"
+            )
+        return before != after
+    
+    def maintain_audit_partitions(self, retention_months: int = AUDIT_RETENTION_MONTHS) -> Dict[str, int]:
+        """Move os meses encerrados de audit_log para as partições e arquiva as que passaram da retenção"""
+        self.audit_writer.flush()
+        month = current_month()
+        with self.writer() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            moved = rotate_audit_log(conn, month)
+            conn.commit()
+        
+        archived = 0
+        if retention_months > 0:
+            with self.reader() as conn:
+                names = [row[0] for row in conn.execute("""
+                    SELECT name FROM audit_partitions WHERE status = 'online' AND month < ? ORDER BY month
+                """, (shift_month(month, -retention_months),))]
+            for name in names:
+                if self.archive_audit_partition(name):
+                    archived += 1
+        return {"moved_rows": moved, "archived_partitions": archived}
+    
+    def archive_audit_partition(self, name: str) -> Optional[str]:
+        """Exporta a partição para NDJSON comprimido, remove a tabela e retorna o caminho do arquivo"""
+        compression = AUDIT_ARCHIVE_COMPRESSION or default_compression()
+        archive_dir = Path(AUDIT_ARCHIVE_DIR)
+        archive_dir.mkdir(exist_ok=True)
+        archive_path = archive_dir / f"{name}.ndjson{EXTENSIONS[compression]}"
+        columns = [column.strip() for column in AUDIT_LOG_COLUMNS.split(",")]
+        
+        try:
+            with self.reader() as conn:
+                conn.execute("BEGIN")
+                online = conn.execute(
+                    "SELECT 1 FROM audit_partitions WHERE name = ? AND status = 'online'", (name,)
+                ).fetchone()
+                if not online:
+                    return None
+                # Em disco antes do DROP: um crash logo depois não pode levar a única cópia da partição
+                writer = CompressedWriter(archive_path, compression, durable=True)
+                exported = 0
+                with writer as out:
+                    for row in conn.execute(f"SELECT {AUDIT_LOG_COLUMNS} FROM {name} ORDER BY timestamp, id"):
+                        out.write((json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n").encode("utf-8"))
+                        exported += 1
+            
+            with self.writer() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                # Eventos atrasados movidos para a partição depois da exportação: tenta no próximo ciclo
+                if conn.execute(f"SELECT COUNT(*) FROM {name}").fetchone()[0] != exported:
+                    conn.rollback()
+                    archive_path.unlink(missing_ok=True)
+                    return None
+                forget_audit_rows(conn, name)
+                conn.execute(f"DROP TABLE {name}")
+                conn.execute("""
+                    UPDATE audit_partitions
+                    SET status = 'archived', row_count = ?, archive_path = ?, archive_checksum = ?,
+                        archived_at = CURRENT_TIMESTAMP
+                    WHERE name = ?
+                """, (exported, str(archive_path), writer.checksum, name))
+                refresh_audit_view(conn)
+                conn.commit()
+        except Exception:
+            archive_path.unlink(missing_ok=True)
+            raise
+        return str(archive_path)
+    
+    def get_audit_partitions(self) -> List[Dict]:
+        """Catálogo das partições do log de auditoria, mais recentes primeiro"""
+        with self.reader() as conn:
+            rows = conn.execute("""
+                SELECT name, month, range_start, range_end, row_count, status, archive_path,
+                       archive_checksum, created_at, archived_at
+                FROM audit_partitions ORDER BY month DESC
+            """).fetchall()
+        return [
+            {
+                "name": row[0],
+                "month": row[1],
+                "range_start": row[2],
+                "range_end": row[3],
+                "row_count": row[4],
+                "status": row[5],
+                "archive_path": row[6],
+                "archive_checksum": row[7],
+                "created_at": row[8],
+                "archived_at": row[9]
+            }
+            for row in rows
+        ]
+
+# Duração e número de comandos SQL por método (as conexões emprestadas não são medidas à parte)
+instrument_methods(DatabaseManager, exclude=("writer", "reader", "_ensure_initialized", "close_connections"))
 
 # Instância global do gerenciador de banco
 db_manager = DatabaseManager()
@@ -1,8 +1,58 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import Response
 from fastapi.middleware.cors import CORSMiddleware
-from routers import dashboard, resources, auth_router, users, admin
+from routers import dashboard, resources, auth_router, users, admin, health
+from database_manager import db_manager
+from alert_events import alert_broker
+from rate_limiter import rate_limiter, RateLimitMiddleware, RateLimitRule
+from security_manager import log_rate_limit_exceeded, backup_manager
+from auth import init_default_users
+from background_tasks import background_tasks
+from session_cache import session_cache
+from metrics import metrics, MetricsMiddleware, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from sql_profiler import SqlProfilerMiddleware
+from config import (
+    RATE_LIMIT_REQUESTS, RATE_LIMIT_WINDOW, SEED_DEFAULT_USERS,
+    COUNTER_RECONCILE_INTERVAL, AUDIT_MAINTENANCE_INTERVAL, BACKUP_INTERVAL, SQL_PROFILE
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Nada é feito na importação dos módulos: migrações, usuários de teste e tarefas
+    # periódicas começam aqui, uma vez por worker
+    db_manager.init_database()
+    if SEED_DEFAULT_USERS:
+        init_default_users()
+    # Backups apagados ou copiados para a pasta fora da aplicação
+    try:
+        db_manager.reconcile_backup_catalog()
+    except Exception as e:
+        print(f"Erro ao reconciliar catálogo de backups: {e}")
+    background_tasks.register("counter-reconcile", db_manager.reconcile_dashboard_counters, COUNTER_RECONCILE_INTERVAL)
+    # Primeira manutenção após um intervalo: o arquivamento nunca roda no boot
+    background_tasks.register("audit-maintenance", db_manager.maintain_audit_partitions, AUDIT_MAINTENANCE_INTERVAL)
+    background_tasks.register("daily-backup", backup_manager.create_automatic_backup, BACKUP_INTERVAL)
+    background_tasks.start_all()
+    yield
+    background_tasks.stop_all()
+    # Encerra os streams de alertas abertos
+    alert_broker.close()
+    # Grava os eventos de auditoria ainda na fila antes de encerrar
+    db_manager.audit_writer.shutdown()
+
+app = FastAPI(title="Wayne Secure System", version="2.0.0", lifespan=lifespan)
 
-app = FastAPI(title="Wayne Secure System", version="2.0.0")
+# Adicionado antes do CORS para que as respostas 429 também recebam os cabeçalhos CORS
+app.add_middleware(
+    RateLimitMiddleware,
+    limiter=rate_limiter,
+    rules=[
+        RateLimitRule("login", "POST", "/auth/login", RATE_LIMIT_REQUESTS, RATE_LIMIT_WINDOW),
+        RateLimitRule("register", "POST", "/auth/register", RATE_LIMIT_REQUESTS, RATE_LIMIT_WINDOW),
+    ],
+    on_limit=lambda client_ip, rule: log_rate_limit_exceeded(client_ip, rule.max_requests, rule.window_seconds),
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -12,11 +62,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Profiler de SQL por requisição (opcional; ver SQL_PROFILE)
+if SQL_PROFILE != "off":
+    app.add_middleware(SqlProfilerMiddleware)
+
+# Último middleware adicionado é o mais externo: mede também as respostas 429 e as de CORS
+app.add_middleware(MetricsMiddleware)
+
 app.include_router(users.router)
 app.include_router(dashboard.router)
 app.include_router(resources.router)  # Removido prefix, pois o router já define as rotas
 app.include_router(auth_router.router, prefix="/auth")
 app.include_router(admin.router, prefix="/admin")
+app.include_router(health.router)
 
 @app.get("/")
 def root():
@@ -32,13 +90,18 @@ def root():
         ]
     }
 
-@app.get("/health")
-def health_check():
-    return {
-        "status": "online",
-        "timestamp": "2025-01-09T00:00:00Z",
-        "version": "2.0.0"
-    }
+# Gauges lidos a cada coleta de /metrics
+metrics.gauge("wayne_active_sessions", "Sessões não expiradas no banco", db_manager.count_active_sessions)
+metrics.gauge("wayne_session_cache_entries", "Sessões no cache em memória do processo", lambda: len(session_cache))
+metrics.gauge(
+    "wayne_unresolved_alerts", "Alertas não resolvidos", lambda: db_manager.get_dashboard_stats()["unresolved_alerts"]
+)
+metrics.gauge("wayne_audit_queue_depth", "Eventos de auditoria aguardando gravação", lambda: db_manager.audit_writer.depth)
+metrics.gauge("wayne_rate_limiter_keys", "Chaves (regra:IP) no backend de rate limiting", lambda: len(rate_limiter.backend))
+
+@app.get("/metrics", include_in_schema=False)
+def metrics_endpoint():
+    return Response(metrics.render(), media_type=METRICS_CONTENT_TYPE)
 
 @app.get("/cors-test")
 def cors_test():
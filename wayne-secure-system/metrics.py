@@ -0,0 +1,267 @@
+"""
+Métricas da aplicação no formato de texto do Prometheus
+
+Contadores e histogramas ficam em memória do processo (cada worker expõe os seus);
+gauges são lidos por callback no momento da coleta. O MetricsMiddleware registra
+as requisições por rota e instrument_methods mede os métodos do DatabaseManager.
+"""
+
+import functools
+import inspect
+import logging
+import math
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger("wayne.metrics")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+# Rótulo das requisições que não casaram com nenhuma rota (evita um rótulo por caminho)
+UNMATCHED_ROUTE = "unmatched"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = label_names
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_labels(self.label_names, key)} {_number(value)}" for key, value in values]
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = HTTP_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label_names = label_names
+        self.buckets = tuple(sorted(buckets))
+        # rótulos -> [contagem por faixa (não acumulada, última = +Inf), soma]
+        self._series: Dict[Tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = sorted((key, list(counts), total) for key, (counts, total) in self._series.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """Valor lido por callback na coleta; o callback pode devolver um número ou {rótulos: número}"""
+
+    def __init__(self, name: str, help_text: str, func: Callable[[], object],
+                 label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.func = func
+        self.label_names = label_names
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        try:
+            value = self.func()
+        except Exception as e:
+            # Uma fonte indisponível não derruba a coleta das demais métricas
+            logger.warning(f"Erro ao coletar {self.name}: {e}")
+            return lines
+        if isinstance(value, dict):
+            for key, item in sorted(value.items()):
+                key = key if isinstance(key, tuple) else (key,)
+                lines.append(f"{self.name}{_labels(self.label_names, key)} {_number(item)}")
+        else:
+            lines.append(f"{self.name} {_number(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Métrica já registrada: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, label_names: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, help_text, label_names))
+
+    def histogram(self, name: str, help_text: str, label_names: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = HTTP_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, label_names, buckets))
+
+    def gauge(self, name: str, help_text: str, func: Callable[[], object],
+              label_names: Tuple[str, ...] = ()) -> Gauge:
+        """Registra (ou substitui) um gauge lido por callback"""
+        gauge = Gauge(name, help_text, func, label_names)
+        with self._lock:
+            self._metrics[name] = gauge
+        return gauge
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+# Registro global das métricas
+metrics = MetricsRegistry()
+
+http_requests = metrics.counter(
+    "wayne_http_requests_total", "Requisições HTTP por método, rota e status", ("method", "route", "status")
+)
+http_duration = metrics.histogram(
+    "wayne_http_request_duration_seconds", "Latência das requisições HTTP por método e rota", ("method", "route")
+)
+db_duration = metrics.histogram(
+    "wayne_db_method_duration_seconds", "Duração das chamadas ao DatabaseManager por método", ("method",),
+    DB_BUCKETS
+)
+db_statements = metrics.counter(
+    "wayne_db_statements_total",
+    "Comandos SQL executados por método do DatabaseManager (inclui os disparados por triggers)", ("method",)
+)
+
+# Método do DatabaseManager mais externo em execução no contexto atual
+_db_method: ContextVar[Optional[str]] = ContextVar("db_method", default=None)
+
+
+def record_statement(sql: str):
+    """Callback de trace das conexões SQLite: conta o comando no método em execução"""
+    db_statements.inc(_db_method.get() or "other")
+
+
+def _timed_iteration(name: str, generator, started: float):
+    # Exportações: o tempo vai até o fim do consumo, e cada lote pode ser lido em outra thread
+    try:
+        while True:
+            token = _db_method.set(name)
+            try:
+                item = next(generator)
+            except StopIteration:
+                return
+            finally:
+                _db_method.reset(token)
+            yield item
+    finally:
+        generator.close()
+        db_duration.observe(time.perf_counter() - started, name)
+
+
+def _timed(name: str, func: Callable) -> Callable:
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        # Chamadas internas (um método que chama outro) contam só no método mais externo
+        if _db_method.get() is not None:
+            return func(*args, **kwargs)
+        token = _db_method.set(name)
+        started = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except BaseException:
+            db_duration.observe(time.perf_counter() - started, name)
+            raise
+        finally:
+            _db_method.reset(token)
+        if inspect.isgenerator(result):
+            return _timed_iteration(name, result, started)
+        db_duration.observe(time.perf_counter() - started, name)
+        return result
+    return wrapper
+
+
+def instrument_methods(cls, exclude: Iterable[str] = ()):
+    """Substitui os métodos de instância de cls por versões medidas (duração e comandos SQL)"""
+    excluded = set(exclude)
+    for name, member in list(vars(cls).items()):
+        if name.startswith("__") or name in excluded or not inspect.isfunction(member):
+            continue
+        setattr(cls, name, _timed(name, member))
+    return cls
+
+
+class MetricsMiddleware:
+    """Middleware ASGI que mede a latência e conta as respostas por rota (o template, não o caminho)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # O roteador grava a rota encontrada no próprio scope
+            route = scope.get("route")
+            path = getattr(route, "path", UNMATCHED_ROUTE)
+            method = scope["method"]
+            http_duration.observe(time.perf_counter() - started, method, path)
+            http_requests.inc(method, path, str(status_code))
@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+"""
+Migrações versionadas do esquema do banco de dados
+
+Cada migração é uma tupla (versão, descrição, passos). Um passo é um comando
+SQL ou uma função que recebe a conexão. As versões aplicadas ficam registradas
+na tabela schema_migrations, e cada migração roda em sua própria transação.
+"""
+
+import sqlite3
+from typing import Callable, List, Optional, Tuple, Union
+from audit_actions import KNOWN_ACTIONS, classify_action
+from audit_partitions import partition_current_log
+from search_index import create_search_index
+
+Step = Union[str, Callable[[sqlite3.Connection], None]]
+
+
+def _counter_trigger(name: str, event: str, condition: Optional[str], deltas: List[Tuple]) -> str:
+    """Gera um trigger que aplica deltas em dashboard_counters (scope, expressão da chave, delta)"""
+    when = f"WHEN {condition}" if condition else ""
+    body = "\n".join(
+        f"""INSERT INTO dashboard_counters (scope, key, value) VALUES ('{scope}', {key}, {delta})
+            ON CONFLICT (scope, key) DO UPDATE SET value = value + excluded.value;"""
+        for scope, key, delta in deltas
+    )
+    return f"CREATE TRIGGER IF NOT EXISTS {name} {event} {when} BEGIN {body} END"
+
+
+def rebuild_dashboard_counters(conn: sqlite3.Connection):
+    """Recalcula dashboard_counters a partir das tabelas de origem"""
+    conn.execute("DELETE FROM dashboard_counters")
+    conn.execute("""
+        INSERT INTO dashboard_counters (scope, key, value)
+        SELECT 'resources_by_status', status, COUNT(*) FROM resources GROUP BY status
+    """)
+    conn.execute("""
+        INSERT INTO dashboard_counters (scope, key, value)
+        SELECT 'users_by_role', role, COUNT(*) FROM users WHERE is_active = 1 GROUP BY role
+    """)
+    conn.execute("""
+        INSERT INTO dashboard_counters (scope, key, value)
+        SELECT 'alerts', 'unresolved', COUNT(*) FROM alerts WHERE is_resolved = 0
+    """)
+
+
+# Início do balde de cada granularidade dos agregados do relatório de segurança
+ROLLUP_BUCKETS = {
+    "hourly": "strftime('%Y-%m-%d %H:00:00', {})",
+    "daily": "date({})",
+}
+
+
+def _rollup_upsert(source: str, grain: str, row: str, delta: int) -> str:
+    """Comando de trigger que soma delta no agregado (audit|alert, hourly|daily) da linha NEW/OLD"""
+    bucket = ROLLUP_BUCKETS[grain].format(f"{row}.timestamp")
+    if source == "audit":
+        return f"""INSERT INTO audit_rollup_{grain} (bucket, username, action, resource_type, count)
+            VALUES ({bucket}, {row}.username, {row}.action, COALESCE({row}.resource_type, ''), {delta})
+            ON CONFLICT (bucket, username, action, resource_type) DO UPDATE SET count = count + excluded.count;"""
+    return f"""INSERT INTO alert_rollup_{grain} (bucket, level, count)
+            VALUES ({bucket}, {row}.level, {delta})
+            ON CONFLICT (bucket, level) DO UPDATE SET count = count + excluded.count;"""
+
+
+def rebuild_report_rollups(conn: sqlite3.Connection):
+    """Recalcula os agregados do relatório de segurança a partir de audit_log e alerts"""
+    for grain, bucket in ROLLUP_BUCKETS.items():
+        conn.execute(f"DELETE FROM audit_rollup_{grain}")
+        conn.execute(f"""
+            INSERT INTO audit_rollup_{grain} (bucket, username, action, resource_type, count)
+            SELECT {bucket.format("timestamp")}, username, action, COALESCE(resource_type, ''), COUNT(*)
+            FROM audit_log WHERE timestamp IS NOT NULL GROUP BY 1, 2, 3, 4
+        """)
+        conn.execute(f"DELETE FROM alert_rollup_{grain}")
+        conn.execute(f"""
+            INSERT INTO alert_rollup_{grain} (bucket, level, count)
+            SELECT {bucket.format("timestamp")}, level, COUNT(*) FROM alerts
+            WHERE timestamp IS NOT NULL GROUP BY 1, 2
+        """)
+
+
+def intern_audit_actions(conn: sqlite3.Connection):
+    """Cadastra as ações conhecidas e as já gravadas em audit_log e preenche audit_log.action_id"""
+    names = set(KNOWN_ACTIONS)
+    names.update(row[0] for row in conn.execute("SELECT DISTINCT action FROM audit_log"))
+    conn.executemany(
+        "INSERT OR IGNORE INTO audit_actions (name, category) VALUES (?, ?)",
+        [(name, classify_action(name)) for name in sorted(names)]
+    )
+    conn.execute("""
+        UPDATE audit_log SET action_id = (SELECT id FROM audit_actions WHERE audit_actions.name = audit_log.action)
+    """)
+
+
+MIGRATIONS: List[Tuple[int, str, List[Step]]] = [
+    (1, "Esquema inicial", [
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            role TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_login TIMESTAMP,
+            is_active BOOLEAN DEFAULT 1
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS resources (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            type TEXT,
+            description TEXT,
+            status TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            created_by TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS alerts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            alert_type TEXT NOT NULL,
+            message TEXT NOT NULL,
+            level TEXT NOT NULL,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            is_resolved BOOLEAN DEFAULT 0,
+            resolved_by TEXT,
+            resolved_at TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS active_sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL,
+            token_hash TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            expires_at TIMESTAMP NOT NULL,
+            last_activity TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS audit_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL,
+            action TEXT NOT NULL,
+            resource_type TEXT,
+            resource_id INTEGER,
+            details TEXT,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            ip_address TEXT,
+            user_agent TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS backups (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            backup_type TEXT NOT NULL,
+            file_path TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            size_bytes INTEGER,
+            checksum TEXT
+        )
+        """,
+    ]),
+    (2, "Índices para as consultas frequentes", [
+        # users.username já é UNIQUE (índice automático); este cobre as contagens por perfil
+        "CREATE INDEX IF NOT EXISTS idx_users_active_role ON users (is_active, role)",
+        # is_session_valid: igualdade em token_hash + faixa em expires_at, sem tocar a tabela
+        "CREATE INDEX IF NOT EXISTS idx_sessions_token_expires ON active_sessions (token_hash, expires_at)",
+        "CREATE INDEX IF NOT EXISTS idx_sessions_expires ON active_sessions (expires_at)",
+        # get_alerts(include_resolved=False) filtra e ordena pelo mesmo índice
+        "CREATE INDEX IF NOT EXISTS idx_alerts_resolved_timestamp ON alerts (is_resolved, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_alerts_timestamp_level ON alerts (timestamp, level)",
+        "CREATE INDEX IF NOT EXISTS idx_audit_timestamp ON audit_log (timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_audit_username_timestamp ON audit_log (username, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_audit_action_timestamp ON audit_log (action, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_resources_created_at ON resources (created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_resources_status ON resources (status)",
+        "CREATE INDEX IF NOT EXISTS idx_backups_created_at ON backups (created_at)",
+        "ANALYZE",
+    ]),
+    (3, "Agregação de alertas repetidos", [
+        "ALTER TABLE alerts ADD COLUMN subject TEXT",
+        "ALTER TABLE alerts ADD COLUMN occurrences INTEGER NOT NULL DEFAULT 1",
+        "ALTER TABLE alerts ADD COLUMN last_seen TIMESTAMP",
+        "UPDATE alerts SET subject = message, last_seen = timestamp",
+        # Busca do alerta aberto com a mesma chave dentro da janela de agregação
+        "CREATE INDEX IF NOT EXISTS idx_alerts_dedup ON alerts (alert_type, level, subject, is_resolved, last_seen)",
+    ]),
+    (4, "Índices para paginação filtrada", [
+        # Filtro por status já ordenado por created_at (também cobre o GROUP BY status)
+        "CREATE INDEX IF NOT EXISTS idx_resources_status_created ON resources (status, created_at)",
+        "DROP INDEX IF EXISTS idx_resources_status",
+        "CREATE INDEX IF NOT EXISTS idx_alerts_level_timestamp ON alerts (level, timestamp)",
+    ]),
+    (5, "Contadores materializados do dashboard", [
+        """
+        CREATE TABLE IF NOT EXISTS dashboard_counters (
+            scope TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (scope, key)
+        ) WITHOUT ROWID
+        """,
+        # Recursos por status
+        _counter_trigger("trg_resources_counter_insert", "AFTER INSERT ON resources", None,
+                         [("resources_by_status", "NEW.status", 1)]),
+        _counter_trigger("trg_resources_counter_delete", "AFTER DELETE ON resources", None,
+                         [("resources_by_status", "OLD.status", -1)]),
+        _counter_trigger("trg_resources_counter_update", "AFTER UPDATE OF status ON resources",
+                         "OLD.status IS NOT NEW.status",
+                         [("resources_by_status", "OLD.status", -1), ("resources_by_status", "NEW.status", 1)]),
+        # Usuários ativos por perfil
+        _counter_trigger("trg_users_counter_insert", "AFTER INSERT ON users", "NEW.is_active = 1",
+                         [("users_by_role", "NEW.role", 1)]),
+        _counter_trigger("trg_users_counter_delete", "AFTER DELETE ON users", "OLD.is_active = 1",
+                         [("users_by_role", "OLD.role", -1)]),
+        _counter_trigger("trg_users_counter_update_old", "AFTER UPDATE OF role, is_active ON users",
+                         "OLD.is_active = 1", [("users_by_role", "OLD.role", -1)]),
+        _counter_trigger("trg_users_counter_update_new", "AFTER UPDATE OF role, is_active ON users",
+                         "NEW.is_active = 1", [("users_by_role", "NEW.role", 1)]),
+        # Alertas não resolvidos
+        _counter_trigger("trg_alerts_counter_insert", "AFTER INSERT ON alerts", "NEW.is_resolved = 0",
+                         [("alerts", "'unresolved'", 1)]),
+        _counter_trigger("trg_alerts_counter_delete", "AFTER DELETE ON alerts", "OLD.is_resolved = 0",
+                         [("alerts", "'unresolved'", -1)]),
+        _counter_trigger("trg_alerts_counter_update", "AFTER UPDATE OF is_resolved ON alerts",
+                         "OLD.is_resolved IS NOT NEW.is_resolved",
+                         [("alerts", "'unresolved'", "CASE WHEN NEW.is_resolved = 0 THEN 1 ELSE -1 END")]),
+        rebuild_dashboard_counters,
+    ]),
+    (6, "Geração de dados para cache de respostas", [
+        """
+        CREATE TABLE IF NOT EXISTS data_generation (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL DEFAULT 0,
+            epoch TEXT NOT NULL
+        ) WITHOUT ROWID
+        """,
+        # A época muda quando o arquivo é substituído (restauração de backup),
+        # para que um contador que "volta no tempo" não repita ETags antigos
+        "INSERT OR IGNORE INTO data_generation (name, value, epoch) "
+        "VALUES ('dashboard', 0, lower(hex(randomblob(8))))",
+        # Em users só interessam as colunas exibidas (last_login muda a cada login)
+        *(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_generation_{event.split()[0].lower()}
+            AFTER {event} ON {table}
+            BEGIN
+                UPDATE data_generation SET value = value + 1 WHERE name = 'dashboard';
+            END
+            """
+            for table, events in (
+                ("resources", ("INSERT", "UPDATE", "DELETE")),
+                ("users", ("INSERT", "UPDATE OF username, role, is_active", "DELETE")),
+                ("alerts", ("INSERT", "UPDATE", "DELETE")),
+            )
+            for event in events
+        ),
+    ]),
+    (7, "Backups incrementais", [
+        # kind: 'full' ou 'incremental' (páginas alteradas em relação a base_backup_id)
+        "ALTER TABLE backups ADD COLUMN kind TEXT NOT NULL DEFAULT 'full'",
+        "ALTER TABLE backups ADD COLUMN base_backup_id INTEGER REFERENCES backups (id)",
+        "ALTER TABLE backups ADD COLUMN page_size INTEGER",
+        "ALTER TABLE backups ADD COLUMN page_count INTEGER",
+        "ALTER TABLE backups ADD COLUMN changed_pages INTEGER",
+        "CREATE INDEX IF NOT EXISTS idx_backups_type_created ON backups (backup_type, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_backups_base ON backups (base_backup_id)",
+    ]),
+    (8, "Catálogo de backups sincronizado com o disco", [
+        # Marcado pela reconciliação quando o arquivo some do disco (a linha fica para manter a cadeia)
+        "ALTER TABLE backups ADD COLUMN missing INTEGER NOT NULL DEFAULT 0",
+    ]),
+    (9, "Agregados horários e diários para o relatório de segurança", [
+        # resource_type NULL vira '' para participar da chave primária (NULLs não conflitam)
+        *(
+            f"""
+            CREATE TABLE IF NOT EXISTS audit_rollup_{grain} (
+                bucket TEXT NOT NULL,
+                username TEXT NOT NULL,
+                action TEXT NOT NULL,
+                resource_type TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (bucket, username, action, resource_type)
+            ) WITHOUT ROWID
+            """
+            for grain in ("hourly", "daily")
+        ),
+        *(
+            f"""
+            CREATE TABLE IF NOT EXISTS alert_rollup_{grain} (
+                bucket TEXT NOT NULL,
+                level TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (bucket, level)
+            ) WITHOUT ROWID
+            """
+            for grain in ("hourly", "daily")
+        ),
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_audit_rollup_insert AFTER INSERT ON audit_log
+        WHEN NEW.timestamp IS NOT NULL
+        BEGIN
+            {_rollup_upsert("audit", "hourly", "NEW", 1)}
+            {_rollup_upsert("audit", "daily", "NEW", 1)}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_alert_rollup_insert AFTER INSERT ON alerts
+        WHEN NEW.timestamp IS NOT NULL
+        BEGIN
+            {_rollup_upsert("alert", "hourly", "NEW", 1)}
+            {_rollup_upsert("alert", "daily", "NEW", 1)}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_alert_rollup_delete AFTER DELETE ON alerts
+        WHEN OLD.timestamp IS NOT NULL
+        BEGIN
+            {_rollup_upsert("alert", "hourly", "OLD", -1)}
+            {_rollup_upsert("alert", "daily", "OLD", -1)}
+        END
+        """,
+        rebuild_report_rollups,
+    ]),
+    (10, "Tabela de ações de auditoria", [
+        """
+        CREATE TABLE IF NOT EXISTS audit_actions (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE,
+            category TEXT NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_audit_actions_category ON audit_actions (category)",
+        "ALTER TABLE audit_log ADD COLUMN action_id INTEGER REFERENCES audit_actions (id)",
+        intern_audit_actions,
+        # O filtro por ação passa a ser por action_id; o índice pelo texto deixa de ser usado
+        "CREATE INDEX IF NOT EXISTS idx_audit_action_id_timestamp ON audit_log (action_id, timestamp)",
+        "DROP INDEX IF EXISTS idx_audit_action_timestamp",
+    ]),
+    (11, "Partições mensais do log de auditoria", [
+        """
+        CREATE TABLE IF NOT EXISTS audit_partitions (
+            name TEXT PRIMARY KEY,
+            month TEXT NOT NULL UNIQUE,
+            range_start TEXT NOT NULL,
+            range_end TEXT NOT NULL,
+            row_count INTEGER NOT NULL DEFAULT 0,
+            status TEXT NOT NULL DEFAULT 'online',
+            archive_path TEXT,
+            archive_checksum TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            archived_at TIMESTAMP
+        )
+        """,
+        partition_current_log,
+    ]),
+    (12, "Busca textual (FTS5) em auditoria e alertas", [
+        create_search_index,
+    ]),
+    (13, "Expiração das sessões no formato de CURRENT_TIMESTAMP (UTC)", [
+        # O formato ISO ('T' e fuso) fazia sessões expiradas no mesmo dia parecerem válidas
+        "UPDATE active_sessions SET expires_at = datetime(expires_at) WHERE expires_at LIKE '%T%'",
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def _ensure_migrations_table(conn: sqlite3.Connection):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def get_applied_versions(conn: sqlite3.Connection) -> List[int]:
+    """Retorna as versões já aplicadas, em ordem"""
+    _ensure_migrations_table(conn)
+    rows = conn.execute("SELECT version FROM schema_migrations ORDER BY version").fetchall()
+    return [row[0] for row in rows]
+
+
+def apply_migrations(conn: sqlite3.Connection, target: Optional[int] = None) -> List[int]:
+    """Aplica as migrações pendentes até a versão alvo e retorna as aplicadas"""
+    target = LATEST_VERSION if target is None else target
+    already_applied_versions = set(get_applied_versions(conn))
+    applied = []
+
+    for version, description, steps in MIGRATIONS:
+        if version > target:
+            break
+        if version in already_applied_versions:
+            continue
+
+        # BEGIN IMMEDIATE serializa workers que inicializam o banco ao mesmo tempo;
+        # a versão é conferida de novo porque outro worker pode tê-la aplicado
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            already_applied = conn.execute(
+                "SELECT 1 FROM schema_migrations WHERE version = ?", (version,)
+            ).fetchone()
+            if already_applied:
+                conn.rollback()
+                continue
+
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+
+            conn.execute(
+                "INSERT INTO schema_migrations (version, description) VALUES (?, ?)",
+                (version, description)
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(version)
+
+    return applied
+
+
+if __name__ == "__main__":
+    from config import DATABASE_PATH
+
+    print(f"🔄 Aplicando migrações em {DATABASE_PATH}...")
+    conn = sqlite3.connect(DATABASE_PATH)
+    try:
+        applied = apply_migrations(conn)
+        for version, description, _ in MIGRATIONS:
+            mark = "✅" if version in applied else "•"
+            print(f"   {mark} v{version}: {description}")
+        print(f"✅ Esquema na versão {get_applied_versions(conn)[-1]}")
+    finally:
+        conn.close()
@@ -5,10 +5,10 @@ from database_manager import db_manager
 # Lock para compatibilidade com código existente
 _alerts_lock = Lock()
 
-def add_alert(alert_type: str, message: str, level: str):
+def add_alert(alert_type: str, message: str, level: str, subject: str = None):
     """Adiciona alerta no banco de dados"""
     with _alerts_lock:
-        alert_id = db_manager.add_alert(alert_type, message, level)
+        alert_id = db_manager.add_alert(alert_type, message, level, subject=subject)
         return {
             "id": alert_id,
             "type": alert_type,
@@ -0,0 +1,76 @@
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+import bcrypt
+from fastapi import HTTPException, status
+from config import BCRYPT_ROUNDS, PASSWORD_WORKERS, PASSWORD_QUEUE_SIZE
+
+class PasswordHasher:
+    """Executor limitado para o trabalho de bcrypt (hash e verificação de senhas)"""
+
+    def __init__(self, max_workers: int = PASSWORD_WORKERS, max_queue: int = PASSWORD_QUEUE_SIZE,
+                 rounds: int = BCRYPT_ROUNDS):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.rounds = rounds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        # Vagas = workers ocupados + tarefas aguardando na fila
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        """Tarefas em execução ou aguardando na fila"""
+        return self._pending
+
+    def _submit(self, func, *args) -> Future:
+        """Admite a tarefa (ou 503 se não houver vaga) e a envia ao executor"""
+        if not self._slots.acquire(blocking=False):
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Serviço de autenticação sobrecarregado. Tente novamente em instantes.",
+                headers={"Retry-After": "1"}
+            )
+        with self._pending_lock:
+            self._pending += 1
+        try:
+            future = self._executor.submit(func, *args)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    def _run(self, func, *args):
+        # Bloqueia a thread chamadora: só para scripts e código fora do event loop
+        return self._submit(func, *args).result()
+
+    async def _run_async(self, func, *args):
+        # Aguarda sem ocupar uma thread do threadpool do anyio durante o bcrypt
+        return await asyncio.wrap_future(self._submit(func, *args))
+
+    def _release(self):
+        with self._pending_lock:
+            self._pending -= 1
+        self._slots.release()
+
+    def hash(self, password: str) -> str:
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        return self._run(bcrypt.hashpw, password.encode('utf-8'), salt).decode('utf-8')
+
+    def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return self._run(bcrypt.checkpw, plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+    async def hash_async(self, password: str) -> str:
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        return (await self._run_async(bcrypt.hashpw, password.encode('utf-8'), salt)).decode('utf-8')
+
+    async def verify_async(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run_async(bcrypt.checkpw, plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+# Instância global do executor de senhas
+password_hasher = PasswordHasher()
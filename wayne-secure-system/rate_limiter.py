@@ -0,0 +1,209 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
+from fastapi.concurrency import run_in_threadpool
+from config import RATE_LIMIT_BACKEND, RATE_LIMIT_DB_PATH, RATE_LIMIT_MAX_KEYS
+
+RATE_LIMIT_MESSAGE = "Muitas tentativas. Tente novamente em alguns minutos."
+
+def _refill(tokens: float, updated_at: float, now: float, capacity: int, rate: float) -> float:
+    return min(capacity, tokens + (now - updated_at) * rate)
+
+
+class MemoryBackend:
+    """Baldes de tokens em memória do processo, com descarte LRU das chaves ociosas"""
+
+    blocking = False
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        # chave -> (tokens, atualizado_em)
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, capacity: int, rate: float, now: float) -> Tuple[bool, float]:
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            tokens = _refill(tokens, updated_at, now, capacity, rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            # Uma chave ociosa descartada volta com o balde cheio, o mesmo estado que teria após reabastecer
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, 0.0 if allowed else (1 - tokens) / rate
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class SQLiteBackend:
+    """Baldes de tokens em um arquivo SQLite compartilhado entre os workers"""
+
+    blocking = True
+
+    # Remove chaves ociosas a cada N consultas
+    PURGE_EVERY = 1000
+
+    def __init__(self, db_path: str = RATE_LIMIT_DB_PATH, idle_ttl: float = 3600):
+        self.db_path = db_path
+        self.idle_ttl = idle_ttl
+        self._local = threading.local()
+        self._calls = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Arquivo separado do banco principal: não disputa o lock de escrita da aplicação
+            conn = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Estado efêmero: perder os últimos baldes num crash é aceitável
+            conn.execute("PRAGMA synchronous=OFF")
+            # Criada na primeira conexão de cada thread, não na importação do módulo
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS rate_buckets (
+                    key TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                ) WITHOUT ROWID
+            """)
+            self._local.conn = conn
+        return conn
+
+    def take(self, key: str, capacity: int, rate: float, now: float) -> Tuple[bool, float]:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated_at FROM rate_buckets WHERE key = ?", (key,)).fetchone()
+            tokens = _refill(*row, now, capacity, rate) if row else capacity
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            conn.execute("""
+                INSERT INTO rate_buckets (key, tokens, updated_at) VALUES (?, ?, ?)
+                ON CONFLICT (key) DO UPDATE SET tokens = excluded.tokens, updated_at = excluded.updated_at
+            """, (key, tokens, now))
+            self._calls += 1
+            if self._calls % self.PURGE_EVERY == 0:
+                conn.execute("DELETE FROM rate_buckets WHERE updated_at < ?", (now - self.idle_ttl,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return allowed, 0.0 if allowed else (1 - tokens) / rate
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM rate_buckets").fetchone()[0]
+
+
+class RateLimiter:
+    """Limitador por balde de tokens: max_requests de rajada, reabastecido ao longo de window_seconds"""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def hit(self, key: str, max_requests: int, window_seconds: float) -> Tuple[bool, float]:
+        """Consome um token da chave; retorna (permitido, segundos até o próximo token)"""
+        return self.backend.take(key, max_requests, max_requests / window_seconds, time.time())
+
+    async def hit_async(self, key: str, max_requests: int, window_seconds: float) -> Tuple[bool, float]:
+        if self.backend.blocking:
+            return await run_in_threadpool(self.hit, key, max_requests, window_seconds)
+        return self.hit(key, max_requests, window_seconds)
+
+
+class LimitReportThrottle:
+    """Coalesce os avisos de limite excedido: no máximo um por chave a cada janela da regra"""
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        # chave -> momento do último aviso
+        self._reported: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def should_report(self, key: str, window_seconds: float) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            last = self._reported.get(key)
+            if last is not None and now - last < window_seconds:
+                return False
+            self._reported[key] = now
+            self._reported.move_to_end(key)
+            while len(self._reported) > self.max_keys:
+                self._reported.popitem(last=False)
+        return True
+
+
+class RateLimitRule:
+    """Limite aplicado a um método + prefixo de caminho, por IP do cliente"""
+
+    def __init__(self, name: str, method: str, path: str, max_requests: int, window_seconds: float):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+
+    def matches(self, method: str, path: str) -> bool:
+        return method == self.method and path.rstrip("/") == self.path.rstrip("/")
+
+
+class RateLimitMiddleware:
+    """Middleware ASGI que aplica as regras antes do roteamento (cobre também rotas sem decorator)"""
+
+    def __init__(self, app, limiter: RateLimiter, rules: List[RateLimitRule],
+                 on_limit: Optional[Callable[[str, RateLimitRule], None]] = None):
+        self.app = app
+        self.limiter = limiter
+        self.rules = rules
+        self.on_limit = on_limit
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        rule = next((r for r in self.rules if r.matches(scope["method"], scope["path"])), None)
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        client_ip = scope["client"][0] if scope.get("client") else "unknown"
+        key = f"{rule.name}:{client_ip}"
+        allowed, retry_after = await self.limiter.hit_async(key, rule.max_requests, rule.window_seconds)
+        if allowed:
+            await self.app(scope, receive, send)
+            return
+
+        # O aviso grava auditoria e alerta: fora do event loop e uma vez por janela, não a cada 429
+        if self.on_limit is not None and limit_reports.should_report(key, rule.window_seconds):
+            await run_in_threadpool(self.on_limit, client_ip, rule)
+        body = json.dumps({"detail": RATE_LIMIT_MESSAGE}, ensure_ascii=False).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, round(retry_after))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def create_backend(name: str = RATE_LIMIT_BACKEND):
+    if name == "memory":
+        return MemoryBackend()
+    if name == "sqlite":
+        return SQLiteBackend()
+    raise ValueError(f"Backend de rate limiting inválido: {name}")
+
+# Instância global do limitador
+rate_limiter = RateLimiter(create_backend())
+
+# Instância global do controle de avisos (por processo: com vários workers, um aviso por worker)
+limit_reports = LimitReportThrottle()
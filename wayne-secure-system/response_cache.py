@@ -0,0 +1,75 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+from fastapi import Request, Response
+from config import RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL
+
+CACHE_CONTROL = "private, no-cache"
+
+class ResponseCache:
+    """Cache de respostas GET com ETag derivado da versão dos dados"""
+
+    def __init__(self, max_size: int = RESPONSE_CACHE_SIZE, ttl: float = RESPONSE_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        # chave -> (etag, corpo, media_type, expira_em)
+        self._entries: "OrderedDict[str, Tuple[str, bytes, Optional[str], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def etag(key: str, version: str) -> str:
+        digest = hashlib.sha1(f"{key}|{version}".encode("utf-8")).hexdigest()[:20]
+        return f'"{digest}"'
+
+    def respond(self, request: Request, key: str, version: str, build: Callable[[], Response]) -> Response:
+        """
+        Responde 304 se o cliente já tem a versão atual, reaproveita o corpo
+        guardado se ainda for válido ou chama build() e guarda o resultado
+        """
+        etag = self.etag(key, version)
+        headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == etag and time.monotonic() < entry[3]:
+                self._entries.move_to_end(key)
+                return Response(content=entry[1], media_type=entry[2], headers=headers)
+
+        response = build()
+        if response.status_code != 200:
+            return response
+
+        response.headers.update(headers)
+        with self._lock:
+            self._entries[key] = (etag, response.body, response.media_type, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return response
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == "*" or candidate == etag:
+            return True
+    return False
+
+# Instância global do cache de respostas
+response_cache = ResponseCache()
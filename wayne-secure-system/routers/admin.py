@@ -1,21 +1,23 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from fastapi.concurrency import run_in_threadpool
 from auth import get_current_user, check_permission
-from database_manager import db_manager
+from database_manager import db_manager, ExportLimitError
 from security_manager import backup_manager, report_manager
-from typing import List, Dict
+from utils.export import export_response, validate_format
+from background_tasks import background_tasks
+from typing import List, Dict, Optional
 import os
-from pathlib import Path
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 @router.post("/backup")
-def create_backup(backup_type: str = "manual", current_user = Depends(get_current_user)):
+def create_backup(backup_type: str = "manual", incremental: bool = False, current_user = Depends(get_current_user)):
     check_permission(current_user, ["admin"])
     
     try:
-        backup_path = backup_manager.create_manual_backup() if backup_type == "manual" else backup_manager.create_automatic_backup()
+        backup_path = backup_manager.create_manual_backup(incremental) if backup_type == "manual" else backup_manager.create_automatic_backup()
         db_manager.log_audit(
             username=current_user.username,
             action="CREATE_BACKUP",
@@ -31,11 +33,11 @@ def create_backup(backup_type: str = "manual", current_user = Depends(get_curren
         raise HTTPException(status_code=500, detail=f"Erro ao criar backup: {str(e)}")
 
 @router.get("/backups")
-def list_backups(current_user = Depends(get_current_user)):
+def list_backups(limit: int = 100, backup_type: Optional[str] = None, current_user = Depends(get_current_user)):
     check_permission(current_user, ["admin"])
     
     try:
-        backups = backup_manager.get_backup_list()
+        backups = backup_manager.get_backup_list(limit=limit, backup_type=backup_type)
         return {"backups": backups}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao listar backups: {str(e)}")
@@ -104,12 +106,18 @@ def get_resource_report(current_user = Depends(get_current_user)):
         raise HTTPException(status_code=500, detail=f"Erro ao gerar relatório: {str(e)}")
 
 @router.get("/audit-logs")
-def get_audit_logs(limit: int = 100, current_user = Depends(get_current_user)):
-    """Busca logs de auditoria"""
+def get_audit_logs(limit: int = 100, cursor: Optional[str] = None, username: Optional[str] = None,
+                   action: Optional[str] = None, resource_type: Optional[str] = None,
+                   since: Optional[str] = None, until: Optional[str] = None,
+                   current_user = Depends(get_current_user)):
+    """Busca logs de auditoria (paginados por cursor, mais recentes primeiro)"""
     check_permission(current_user, ["admin"])
     
     try:
-        logs = db_manager.get_audit_logs(limit)
+        page = db_manager.get_audit_logs_page(
+            limit=limit, cursor=cursor, username=username, action=action,
+            resource_type=resource_type, since=since, until=until
+        )
         
         db_manager.log_audit(
             username=current_user.username,
@@ -117,10 +125,163 @@ def get_audit_logs(limit: int = 100, current_user = Depends(get_current_user)):
             details=f"Logs de auditoria acessados (limite: {limit})"
         )
         
-        return {"logs": logs}
+        return {"logs": page["items"], "next_cursor": page["next_cursor"]}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao buscar logs: {str(e)}")
 
+@router.get("/audit-logs/search")
+def search_audit_logs(q: str, limit: int = 50, cursor: Optional[str] = None, order: str = "relevance",
+                      current_user = Depends(get_current_user)):
+    """Busca textual nos logs de auditoria (order=relevance ou recent), com trechos destacados"""
+    check_permission(current_user, ["admin"])
+    
+    try:
+        page = db_manager.search_audit_logs(q, limit=limit, cursor=cursor, order=order)
+        
+        db_manager.log_audit(
+            username=current_user.username,
+            action="SEARCH_AUDIT_LOGS",
+            details=f"Busca nos logs de auditoria: {q}"
+        )
+        
+        return {"logs": page["items"], "next_cursor": page["next_cursor"]}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro na busca: {str(e)}")
+
+@router.get("/alerts/search")
+def search_alerts(q: str, limit: int = 50, cursor: Optional[str] = None, order: str = "relevance",
+                  current_user = Depends(get_current_user)):
+    """Busca textual nos alertas (order=relevance ou recent), com trechos destacados"""
+    check_permission(current_user, ["admin", "gerente"])
+    
+    try:
+        page = db_manager.search_alerts(q, limit=limit, cursor=cursor, order=order)
+        
+        db_manager.log_audit(
+            username=current_user.username,
+            action="SEARCH_ALERTS",
+            details=f"Busca nos alertas: {q}"
+        )
+        
+        return {"alerts": page["items"], "next_cursor": page["next_cursor"]}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro na busca: {str(e)}")
+
+@router.get("/export/audit-logs")
+def export_audit_logs(format: str = "ndjson", gzip: bool = False, username: Optional[str] = None,
+                      action: Optional[str] = None, resource_type: Optional[str] = None,
+                      since: Optional[str] = None, until: Optional[str] = None,
+                      current_user = Depends(get_current_user)):
+    """Exporta os logs de auditoria em fluxo (NDJSON ou CSV, opcionalmente em gzip)"""
+    check_permission(current_user, ["admin"])
+    
+    try:
+        validate_format(format)
+        chunks = db_manager.iter_audit_logs(
+            username=username, action=action, resource_type=resource_type, since=since, until=until
+        )
+        
+        db_manager.log_audit(
+            username=current_user.username,
+            action="EXPORT_AUDIT_LOGS",
+            details=f"Exportação dos logs de auditoria ({format}, desde {since or 'o início'})"
+        )
+        
+        return export_response(chunks, format, gzip, "audit_logs")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ExportLimitError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro na exportação: {str(e)}")
+
+@router.get("/export/alerts")
+def export_alerts(format: str = "ndjson", gzip: bool = False, include_resolved: bool = True,
+                  level: Optional[str] = None, alert_type: Optional[str] = None,
+                  since: Optional[str] = None, until: Optional[str] = None,
+                  current_user = Depends(get_current_user)):
+    """Exporta os alertas em fluxo (NDJSON ou CSV, opcionalmente em gzip)"""
+    check_permission(current_user, ["admin", "gerente"])
+    
+    try:
+        validate_format(format)
+        chunks = db_manager.iter_alerts(
+            include_resolved=include_resolved, level=level, alert_type=alert_type, since=since, until=until
+        )
+        
+        db_manager.log_audit(
+            username=current_user.username,
+            action="EXPORT_ALERTS",
+            details=f"Exportação dos alertas ({format})"
+        )
+        
+        return export_response(chunks, format, gzip, "alerts")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ExportLimitError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro na exportação: {str(e)}")
+
+@router.get("/export/resources")
+def export_resources(format: str = "ndjson", gzip: bool = False, status: Optional[str] = None,
+                     type: Optional[str] = None, current_user = Depends(get_current_user)):
+    """Exporta os recursos em fluxo (NDJSON ou CSV, opcionalmente em gzip)"""
+    check_permission(current_user, ["admin", "gerente"])
+    
+    try:
+        validate_format(format)
+        chunks = db_manager.iter_resources(status=status, type=type)
+        
+        db_manager.log_audit(
+            username=current_user.username,
+            action="EXPORT_RESOURCES",
+            details=f"Exportação dos recursos ({format})"
+        )
+        
+        return export_response(chunks, format, gzip, "resources")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ExportLimitError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro na exportação: {str(e)}")
+
+@router.get("/audit-partitions")
+def list_audit_partitions(current_user = Depends(get_current_user)):
+    """Lista as partições mensais do log de auditoria (online e arquivadas)"""
+    check_permission(current_user, ["admin"])
+    
+    try:
+        return {"partitions": db_manager.get_audit_partitions()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao listar partições: {str(e)}")
+
+@router.post("/audit-partitions/maintenance")
+def maintain_audit_partitions(current_user = Depends(get_current_user)):
+    """Move os meses encerrados para partições e arquiva as que passaram da retenção"""
+    check_permission(current_user, ["admin"])
+    
+    try:
+        result = db_manager.maintain_audit_partitions()
+        
+        db_manager.log_audit(
+            username=current_user.username,
+            action="MAINTAIN_AUDIT_PARTITIONS",
+            details=f"Manutenção das partições de auditoria: {result['moved_rows']} eventos movidos, "
+                    f"{result['archived_partitions']} partições arquivadas"
+        )
+        
+        return result
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro na manutenção das partições: {str(e)}")
+
 @router.get("/system-stats")
 def get_system_stats(current_user = Depends(get_current_user)):
     """Retorna estatísticas do sistema"""
@@ -129,9 +290,8 @@ def get_system_stats(current_user = Depends(get_current_user)):
     try:
         stats = db_manager.get_dashboard_stats()
         
-        db_size = os.path.getsize("wayne_secure.db") if os.path.exists("wayne_secure.db") else 0
-        backup_dir = Path("backups")
-        backup_count = len(list(backup_dir.glob("*.db"))) if backup_dir.exists() else 0
+        db_size = os.path.getsize(db_manager.db_path) if os.path.exists(db_manager.db_path) else 0
+        backup_count = db_manager.count_backups()
         
         stats.update({
             "database_size_mb": round(db_size / 1024 / 1024, 2),
@@ -180,12 +340,12 @@ def list_all_users(current_user = Depends(get_current_user)):
         raise HTTPException(status_code=500, detail=f"Erro ao listar usuários: {str(e)}")
 
 @router.post("/create-user")
-def create_user(username: str, password: str, role: str, current_user = Depends(get_current_user)):
-    """Cria um novo usuário (apenas admins)"""
-    check_permission(current_user, ["admin"])
+async def create_user(username: str, password: str, role: str, current_user = Depends(get_current_user)):
+    """Cria um novo usuário (apenas admins); async para aguardar o bcrypt sem ocupar o threadpool"""
+    await run_in_threadpool(check_permission, current_user, ["admin"])
     
     try:
-        from auth import hash_password
+        from auth import hash_password_async
         from security_manager import data_validator
         
         # Valida dados
@@ -206,12 +366,13 @@ def create_user(username: str, password: str, role: str, current_user = Depends(
             raise HTTPException(status_code=400, detail=f"Role deve ser um dos: {', '.join(valid_roles)}")
         
         # Cria usuário
-        password_hash = hash_password(password)
-        user_id = db_manager.add_user(username, password_hash, role)
+        password_hash = await hash_password_async(password)
+        user_id = await run_in_threadpool(db_manager.add_user, username, password_hash, role)
         
         if user_id:
             # Log da criação
-            db_manager.log_audit(
+            await run_in_threadpool(
+                db_manager.log_audit,
                 username=current_user.username,
                 action="CREATE_USER",
                 details=f"Usuário {username} criado com role {role}"
@@ -221,5 +382,15 @@ def create_user(username: str, password: str, role: str, current_user = Depends(
         else:
             raise HTTPException(status_code=400, detail="Usuário já existe")
             
+    except HTTPException:
+        # Preserva 400 de validação e 503 de sobrecarga do executor de senhas
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao criar usuário: {str(e)}")
+
+@router.get("/background-tasks")
+def list_background_tasks(current_user = Depends(get_current_user)):
+    """Estado das tarefas periódicas (reconciliação, manutenção da auditoria, backups)"""
+    check_permission(current_user, ["admin"])
+    
+    return {"tasks": background_tasks.status()}
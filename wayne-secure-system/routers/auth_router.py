@@ -1,8 +1,9 @@
 
 from fastapi import APIRouter, HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
+from fastapi.concurrency import run_in_threadpool
 from schemas.user import LoginRequest, TokenResponse
-from auth import authenticate_user, create_access_token, hash_password, get_current_user, logout_user
+from auth import authenticate_user_async, create_access_token_async, hash_password_async, get_current_user, logout_user
 from models.user import User, UserRole
 from database_manager import db_manager
 from security_manager import data_validator
@@ -12,16 +13,18 @@ from utils.responses import success_response, error_response
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
+# Login e cadastro são async: o bcrypt roda no executor de senhas e é aguardado sem
+# ocupar uma thread do threadpool; as chamadas ao banco vão para o threadpool
 @router.post("/register")
-def register(user_data: LoginRequest):
-    existing_user = db_manager.get_user(user_data.username)
+async def register(user_data: LoginRequest):
+    existing_user = await run_in_threadpool(db_manager.get_user, user_data.username)
     if existing_user:
         return error_response(message="Usuário já existe", status_code=400)
     password_strength = data_validator.validate_password_strength(user_data.password)
     if not password_strength["is_strong"]:
         return error_response(message="Senha muito fraca. Deve conter maiúscula, minúscula, número e caractere especial.", status_code=400)
-    password_hash = hash_password(user_data.password)
-    user_id = db_manager.add_user(user_data.username, password_hash, "user")
+    password_hash = await hash_password_async(user_data.password)
+    user_id = await run_in_threadpool(db_manager.add_user, user_data.username, password_hash, "user")
     if user_id:
         logging.info(f"Usuário {user_data.username} cadastrado com sucesso.")
         return success_response(message="Usuário cadastrado com sucesso", data={"user_id": user_id})
@@ -29,12 +32,12 @@ def register(user_data: LoginRequest):
         return error_response(message="Erro ao criar usuário", status_code=500)
 
 @router.post("/login", response_model=TokenResponse)
-def login_oauth2(form_data: OAuth2PasswordRequestForm = Depends()):
-    user = authenticate_user(form_data.username, form_data.password)
+async def login_oauth2(form_data: OAuth2PasswordRequestForm = Depends()):
+    user = await authenticate_user_async(form_data.username, form_data.password)
     if not user:
         logging.warning(f"Tentativa de login falhou para usuário: {form_data.username}")
         return error_response(message="Usuário ou senha inválidos", status_code=401)
-    access_token = create_access_token(data={"username": user.username})
+    access_token = await create_access_token_async(data={"username": user.username})
     logging.info(f"Login bem-sucedido para usuário: {user.username}")
     return success_response(data={"access_token": access_token, "token_type": "bearer", "role": user.role.value}, message="Login realizado com sucesso")
 
@@ -1,36 +1,148 @@
 
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+import json
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordBearer
 from auth import get_current_user, check_permission
 from schemas.dashboard import DashboardResponse
 from database_manager import db_manager
 from models.user import User
 import logging
-from mock_alerts import get_alerts as get_alerts_func, edit_alert, delete_alert
-from utils.responses import success_response, error_response
+from mock_alerts import edit_alert, delete_alert
+from utils.responses import success_response, error_response, paginated_response
+from utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from response_cache import response_cache
+from alert_events import alert_broker
+from config import ALERT_STREAM_HEARTBEAT, ALERT_STREAM_CATCHUP_LIMIT
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
+# EventSource não envia cabeçalhos: o stream também aceita o token na query string
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login", auto_error=False)
 
 
 @router.get("", response_model=DashboardResponse)
 @router.get("/", response_model=DashboardResponse)
-def get_dashboard(token: str = Depends(oauth2_scheme)):
+def get_dashboard(request: Request, token: str = Depends(oauth2_scheme)):
     user = get_current_user(token)
     logging.info(f"Usuário {user.username} ({user.role.value}) acessou o dashboard.")
-    stats = db_manager.get_dashboard_stats()
-    return success_response(data={
-        "user": user.username,
-        "role": user.role.value,
-        "dashboard_stats": stats
-    })
+    return response_cache.respond(
+        request, f"dashboard:{user.username}", db_manager.get_data_generation(),
+        lambda: success_response(data={
+            "user": user.username,
+            "role": user.role.value,
+            "dashboard_stats": db_manager.get_dashboard_stats()
+        })
+    )
 
 @router.get("/alerts")
-def get_alerts(token: str = Depends(oauth2_scheme)):
+def get_alerts(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    level: Optional[str] = None,
+    type: Optional[str] = None,
+    include_resolved: bool = False,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    token: str = Depends(oauth2_scheme)
+):
     user = get_current_user(token)
     check_permission(user, ["admin", "gerente", "analista"])
     logging.info(f"Usuário {user.username} ({user.role.value}) acessou os alertas.")
-    return success_response(data=get_alerts_func())
+
+    def build():
+        try:
+            page = db_manager.get_alerts_page(
+                limit=limit, cursor=cursor, include_resolved=include_resolved,
+                level=level, alert_type=type, since=since, until=until
+            )
+        except ValueError as e:
+            return error_response(message=str(e), status_code=400)
+        return paginated_response(page["items"], page["next_cursor"])
+
+    return response_cache.respond(
+        request, f"alerts?{request.url.query}", db_manager.get_data_generation(), build
+    )
+
+def _sse_event(event_type: str, alert: dict, with_id: bool) -> str:
+    # Só alertas novos levam "id:", assim o Last-Event-ID do navegador é sempre o último alerta criado
+    event_id = f"id: {alert['id']}\n" if with_id else ""
+    return f"{event_id}event: alert.{event_type}\ndata: {json.dumps(alert, ensure_ascii=False)}\n\n"
+
+@router.get("/alerts/stream")
+async def stream_alerts(
+    request: Request,
+    last_event_id: Optional[int] = Query(None, ge=0),
+    token: Optional[str] = None,
+    bearer: Optional[str] = Depends(optional_oauth2_scheme)
+):
+    """Stream SSE de alertas: created, updated e resolved, com retomada pelo último id recebido"""
+    token = bearer or token
+    if not token:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token não fornecido",
+                            headers={"WWW-Authenticate": "Bearer"})
+    user = await run_in_threadpool(get_current_user, token)
+    await run_in_threadpool(check_permission, user, ["admin", "gerente", "analista"])
+
+    header_id = request.headers.get("last-event-id")
+    if header_id and header_id.isdigit():
+        last_event_id = int(header_id)
+    if last_event_id is None:
+        last_event_id = await run_in_threadpool(db_manager.get_last_alert_id)
+
+    async def events():
+        last_id = last_event_id
+        # Inscreve antes da recuperação para não perder alertas criados no meio dela
+        subscription = alert_broker.subscribe()
+
+        async def catch_up():
+            # Recupera do banco alertas perdidos na desconexão ou criados por outros workers
+            nonlocal last_id
+            chunks = []
+            while True:
+                alerts = await run_in_threadpool(db_manager.get_alerts_after, last_id, ALERT_STREAM_CATCHUP_LIMIT)
+                for alert in alerts:
+                    chunks.append(_sse_event("created", alert, with_id=True))
+                    last_id = alert["id"]
+                if len(alerts) < ALERT_STREAM_CATCHUP_LIMIT:
+                    return "".join(chunks)
+
+        try:
+            yield "retry: 3000\n\n" + await catch_up()
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), timeout=ALERT_STREAM_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    try:
+                        # Sessão encerrada (logout, usuário desativado) fecha o stream
+                        await run_in_threadpool(get_current_user, token)
+                    except HTTPException:
+                        return
+                    yield await catch_up() + ": heartbeat\n\n"
+                    continue
+                if event is None:
+                    # Cliente lento ou desligamento: reconecta e retoma pelo Last-Event-ID
+                    return
+                alert = event["alert"]
+                if event["type"] == "created":
+                    if alert["id"] <= last_id:
+                        continue
+                    last_id = alert["id"]
+                yield _sse_event(event["type"], alert, with_id=event["type"] == "created")
+        finally:
+            alert_broker.unsubscribe(subscription)
+
+    logging.info(f"Usuário {user.username} ({user.role.value}) abriu o stream de alertas.")
+    return StreamingResponse(events(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
 
 @router.put("/alerts/{alert_id}")
 def dashboard_edit_alert(alert_id: int, alert_update: dict, token: str = Depends(oauth2_scheme)):
@@ -50,6 +162,8 @@ def dashboard_delete_alert(alert_id: int, token: str = Depends(oauth2_scheme)):
     return error_response(message="Alerta não encontrado", status_code=404)
 
 @router.get("/summary", summary="Resumo do dashboard")
-def dashboard_summary(token: str = Depends(oauth2_scheme)):
-    stats = db_manager.get_dashboard_stats()
-    return success_response(data=stats)
\ No newline at end of file
+def dashboard_summary(request: Request, token: str = Depends(oauth2_scheme)):
+    return response_cache.respond(
+        request, "summary", db_manager.get_data_generation(),
+        lambda: success_response(data=db_manager.get_dashboard_stats())
+    )
\ No newline at end of file
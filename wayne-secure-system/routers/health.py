@@ -0,0 +1,109 @@
+import shutil
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+from database_manager import db_manager
+from background_tasks import background_tasks
+from config import (
+    BACKUP_DIR, HEALTH_CACHE_TTL, HEALTH_PROBE_TIMEOUT, HEALTH_MAX_DB_LATENCY_MS, HEALTH_MIN_FREE_MB
+)
+
+router = APIRouter(prefix="/health", tags=["Health"])
+
+STARTED_AT = time.time()
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def check_database() -> Dict:
+    """Ida e volta ao banco (leitura) e espera pelo lock de escrita"""
+    if not db_manager.initialized:
+        return {"ok": False, "error": "Banco ainda não inicializado"}
+    try:
+        latency = db_manager.probe(HEALTH_PROBE_TIMEOUT)
+    except Exception as e:
+        return {"ok": False, "error": str(e)}
+    slow = max(latency.values()) > HEALTH_MAX_DB_LATENCY_MS
+    return {"ok": not slow, **latency, "max_latency_ms": HEALTH_MAX_DB_LATENCY_MS}
+
+
+def check_background_tasks() -> Dict:
+    """Tarefas periódicas ativas (backup diário, manutenção da auditoria, reconciliação)"""
+    tasks = {
+        task["name"]: {"running": task["running"], "last_error": task["last_error"]}
+        for task in background_tasks.status()
+        if task["interval_seconds"] > 0
+    }
+    return {"ok": all(task["running"] for task in tasks.values()), "tasks": tasks}
+
+
+def check_backup_disk() -> Dict:
+    """Espaço livre no disco da pasta de backups (ou da pasta mais próxima que já existe)"""
+    path = Path(BACKUP_DIR).resolve()
+    while not path.exists() and path != path.parent:
+        path = path.parent
+    try:
+        free_mb = shutil.disk_usage(path).free // (1024 * 1024)
+    except OSError as e:
+        return {"ok": False, "error": str(e)}
+    return {"ok": free_mb >= HEALTH_MIN_FREE_MB, "free_mb": free_mb, "min_free_mb": HEALTH_MIN_FREE_MB}
+
+
+class ReadinessCache:
+    """Resultado da última verificação, reaproveitado por ttl segundos; uma verificação por vez"""
+
+    def __init__(self, ttl: float = HEALTH_CACHE_TTL):
+        self.ttl = ttl
+        self._result: Optional[Dict] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> Dict:
+        with self._lock:
+            if self._result is None or time.monotonic() - self._checked_at >= self.ttl:
+                self._result = self._check()
+                self._checked_at = time.monotonic()
+            return self._result
+
+    def _check(self) -> Dict:
+        checks = {
+            "database": check_database(),
+            "background_tasks": check_background_tasks(),
+            "backup_disk": check_backup_disk(),
+        }
+        ready = all(check["ok"] for check in checks.values())
+        return {"status": "ready" if ready else "not_ready", "checked_at": _now(), "checks": checks}
+
+# Instância global do cache de prontidão
+readiness = ReadinessCache()
+
+
+@router.get("")
+def health_check(request: Request):
+    return {
+        "status": "online",
+        "timestamp": _now(),
+        "version": request.app.version
+    }
+
+@router.get("/live")
+def liveness(request: Request):
+    """O processo responde (não consulta o banco: uma falha aqui significa reiniciar a instância)"""
+    return {
+        "status": "alive",
+        "timestamp": _now(),
+        "version": request.app.version,
+        "uptime_seconds": round(time.time() - STARTED_AT, 3)
+    }
+
+@router.get("/ready")
+def readiness_check():
+    """Prontidão para receber tráfego; 503 faz o balanceador drenar a instância"""
+    result = readiness.get()
+    return JSONResponse(result, status_code=200 if result["status"] == "ready" else 503)
@@ -1,20 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.security import OAuth2PasswordBearer
 from schemas.resource import ResourceIn, ResourceOut
 from auth import get_current_user, check_permission
 from database_manager import db_manager
 from mock_alerts import add_alert
 import logging
-from utils.responses import success_response, error_response
+from utils.responses import success_response, error_response, paginated_response
+from utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 router = APIRouter(prefix="/resources", tags=["Resources"])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
 @router.get("/", response_model=list[ResourceOut])
-def list_resources(token: str = Depends(oauth2_scheme)):
+def list_resources(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    type: Optional[str] = None,
+    created_by: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    token: str = Depends(oauth2_scheme)
+):
     user = get_current_user(token)
-    resources = db_manager.get_resources()
-    return success_response(data=resources)
+    try:
+        page = db_manager.get_resources_page(
+            limit=limit, cursor=cursor, status=status, type=type,
+            created_by=created_by, since=since, until=until
+        )
+    except ValueError as e:
+        return error_response(message=str(e), status_code=400)
+    return paginated_response(page["items"], page["next_cursor"])
 
 @router.post("/", response_model=ResourceOut)
 def add_resource(resource: ResourceIn, token: str = Depends(oauth2_scheme)):
@@ -5,6 +5,7 @@ from models.user import User, UserRole
 from pydantic import BaseModel
 from .security import get_current_user, check_permission
 from utils.responses import success_response, error_response
+from session_cache import session_cache
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
@@ -35,12 +36,8 @@ def change_password(data: UserPasswordChange, current_user: User = Depends(get_c
     user_data = db_manager.get_user(data.username)
     if not user_data:
         return error_response(message="Usuário não encontrado", status_code=404)
-    import sqlite3
-    conn = sqlite3.connect(db_manager.db_path)
-    cursor = conn.cursor()
-    cursor.execute("UPDATE users SET password_hash = ? WHERE username = ?", (data.new_password, data.username))
-    conn.commit()
-    conn.close()
+    db_manager.update_user_password(data.username, data.new_password)
+    session_cache.evict_user(data.username)
     return success_response(message="Senha alterada com sucesso")
 
 @router.post("/create", response_model=UserOut)
@@ -49,15 +46,7 @@ def create_user(user_create: UserCreate, current_user: User = Depends(get_curren
     from database_manager import db_manager
     if db_manager.get_user(user_create.username):
         return error_response(message="Usuário já existe", status_code=400)
-    import sqlite3
-    conn = sqlite3.connect(db_manager.db_path)
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT INTO users (username, password_hash, role, is_active) VALUES (?, ?, ?, 1)",
-        (user_create.username, user_create.password, user_create.role)
-    )
-    conn.commit()
-    conn.close()
+    db_manager.add_user(user_create.username, user_create.password, user_create.role)
     return success_response(data=UserOut(username=user_create.username, role=user_create.role))
 from fastapi import APIRouter, Depends
 from typing import List
@@ -81,12 +70,8 @@ def edit_user(user_edit: UserEdit, current_user: User = Depends(get_current_user
     user_data = db_manager.get_user(user_edit.username)
     if not user_data:
         return error_response(message="Usuário não encontrado", status_code=404)
-    import sqlite3
-    conn = sqlite3.connect(db_manager.db_path)
-    cursor = conn.cursor()
-    cursor.execute("UPDATE users SET role = ? WHERE username = ?", (user_edit.role, user_edit.username))
-    conn.commit()
-    conn.close()
+    db_manager.update_user_role(user_edit.username, user_edit.role)
+    session_cache.evict_user(user_edit.username)
     return UserOut(username=user_edit.username, role=user_edit.role)
 
 @router.delete("/delete", response_model=dict)
@@ -96,12 +81,8 @@ def delete_user(user_delete: UserDelete, current_user: User = Depends(get_curren
     user_data = db_manager.get_user(user_delete.username)
     if not user_data:
         return error_response(message="Usuário não encontrado", status_code=404)
-    import sqlite3
-    conn = sqlite3.connect(db_manager.db_path)
-    cursor = conn.cursor()
-    cursor.execute("UPDATE users SET is_active = 0 WHERE username = ?", (user_delete.username,))
-    conn.commit()
-    conn.close()
+    db_manager.deactivate_user(user_delete.username)
+    session_cache.evict_user(user_delete.username)
     return {"message": "Usuário excluído com sucesso"}
 
 
@@ -130,16 +111,10 @@ def list_users(current_user: User = Depends(get_current_user)):
     else:
         role_str = str(current_user.role).lower() if current_user.role else ""
     if role_str in ["admin", "gerente"]:
-        users_data = []
-        import sqlite3
-        conn = sqlite3.connect(db_manager.db_path)
-        cursor = conn.cursor()
-        cursor.execute("SELECT username, role FROM users WHERE is_active = 1")
-        rows = cursor.fetchall()
-        for row in rows:
-            users_data.append(UserOut(username=row[0], role=row[1]))
-        conn.close()
-        return users_data
+        return [
+            UserOut(username=row["username"], role=row["role"])
+            for row in db_manager.get_active_users()
+        ]
     else:
         # Retorna apenas o próprio perfil
         user = db_manager.get_user(current_user.username)
@@ -155,12 +130,8 @@ def edit_user(user_edit: UserEdit, current_user: User = Depends(get_current_user
     user_data = db_manager.get_user(user_edit.username)
     if not user_data:
         return error_response(message="Usuário não encontrado", status_code=404)
-    import sqlite3
-    conn = sqlite3.connect(db_manager.db_path)
-    cursor = conn.cursor()
-    cursor.execute("UPDATE users SET role = ? WHERE username = ?", (user_edit.role, user_edit.username))
-    conn.commit()
-    conn.close()
+    db_manager.update_user_role(user_edit.username, user_edit.role)
+    session_cache.evict_user(user_edit.username)
     return success_response(data=UserOut(username=user_edit.username, role=user_edit.role))
 
 @router.delete("/delete", response_model=dict)
@@ -170,10 +141,6 @@ def delete_user(user_delete: UserDelete, current_user: User = Depends(get_curren
     user_data = db_manager.get_user(user_delete.username)
     if not user_data:
         return error_response(message="Usuário não encontrado", status_code=404)
-    import sqlite3
-    conn = sqlite3.connect(db_manager.db_path)
-    cursor = conn.cursor()
-    cursor.execute("UPDATE users SET is_active = 0 WHERE username = ?", (user_delete.username,))
-    conn.commit()
-    conn.close()
+    db_manager.deactivate_user(user_delete.username)
+    session_cache.evict_user(user_delete.username)
     return success_response(message="Usuário excluído com sucesso")
\ No newline at end of file
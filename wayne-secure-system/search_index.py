@@ -0,0 +1,154 @@
+"""
+Busca textual (FTS5) nos logs de auditoria e nos alertas
+
+Os índices audit_search e alert_search são tabelas FTS5 de conteúdo externo: guardam só
+o índice invertido e leem o texto de audit_log_all e de alerts para destacar os trechos.
+Triggers mantêm os índices em dia. Se o SQLite não tiver FTS5, os índices não são
+criados e o DatabaseManager cai para LIKE (sem ranking).
+"""
+
+import re
+import sqlite3
+from typing import List, Optional
+
+AUDIT_SEARCH = "audit_search"
+ALERT_SEARCH = "alert_search"
+AUDIT_SEARCH_COLUMNS = ["username", "action", "details"]
+ALERT_SEARCH_COLUMNS = ["alert_type", "message"]
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+
+# Termos da consulta: palavras, com * final opcional para busca por prefixo
+_TERM = re.compile(r"\w+\*?")
+MAX_TERMS = 16
+
+
+def fts5_available(conn: sqlite3.Connection) -> bool:
+    options = {row[0] for row in conn.execute("PRAGMA compile_options")}
+    return "ENABLE_FTS5" in options
+
+
+def search_enabled(conn: sqlite3.Connection) -> bool:
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (AUDIT_SEARCH,)
+    ).fetchone() is not None
+
+
+def query_terms(query: str) -> List[str]:
+    """Termos da busca do usuário; levanta ValueError se não houver nenhum"""
+    terms = _TERM.findall(query or "")[:MAX_TERMS]
+    if not terms:
+        raise ValueError("Informe ao menos um termo para a busca")
+    return terms
+
+
+def match_expression(terms: List[str]) -> str:
+    """Expressão MATCH com todos os termos (entre aspas, sem operadores vindos do usuário)"""
+    return " ".join(
+        f'"{term[:-1]}"*' if term.endswith("*") else f'"{term}"' for term in terms
+    )
+
+
+def like_pattern(term: str) -> str:
+    """Padrão LIKE equivalente ao termo (escape com \\)"""
+    escaped = term.rstrip("*").replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def create_search_index(conn: sqlite3.Connection):
+    """Passo de migração: cria os índices FTS5, os triggers e indexa os dados existentes"""
+    if not fts5_available(conn):
+        return
+    conn.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {AUDIT_SEARCH} USING fts5(
+            {", ".join(AUDIT_SEARCH_COLUMNS)},
+            content = 'audit_log_all', content_rowid = 'id',
+            tokenize = 'unicode61 remove_diacritics 2'
+        )
+    """)
+    conn.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {ALERT_SEARCH} USING fts5(
+            {", ".join(ALERT_SEARCH_COLUMNS)},
+            content = 'alerts', content_rowid = 'id',
+            tokenize = 'unicode61 remove_diacritics 2'
+        )
+    """)
+    # Eventos só são inseridos em audit_log; a rotação para as partições não muda os ids
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_audit_search_insert AFTER INSERT ON audit_log
+        BEGIN
+            INSERT INTO {AUDIT_SEARCH} (rowid, username, action, details)
+            VALUES (NEW.id, NEW.username, NEW.action, NEW.details);
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_alert_search_insert AFTER INSERT ON alerts
+        BEGIN
+            INSERT INTO {ALERT_SEARCH} (rowid, alert_type, message) VALUES (NEW.id, NEW.alert_type, NEW.message);
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_alert_search_delete AFTER DELETE ON alerts
+        BEGIN
+            INSERT INTO {ALERT_SEARCH} ({ALERT_SEARCH}, rowid, alert_type, message)
+            VALUES ('delete', OLD.id, OLD.alert_type, OLD.message);
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_alert_search_update AFTER UPDATE OF alert_type, message ON alerts
+        BEGIN
+            INSERT INTO {ALERT_SEARCH} ({ALERT_SEARCH}, rowid, alert_type, message)
+            VALUES ('delete', OLD.id, OLD.alert_type, OLD.message);
+            INSERT INTO {ALERT_SEARCH} (rowid, alert_type, message) VALUES (NEW.id, NEW.alert_type, NEW.message);
+        END
+    """)
+    conn.execute(f"INSERT INTO {AUDIT_SEARCH} ({AUDIT_SEARCH}) VALUES ('rebuild')")
+    conn.execute(f"INSERT INTO {ALERT_SEARCH} ({ALERT_SEARCH}) VALUES ('rebuild')")
+
+
+def forget_audit_rows(conn: sqlite3.Connection, table: str):
+    """Remove do índice os eventos de uma partição que vai ser descartada"""
+    if not search_enabled(conn):
+        return
+    conn.execute(f"""
+        INSERT INTO {AUDIT_SEARCH} ({AUDIT_SEARCH}, rowid, username, action, details)
+        SELECT 'delete', id, username, action, details FROM {table}
+    """)
+
+
+def rank_floor_query(index: str) -> str:
+    """rowid da N-ésima ocorrência mais recente (parâmetros: expressão MATCH, N - 1)"""
+    return f"SELECT rowid FROM {index} WHERE {index} MATCH ? ORDER BY rowid DESC LIMIT 1 OFFSET ?"
+
+
+def search_query(index: str, columns: List[str], match: str, order: str, after: Optional[tuple],
+                 limit: int, floor: Optional[int] = None) -> tuple:
+    """
+    (sql, params) que busca (rowid, rank, destaques por coluna) no índice, em ordem de
+    relevância (bm25) ou dos mais recentes; after é a posição (rank, rowid) do cursor
+    e floor o menor rowid considerado
+    """
+    highlights = ", ".join(
+        f"highlight({index}, {position}, ?, ?)" for position in range(len(columns))
+    )
+    params = [HIGHLIGHT_START, HIGHLIGHT_END] * len(columns) + [match]
+    conditions = [f"{index} MATCH ?"]
+    if floor is not None:
+        conditions.append("rowid >= ?")
+        params.append(floor)
+    if order == "relevance":
+        if after is not None:
+            conditions.append("(rank, rowid) > (?, ?)")
+            params.extend(after)
+        order_by = "rank, rowid"
+    else:
+        if after is not None:
+            conditions.append("rowid < ?")
+            params.append(after[1])
+        order_by = "rowid DESC"
+    sql = f"""
+        SELECT rowid, rank, {highlights} FROM {index}
+        WHERE {" AND ".join(conditions)} ORDER BY {order_by} LIMIT ?
+    """
+    return sql, params + [limit]
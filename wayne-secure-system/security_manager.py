@@ -1,20 +1,12 @@
 import hashlib
-import sqlite3
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Dict, List
-from functools import wraps
-from fastapi import HTTPException, status, Request
-import time
-from collections import defaultdict
 from database_manager import db_manager
+from session_cache import session_cache
+import audit_actions
 from jose import jwt
 import os
 
-# Configurações de rate limiting
-RATE_LIMIT_REQUESTS = 10  # máximo de requests
-RATE_LIMIT_WINDOW = 60    # em segundos
-request_counts = defaultdict(list)
-
 class SecurityManager:
     """Gerenciador de segurança avançado"""
     
@@ -39,11 +31,19 @@ class SecurityManager:
         except Exception:
             return False
     
+    @staticmethod
+    def get_session_expiry(token: str) -> Optional[datetime]:
+        try:
+            token_hash = SecurityManager.hash_token(token)
+            return db_manager.get_session_expiry(token_hash)
+        except Exception:
+            return None
+    
     @staticmethod
     def invalidate_session(token: str) -> bool:
         try:
             token_hash = SecurityManager.hash_token(token)
-
+            session_cache.evict(token_hash)
             return db_manager.invalidate_session(token_hash)
         except Exception:
             return False
@@ -66,163 +66,103 @@ class SecurityManager:
             db_manager.add_alert(
                 alert_type=event_type,
                 message=f"Evento de segurança: {details}",
-                level="ALTO"
+                level="ALTO",
+                subject=ip_address if username == "ANONYMOUS" and ip_address else username
             )
 
-def rate_limit(max_requests: int = RATE_LIMIT_REQUESTS, window_seconds: int = RATE_LIMIT_WINDOW):
-    def decorator(func):
-        @wraps(func)
-        async def wrapper(request: Request, *args, **kwargs):
-            client_ip = request.client.host
-            current_time = time.time()
-            request_counts[client_ip] = [
-                req_time for req_time in request_counts[client_ip]
-                if current_time - req_time < window_seconds
-            ]
-            if len(request_counts[client_ip]) >= max_requests:
-                SecurityManager.log_security_event(
-                    username="ANONYMOUS",
-                    event_type="RATE_LIMIT_EXCEEDED",
-                    details=f"IP {client_ip} excedeu limite de {max_requests} requests em {window_seconds}s",
-                    ip_address=client_ip
-                )
-                raise HTTPException(
-                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                    detail="Muitas tentativas. Tente novamente em alguns minutos."
-                )
-            
-            # Registra a request atual
-            request_counts[client_ip].append(current_time)
-            
-            return await func(request, *args, **kwargs)
-        return wrapper
-    return decorator
+def log_rate_limit_exceeded(client_ip: str, max_requests: int, window_seconds: float):
+    SecurityManager.log_security_event(
+        username="ANONYMOUS",
+        event_type="RATE_LIMIT_EXCEEDED",
+        details=f"IP {client_ip} excedeu limite de {max_requests} requests em {window_seconds:g}s",
+        ip_address=client_ip
+    )
 
 class BackupManager:
     """Gerenciador de backups automáticos"""
     
     @staticmethod
     def create_automatic_backup() -> str:
-        """Cria backup automático"""
-        return db_manager.create_backup("automatic")
+        """Cria backup automático (incremental) e aplica a política de retenção"""
+        backup_path = db_manager.create_backup("automatic", incremental=True)
+        removed = db_manager.apply_backup_retention("automatic")
+        if removed:
+            print(f"Retenção de backups: {len(removed)} backup(s) automático(s) removido(s)")
+        return backup_path
     
     @staticmethod
-    def create_manual_backup() -> str:
+    def create_manual_backup(incremental: bool = False) -> str:
         """Cria backup manual"""
-        return db_manager.create_backup("manual")
+        return db_manager.create_backup("manual", incremental=incremental)
     
     @staticmethod
     def restore_from_backup(backup_path: str) -> bool:
         """Restaura sistema a partir de backup"""
-        return db_manager.restore_backup(backup_path)
+        restored = db_manager.restore_backup(backup_path)
+        if restored:
+            # As sessões em cache podem não existir no banco restaurado
+            session_cache.clear()
+        return restored
     
     @staticmethod
-    def get_backup_list() -> List[Dict]:
-        """Lista todos os backups disponíveis"""
-        return db_manager.get_backup_list()
-    
-    @staticmethod
-    def schedule_daily_backup():
-        """Agenda backup diário (implementação básica)"""
-        import threading
-        import time
-        
-        def daily_backup():
-            while True:
-                try:
-                    # Espera 24 horas (86400 segundos)
-                    time.sleep(86400)
-                    BackupManager.create_automatic_backup()
-                    print(f"Backup automático criado em {datetime.now()}")
-                except Exception as e:
-                    print(f"Erro no backup automático: {e}")
-        
-        backup_thread = threading.Thread(target=daily_backup, daemon=True)
-        backup_thread.start()
+    def get_backup_list(limit: int = 100, backup_type: Optional[str] = None) -> List[Dict]:
+        """Lista os backups do catálogo"""
+        return db_manager.get_backup_list(limit=limit, backup_type=backup_type)
 
 class ReportManager:
     """Gerenciador de relatórios de segurança"""
     
     @staticmethod
     def generate_security_report(days: int = 30) -> Dict:
-        """Gera relatório de segurança dos últimos N dias"""
-        with sqlite3.connect(db_manager.db_path) as conn:
-            cursor = conn.cursor()
-            
-            # Data limite
-            start_date = (datetime.now() - timedelta(days=days)).isoformat()
-            
-            # Estatísticas de login
-            cursor.execute("""
-                SELECT COUNT(*) as total_logins,
-                       COUNT(DISTINCT username) as unique_users
-                FROM audit_log 
-                WHERE action LIKE '%LOGIN%' AND timestamp >= ?
-            """, (start_date,))
-            login_stats = cursor.fetchone()
-            
-            # Tentativas de acesso negado
-            cursor.execute("""
-                SELECT COUNT(*) as denied_access
-                FROM audit_log 
-                WHERE action LIKE '%SECURITY_UNAUTHORIZED_ACCESS%' AND timestamp >= ?
-            """, (start_date,))
-            denied_access = cursor.fetchone()[0]
-            
-            # Recursos mais acessados
-            cursor.execute("""
-                SELECT resource_type, COUNT(*) as access_count
-                FROM audit_log 
-                WHERE resource_type IS NOT NULL AND timestamp >= ?
-                GROUP BY resource_type
-                ORDER BY access_count DESC
-                LIMIT 5
-            """, (start_date,))
-            top_resources = cursor.fetchall()
-            
-            # Usuários mais ativos
-            cursor.execute("""
-                SELECT username, COUNT(*) as action_count
-                FROM audit_log 
-                WHERE timestamp >= ?
-                GROUP BY username
-                ORDER BY action_count DESC
-                LIMIT 5
-            """, (start_date,))
-            top_users = cursor.fetchall()
-            
-            # Alertas por nível
-            cursor.execute("""
-                SELECT level, COUNT(*) as alert_count
-                FROM alerts 
-                WHERE timestamp >= ?
-                GROUP BY level
-            """, (start_date,))
-            alerts_by_level = cursor.fetchall()
-            
-            return {
-                "period_days": days,
-                "generated_at": datetime.now().isoformat(),
-                "login_statistics": {
-                    "total_logins": login_stats[0] or 0,
-                    "unique_users": login_stats[1] or 0
-                },
-                "security_events": {
-                    "denied_access_attempts": denied_access
-                },
-                "top_accessed_resources": [
-                    {"resource_type": row[0], "access_count": row[1]} 
-                    for row in top_resources
-                ],
-                "most_active_users": [
-                    {"username": row[0], "action_count": row[1]} 
-                    for row in top_users
-                ],
-                "alerts_by_level": [
-                    {"level": row[0], "count": row[1]} 
-                    for row in alerts_by_level
-                ]
-            }
+        """Gera relatório de segurança dos últimos N dias a partir dos agregados de auditoria"""
+        db_manager.audit_writer.flush()
+        
+        # Data limite, em UTC como os timestamps gravados
+        start_date = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=days)
+        activity = db_manager.get_audit_activity(start_date)
+        alerts_by_level = db_manager.get_alert_counts_by_level(start_date)
+        
+        # Só logins bem-sucedidos contam como login (falhas têm categoria própria)
+        login_users = set()
+        total_logins = denied_access = 0
+        by_resource_type: Dict[str, int] = {}
+        by_username: Dict[str, int] = {}
+        for username, category, resource_type, count in activity:
+            if category == audit_actions.LOGIN_SUCCESS:
+                total_logins += count
+                login_users.add(username)
+            elif category == audit_actions.ACCESS_DENIED:
+                denied_access += count
+            if resource_type is not None:
+                by_resource_type[resource_type] = by_resource_type.get(resource_type, 0) + count
+            by_username[username] = by_username.get(username, 0) + count
+        
+        def top(counts: Dict[str, int]) -> List[tuple]:
+            return sorted(counts.items(), key=lambda item: item[1], reverse=True)[:5]
+        
+        return {
+            "period_days": days,
+            "generated_at": datetime.now().isoformat(),
+            "login_statistics": {
+                "total_logins": total_logins,
+                "unique_users": len(login_users)
+            },
+            "security_events": {
+                "denied_access_attempts": denied_access
+            },
+            "top_accessed_resources": [
+                {"resource_type": resource_type, "access_count": count}
+                for resource_type, count in top(by_resource_type)
+            ],
+            "most_active_users": [
+                {"username": username, "action_count": count}
+                for username, count in top(by_username)
+            ],
+            "alerts_by_level": [
+                {"level": level, "count": count}
+                for level, count in alerts_by_level
+            ]
+        }
     
     @staticmethod
     def generate_resource_report() -> Dict:
@@ -281,6 +221,3 @@ security_manager = SecurityManager()
 backup_manager = BackupManager()
 report_manager = ReportManager()
 data_validator = DataValidator()
-
-# Inicia backup automático diário
-backup_manager.schedule_daily_backup()
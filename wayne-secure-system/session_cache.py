@@ -0,0 +1,74 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional, Set, Tuple
+from models.user import User
+from config import SESSION_CACHE_SIZE, SESSION_CACHE_TTL
+
+class SessionCache:
+    """Cache LRU em memória de sessões já validadas, indexado pelo hash do token"""
+
+    def __init__(self, max_size: int = SESSION_CACHE_SIZE, ttl: float = SESSION_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[User, float]]" = OrderedDict()
+        self._by_username: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, token_hash: str) -> Optional[User]:
+        """Retorna o usuário da sessão, se ainda estiver no cache e não expirada"""
+        with self._lock:
+            entry = self._entries.get(token_hash)
+            if entry is None:
+                return None
+            user, expires_ts = entry
+            if time.time() >= expires_ts:
+                self._remove(token_hash)
+                return None
+            self._entries.move_to_end(token_hash)
+            return user
+
+    def set(self, token_hash: str, user: User, expires_at: datetime):
+        """Guarda a sessão até expires_at (limitado pelo TTL do cache)"""
+        expires_ts = min(expires_at.timestamp(), time.time() + self.ttl)
+        with self._lock:
+            if token_hash in self._entries:
+                self._remove(token_hash)
+            self._entries[token_hash] = (user, expires_ts)
+            self._by_username.setdefault(user.username, set()).add(token_hash)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+    def evict(self, token_hash: str):
+        """Remove uma sessão (logout/invalidação)"""
+        with self._lock:
+            self._remove(token_hash)
+
+    def evict_user(self, username: str):
+        """Remove todas as sessões de um usuário (edição/exclusão)"""
+        with self._lock:
+            for token_hash in list(self._by_username.get(username, ())):
+                self._remove(token_hash)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_username.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, token_hash: str):
+        entry = self._entries.pop(token_hash, None)
+        if entry is None:
+            return
+        username = entry[0].username
+        tokens = self._by_username.get(username)
+        if tokens is not None:
+            tokens.discard(token_hash)
+            if not tokens:
+                del self._by_username[username]
+
+# Instância global do cache de sessões
+session_cache = SessionCache()
@@ -0,0 +1,214 @@
+"""
+Profiler de SQL por requisição e log de consultas lentas
+
+Com SQL_PROFILE diferente de "off" as conexões do ConnectionPool são criadas com
+ProfilingConnection: cada comando é cronometrado (execute + fetch) e os que passam de
+SQL_SLOW_QUERY_MS vão para o log com o plano de execução. Nas requisições perfiladas
+(cabeçalho X-SQL-Profile: 1 no modo "header", todas no modo "always") o SqlProfilerMiddleware
+junta os comandos com seus planos, devolve um resumo no cabeçalho X-SQL-Profile e registra
+o detalhe no log "wayne.sql", apontando comandos repetidos (padrão N+1).
+"""
+
+import logging
+import re
+import sqlite3
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+from config import SQL_PROFILE, SQL_SLOW_QUERY_MS, SQL_PROFILE_REPEAT_THRESHOLD
+
+logger = logging.getLogger("wayne.sql")
+
+PROFILE_MODES = ("off", "header", "always")
+PROFILE_HEADER = "x-sql-profile"
+
+_EXPLAINABLE = re.compile(r"\s*(SELECT|INSERT|UPDATE|DELETE|REPLACE|WITH)\b", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize(sql: str) -> str:
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def explain(conn: sqlite3.Connection, sql: str, parameters=()) -> Optional[List[str]]:
+    """Plano de execução do comando (None se não se aplica ou não pôde ser obtido)"""
+    if not _EXPLAINABLE.match(sql):
+        return None
+    try:
+        # Método da classe base: o EXPLAIN não entra no próprio profile
+        rows = sqlite3.Connection.execute(conn, f"EXPLAIN QUERY PLAN {sql}", parameters).fetchall()
+    except sqlite3.Error:
+        return None
+    return [row[3] for row in rows]
+
+
+class StatementRecord:
+    __slots__ = ("sql", "duration", "plan", "slow_logged")
+
+    def __init__(self, sql: str, duration: float):
+        self.sql = sql
+        self.duration = duration
+        self.plan: Optional[List[str]] = None
+        self.slow_logged = False
+
+
+class RequestProfile:
+    """Comandos SQL executados durante uma requisição"""
+
+    def __init__(self, label: str):
+        self.label = label
+        self.statements: List[StatementRecord] = []
+        # Um EXPLAIN por comando distinto na requisição
+        self._plans: Dict[str, Optional[List[str]]] = {}
+
+    def add(self, conn: sqlite3.Connection, record: StatementRecord, parameters):
+        self.statements.append(record)
+        if record.sql not in self._plans:
+            self._plans[record.sql] = explain(conn, record.sql, parameters)
+        record.plan = self._plans[record.sql]
+
+    def summary(self) -> Dict:
+        counts = Counter(record.sql for record in self.statements)
+        return {
+            "queries": len(self.statements),
+            "db_time_ms": round(sum(record.duration for record in self.statements) * 1000, 3),
+            "repeated": {
+                sql: count for sql, count in counts.most_common() if count >= SQL_PROFILE_REPEAT_THRESHOLD
+            },
+        }
+
+    def header_value(self) -> str:
+        summary = self.summary()
+        return (
+            f"queries={summary['queries']}; db_time_ms={summary['db_time_ms']}; "
+            f"repeated={len(summary['repeated'])}"
+        )
+
+    def log(self, top: int = 5):
+        summary = self.summary()
+        lines = [f"SQL {self.label}: {summary['queries']} comandos em {summary['db_time_ms']} ms"]
+        for sql, count in summary["repeated"].items():
+            lines.append(f"  possível N+1 ({count}x): {sql}")
+        for record in sorted(self.statements, key=lambda r: r.duration, reverse=True)[:top]:
+            plan = " | ".join(record.plan) if record.plan else "-"
+            lines.append(f"  {record.duration * 1000:.3f} ms: {record.sql}  [plano: {plan}]")
+        logger.info("\n".join(lines))
+
+
+_profile: ContextVar[Optional[RequestProfile]] = ContextVar("sql_profile", default=None)
+
+
+def _add_time(conn: sqlite3.Connection, record: StatementRecord, parameters, elapsed: float):
+    record.duration += elapsed
+    if not record.slow_logged and SQL_SLOW_QUERY_MS > 0 and record.duration * 1000 >= SQL_SLOW_QUERY_MS:
+        record.slow_logged = True
+        plan = record.plan if record.plan is not None else explain(conn, record.sql, parameters)
+        logger.warning(
+            f"Consulta lenta ({record.duration * 1000:.1f} ms): {record.sql}"
+            f"  [plano: {' | '.join(plan) if plan else '-'}]"
+        )
+
+
+class ProfilingCursor(sqlite3.Cursor):
+    """Cursor que cronometra execute e fetch* do comando corrente"""
+
+    _record: Optional[StatementRecord] = None
+    _parameters = ()
+
+    def _start(self, sql: str, parameters, elapsed: float):
+        record = StatementRecord(normalize(sql), 0.0)
+        profile = _profile.get()
+        if profile is not None:
+            profile.add(self.connection, record, parameters)
+        self._record, self._parameters = record, parameters
+        _add_time(self.connection, record, parameters, elapsed)
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._start(sql, parameters, time.perf_counter() - started)
+
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            # Sem parâmetros representativos: o plano fica sem os valores (EXPLAIN falha e é omitido)
+            self._start(sql, (), time.perf_counter() - started)
+
+    def _fetch(self, method, *args):
+        started = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            if self._record is not None:
+                _add_time(self.connection, self._record, self._parameters, time.perf_counter() - started)
+
+    def fetchone(self):
+        return self._fetch(super().fetchone)
+
+    def fetchmany(self, *args):
+        return self._fetch(super().fetchmany, *args)
+
+    def fetchall(self):
+        return self._fetch(super().fetchall)
+
+
+class ProfilingConnection(sqlite3.Connection):
+    def cursor(self, factory=ProfilingCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def connection_factory():
+    """Classe das conexões do pool: com o profiler desligado, a do próprio sqlite3 (sem custo)"""
+    if SQL_PROFILE not in PROFILE_MODES:
+        raise ValueError(f"Modo do profiler de SQL inválido: {SQL_PROFILE}")
+    return sqlite3.Connection if SQL_PROFILE == "off" else ProfilingConnection
+
+
+class SqlProfilerMiddleware:
+    """Middleware ASGI que perfila as requisições escolhidas e anexa o resumo à resposta"""
+
+    def __init__(self, app, mode: str = SQL_PROFILE):
+        self.app = app
+        self.mode = mode
+
+    def _wanted(self, scope) -> bool:
+        if self.mode == "always":
+            return True
+        if self.mode == "header":
+            return any(
+                name == PROFILE_HEADER.encode() and value not in (b"", b"0")
+                for name, value in scope.get("headers", [])
+            )
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._wanted(scope):
+            await self.app(scope, receive, send)
+            return
+        profile = RequestProfile(f"{scope['method']} {scope['path']}")
+        token = _profile.set(profile)
+
+        async def send_wrapper(message):
+            # Em respostas em fluxo o cabeçalho sai antes do corpo: o log traz o total
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (PROFILE_HEADER.encode(), profile.header_value().encode())
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _profile.reset(token)
+            profile.log()
@@ -0,0 +1,66 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+APP_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(APP_DIR))
+
+# config.py lê o ambiente na importação: nada dos testes pode tocar o banco ou as pastas da aplicação
+_SCRATCH = Path(tempfile.mkdtemp(prefix="wayne-tests-"))
+os.environ.update({
+    "DATABASE_PATH": str(_SCRATCH / "wayne_test.db"),
+    "BACKUP_DIR": str(_SCRATCH / "backups"),
+    "AUDIT_ARCHIVE_DIR": str(_SCRATCH / "audit_archive"),
+    "RATE_LIMIT_BACKEND": "memory",
+    "SEED_DEFAULT_USERS": "false",
+    # Sem tarefas periódicas disputando o banco dos testes
+    "COUNTER_RECONCILE_INTERVAL": "0",
+    "AUDIT_MAINTENANCE_INTERVAL": "0",
+    "BACKUP_INTERVAL": "0",
+})
+
+import database_manager  # noqa: E402
+from database_manager import DatabaseManager  # noqa: E402
+from session_cache import session_cache  # noqa: E402
+import main  # noqa: E402,F401  (carrega todos os módulos que usam a instância global do banco)
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """DatabaseManager migrado num banco temporário, com backups e arquivos de auditoria em tmp_path"""
+    monkeypatch.setattr(database_manager, "BACKUP_DIR", str(tmp_path / "backups"))
+    monkeypatch.setattr(database_manager, "AUDIT_ARCHIVE_DIR", str(tmp_path / "audit_archive"))
+    manager = DatabaseManager(db_path=str(tmp_path / "wayne.db"))
+    manager.init_database()
+    yield manager
+    manager.audit_writer.shutdown()
+    manager.close_connections()
+
+
+@pytest.fixture
+def app_db(db, monkeypatch):
+    """O banco temporário no lugar da instância global em todos os módulos da aplicação"""
+    global_manager = database_manager.db_manager
+    for module in list(sys.modules.values()):
+        if getattr(module, "db_manager", None) is global_manager:
+            monkeypatch.setattr(module, "db_manager", db)
+    session_cache.clear()
+    yield db
+    session_cache.clear()
+
+
+@pytest.fixture
+def client(app_db):
+    """Cliente da API sobre o banco temporário (sem o lifespan: nada de tarefas periódicas)"""
+    from fastapi.testclient import TestClient
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def admin_token(app_db):
+    from auth import create_access_token, hash_password
+    app_db.add_user("lucius", hash_password("Fox12345!"), "admin")
+    return create_access_token(data={"username": "lucius"})
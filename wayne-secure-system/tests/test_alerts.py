@@ -0,0 +1,49 @@
+def alert_rows(db):
+    with db.reader() as conn:
+        return conn.execute(
+            "SELECT id, occurrences, last_seen, timestamp FROM alerts ORDER BY id"
+        ).fetchall()
+
+
+def age_alert(db, alert_id, seconds):
+    with db.writer() as conn:
+        conn.execute(
+            "UPDATE alerts SET last_seen = datetime('now', ?), timestamp = datetime('now', ?) WHERE id = ?",
+            (f"-{seconds} seconds", f"-{seconds} seconds", alert_id)
+        )
+
+
+def test_repeated_alert_inside_window_is_aggregated(db):
+    first = db.add_alert("FAILED_LOGIN", "Falha de login", "ALTO", subject="10.0.0.1")
+    age_alert(db, first, 60)
+    (_, _, aged_last_seen, created_at), = alert_rows(db)
+
+    again = db.add_alert("FAILED_LOGIN", "Falha de login", "ALTO", subject="10.0.0.1")
+    db.add_alert("FAILED_LOGIN", "Falha de login", "ALTO", subject="10.0.0.1")
+
+    assert again == first
+    (alert_id, occurrences, last_seen, timestamp), = alert_rows(db)
+    assert (alert_id, occurrences) == (first, 3)
+    assert last_seen > aged_last_seen
+    assert timestamp == created_at
+
+
+def test_repeated_alert_after_window_creates_new_row(db):
+    first = db.add_alert("FAILED_LOGIN", "Falha de login", "ALTO", subject="10.0.0.1")
+    age_alert(db, first, db.alert_dedup_window + 60)
+
+    second = db.add_alert("FAILED_LOGIN", "Falha de login", "ALTO", subject="10.0.0.1")
+
+    assert second != first
+    assert [(row[0], row[1]) for row in alert_rows(db)] == [(first, 1), (second, 1)]
+
+
+def test_different_key_or_resolved_alert_is_not_aggregated(db):
+    first = db.add_alert("FAILED_LOGIN", "Falha de login", "ALTO", subject="10.0.0.1")
+    other_subject = db.add_alert("FAILED_LOGIN", "Falha de login", "ALTO", subject="10.0.0.2")
+    other_level = db.add_alert("FAILED_LOGIN", "Falha de login", "MEDIO", subject="10.0.0.1")
+    db.resolve_alert(first, "alfred")
+    after_resolution = db.add_alert("FAILED_LOGIN", "Falha de login", "ALTO", subject="10.0.0.1")
+
+    assert len({first, other_subject, other_level, after_resolution}) == 4
+    assert all(row[1] == 1 for row in alert_rows(db))
@@ -0,0 +1,161 @@
+import sqlite3
+import threading
+import time
+
+from audit_writer import AuditWriter, audit_events_dropped
+
+
+class RecordingSink:
+    """write_batch de teste: guarda os lotes e pode falhar nas primeiras chamadas"""
+
+    def __init__(self, failures: int = 0):
+        self.batches = []
+        self.failures = failures
+        self.lock = threading.Lock()
+
+    def __call__(self, batch):
+        with self.lock:
+            if self.failures > 0:
+                self.failures -= 1
+                raise sqlite3.OperationalError("database is locked")
+            self.batches.append(list(batch))
+
+    @property
+    def rows(self):
+        return [row for batch in self.batches for row in batch]
+
+
+def dropped_count(reason):
+    return audit_events_dropped._values.get((reason,), 0)
+
+
+def make_writer(sink, **options):
+    options = {"mode": "batched", "batch_size": 50, "flush_interval": 10, "max_queue": 1000,
+               "enqueue_timeout": 0.05, "retries": 3, "retry_backoff": 0.001, **options}
+    return AuditWriter(sink, **options)
+
+
+def test_flush_writes_everything_submitted_in_batches():
+    sink = RecordingSink()
+    writer = make_writer(sink)
+    for i in range(120):
+        writer.submit((i,))
+
+    writer.flush()
+
+    assert sink.rows == [(i,) for i in range(120)]
+    assert all(len(batch) <= 50 for batch in sink.batches)
+    assert writer.depth == 0
+    writer.shutdown()
+
+
+def test_shutdown_drains_queue_and_later_events_are_written_synchronously():
+    sink = RecordingSink()
+    writer = make_writer(sink)
+    for i in range(30):
+        writer.submit((i,))
+
+    writer.shutdown()
+    assert sink.rows == [(i,) for i in range(30)]
+    assert not writer._thread.is_alive()
+
+    writer.submit(("depois",))
+    assert sink.rows[-1] == ("depois",)
+
+
+def test_failed_batches_are_retried_not_dropped():
+    sink = RecordingSink(failures=5)
+    writer = make_writer(sink, retries=1, flush_interval=0.02)
+    for i in range(10):
+        writer.submit((i,))
+
+    deadline = time.monotonic() + 5
+    while len(sink.rows) < 10 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    writer.shutdown()
+
+    assert sorted(sink.rows) == [(i,) for i in range(10)]
+    assert writer.depth == 0
+
+
+def test_sync_mode_writes_inline():
+    sink = RecordingSink()
+    writer = make_writer(sink, mode="sync")
+
+    writer.submit(("agora",))
+
+    assert sink.batches == [[("agora",)]]
+    assert writer._thread is None
+
+
+def test_batched_writer_with_database(db):
+    for i in range(25):
+        db.log_audit("alfred", "LOGOUT", details=f"evento {i}")
+
+    db.audit_writer.flush()
+
+    with db.reader() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM audit_log WHERE username = 'alfred'").fetchone()[0] == 25
+
+
+class RejectingSink(RecordingSink):
+    """Rejeita definitivamente os lotes que contêm um evento inválido"""
+
+    def __call__(self, batch):
+        if ("invalido",) in batch:
+            raise sqlite3.IntegrityError("NOT NULL constraint failed: audit_log.username")
+        super().__call__(batch)
+
+
+def test_rejected_row_is_dropped_without_blocking_later_batches():
+    sink = RejectingSink()
+    writer = make_writer(sink)
+    dropped = dropped_count("invalid")
+    for row in [(1,), ("invalido",), (2,)]:
+        writer.submit(row)
+    writer.flush()
+    writer.submit((3,))
+    writer.flush()
+
+    assert sink.rows == [(1,), (2,), (3,)]
+    assert dropped_count("invalid") == dropped + 1
+    assert writer.depth == 0
+    writer.shutdown()
+
+
+def test_transient_failures_keep_rows_in_order():
+    sink = RecordingSink(failures=10)
+    writer = make_writer(sink, retries=0)
+    for i in range(5):
+        writer.submit((i,))
+    writer.flush()
+
+    assert writer.depth == 5
+    sink.failures = 0
+    writer.submit((5,))
+    writer.flush()
+
+    assert sink.rows == [(i,) for i in range(6)]
+    writer.shutdown()
+
+
+def test_backpressure_does_not_wait_for_writes_in_progress():
+    release = threading.Event()
+    sink = RecordingSink()
+
+    def slow_write(batch):
+        release.wait(5)
+        sink(batch)
+
+    writer = make_writer(slow_write, max_queue=1, batch_size=1, enqueue_timeout=0.01)
+    writer.submit((0,))
+    time.sleep(0.05)  # a thread de fundo fica presa gravando o primeiro evento
+    writer.submit((1,))
+
+    started = time.monotonic()
+    writer.submit((2,))
+    assert time.monotonic() - started < 1
+
+    release.set()
+    writer.shutdown()
+    assert sorted(sink.rows) == [(i,) for i in range(3)]
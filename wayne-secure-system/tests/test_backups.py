@@ -0,0 +1,101 @@
+from pathlib import Path
+
+
+def resource_names(db):
+    with db.reader() as conn:
+        return [row[0] for row in conn.execute("SELECT name FROM resources ORDER BY id")]
+
+
+def catalog(db):
+    with db.reader() as conn:
+        return {row[0]: (row[1], row[2]) for row in conn.execute("SELECT file_path, backup_type, kind FROM backups")}
+
+
+def add_resources(db, prefix, count):
+    for i in range(count):
+        db.add_resource(f"{prefix}{i}", "veiculo", "x" * 200, "active", "teste")
+
+
+def test_full_incremental_chain_round_trip(db):
+    """Completo → incremental → incremental: cada ponto da cadeia restaura o próprio estado"""
+    add_resources(db, "base", 200)
+    full = db.create_backup("automatic", incremental=True)
+    after_full = resource_names(db)
+
+    add_resources(db, "inc1_", 20)
+    db.delete_resource(1)
+    first_inc = db.create_backup("automatic", incremental=True)
+    after_first_inc = resource_names(db)
+
+    add_resources(db, "inc2_", 20)
+    second_inc = db.create_backup("automatic", incremental=True)
+    after_second_inc = resource_names(db)
+
+    assert catalog(db)[full] == ("automatic", "full")
+    assert catalog(db)[first_inc] == ("automatic", "incremental")
+    assert catalog(db)[second_inc] == ("automatic", "incremental")
+    assert [Path(link["file_path"]).name for link in db.resolve_restore_chain(second_inc)] == [
+        Path(full).name, Path(first_inc).name, Path(second_inc).name
+    ]
+
+    add_resources(db, "depois", 5)
+
+    assert db.restore_backup(first_inc)
+    assert resource_names(db) == after_first_inc
+    with db.reader() as conn:
+        assert conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+
+    assert db.restore_backup(second_inc)
+    assert resource_names(db) == after_second_inc
+
+    assert db.restore_backup(full)
+    assert resource_names(db) == after_full
+
+
+def test_restore_keeps_current_catalog_and_pre_restore_backup(db):
+    """O catálogo restaurado é o atual (não o do arquivo), incluindo o backup pre_restore feito antes"""
+    add_resources(db, "base", 50)
+    full = db.create_backup("automatic", incremental=True)
+    add_resources(db, "inc", 10)
+    first_inc = db.create_backup("automatic", incremental=True)
+    second_inc = db.create_backup("automatic", incremental=True)
+    before = catalog(db)
+
+    assert db.restore_backup(full)
+
+    after = catalog(db)
+    # O arquivo restaurado só conhecia os backups anteriores a ele; os posteriores continuam catalogados
+    assert {first_inc, second_inc} <= set(after)
+    assert {path: entry for path, entry in after.items() if path in before} == before
+    pre_restore = [path for path, (backup_type, _) in after.items() if backup_type == "pre_restore"]
+    assert len(pre_restore) == 1 and Path(pre_restore[0]).exists()
+
+    # O pre_restore devolve o estado de antes da restauração, e a cadeia continua restaurável
+    assert db.restore_backup(pre_restore[0])
+    assert len(resource_names(db)) == 60
+    assert db.restore_backup(second_inc)
+    assert len(resource_names(db)) == 60
+
+
+def test_restore_rejects_tampered_chain_link(db):
+    add_resources(db, "base", 20)
+    full = db.create_backup("automatic", incremental=True)
+    add_resources(db, "inc", 5)
+    first_inc = db.create_backup("automatic", incremental=True)
+    with open(full, "ab") as f:
+        f.write(b"corrompido")
+
+    assert not db.restore_backup(first_inc)
+    assert len(resource_names(db)) == 25
+    assert not any(backup_type == "pre_restore" for backup_type, _ in catalog(db).values())
+
+
+def test_system_stats_reports_configured_database(client, admin_token, app_db):
+    """Tamanho e contagem vêm do banco configurado, não de um caminho fixo"""
+    app_db.create_backup("full")
+
+    response = client.get("/admin/admin/system-stats", params={"token": admin_token})
+
+    assert response.status_code == 200
+    assert response.json()["database_size_mb"] == round(Path(app_db.db_path).stat().st_size / 1024 / 1024, 2)
+    assert response.json()["backup_count"] == 1
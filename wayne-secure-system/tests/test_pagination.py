@@ -0,0 +1,106 @@
+import base64
+import json
+
+import pytest
+
+from utils.pagination import decode_cursor, encode_cursor
+
+
+def raw_cursor(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip("=")
+
+
+def page_all(fetch, limit):
+    items, cursor, pages = [], None, 0
+    while True:
+        page = fetch(limit=limit, cursor=cursor)
+        items += page["items"]
+        pages += 1
+        cursor = page["next_cursor"]
+        if not cursor:
+            return items, pages
+
+
+@pytest.fixture
+def resources(db):
+    """60 recursos; 25 deles com exatamente o mesmo created_at"""
+    ids = [db.add_resource(f"batmovel {i}", "veiculo", "", "active", "lucius") for i in range(60)]
+    with db.writer() as conn:
+        conn.execute("UPDATE resources SET created_at = datetime('now', '-' || id || ' minutes')")
+        conn.execute(
+            "UPDATE resources SET created_at = '2026-01-01 12:00:00' WHERE id BETWEEN ? AND ?", (ids[20], ids[44])
+        )
+    return ids
+
+
+@pytest.mark.parametrize("value", [["2026-01-01 12:00:00", 42], [17, 3], [None, 1]])
+def test_cursor_round_trip(value):
+    cursor = encode_cursor(*value)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == tuple(value)
+
+
+@pytest.mark.parametrize("cursor", [
+    "lixo!", raw_cursor("texto"), raw_cursor([1, 2, 3]), raw_cursor(["x", "nao-numero"]),
+    raw_cursor([{"valor": 1}, 5]), raw_cursor([[1], 5]),
+])
+def test_invalid_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+@pytest.mark.parametrize("limit", [1, 7, 25, 59, 60, 500])
+def test_pages_cover_every_row_once_with_tied_sort_values(db, resources, limit):
+    items, pages = page_all(db.get_resources_page, limit)
+
+    ids = [item["id"] for item in items]
+    assert sorted(ids) == sorted(resources)
+    assert len(ids) == len(set(ids))
+    keys = [(item["created_at"], item["id"]) for item in items]
+    assert keys == sorted(keys, reverse=True)
+    assert pages >= -(-len(resources) // limit)
+
+
+def test_cursor_inside_a_tie_resumes_after_the_last_id(db, resources):
+    # 35 recursos mais novos que o empate: a primeira página termina no meio dele
+    first = db.get_resources_page(limit=40)
+    sort_value, last_id = decode_cursor(first["next_cursor"])
+    assert sort_value == "2026-01-01 12:00:00"
+
+    second = db.get_resources_page(limit=40, cursor=first["next_cursor"])
+
+    assert second["items"][0]["id"] == last_id - 1
+    assert not {item["id"] for item in first["items"]} & {item["id"] for item in second["items"]}
+
+
+def test_filters_apply_across_pages(db, resources):
+    with db.writer() as conn:
+        conn.execute("UPDATE resources SET status = 'inactive' WHERE id % 3 = 0")
+
+    items, _ = page_all(lambda **page: db.get_resources_page(status="inactive", **page), 4)
+
+    assert sorted(item["id"] for item in items) == [i for i in resources if i % 3 == 0]
+
+
+@pytest.mark.parametrize("cursor", ["lixo!", raw_cursor([{"valor": 1}, 5]), raw_cursor(["x"])])
+def test_api_rejects_tampered_cursor_with_400(client, admin_token, cursor):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    resources = client.get("/resources/", params={"cursor": cursor}, headers=headers)
+    audit_logs = client.get("/admin/admin/audit-logs", params={"cursor": cursor, "token": admin_token})
+    alerts = client.get("/dashboard/alerts", params={"cursor": cursor}, headers=headers)
+
+    assert resources.status_code == 400
+    assert audit_logs.status_code == 400
+    assert alerts.status_code == 400
+
+
+def test_composite_cursor_for_relevance_search():
+    cursor = encode_cursor([-1.5, 40], 42)
+
+    assert decode_cursor(cursor, parts=2) == ([-1.5, 40], 42)
+    for invalid in (encode_cursor(-1.5, 42), encode_cursor([-1.5], 42), encode_cursor([[-1.5], 40], 42)):
+        with pytest.raises(ValueError):
+            decode_cursor(invalid, parts=2)
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
@@ -0,0 +1,113 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import rate_limiter as rate_limiter_module
+from config import RATE_LIMIT_REQUESTS
+from rate_limiter import (
+    LimitReportThrottle, MemoryBackend, RateLimiter, RateLimitMiddleware, RateLimitRule, SQLiteBackend,
+    rate_limiter
+)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    return MemoryBackend() if request.param == "memory" else SQLiteBackend(str(tmp_path / "rate_limits.db"))
+
+
+def test_burst_then_429_until_refill(backend):
+    results = [backend.take("login:10.0.0.1", 3, 3 / 60, 1000.0) for _ in range(4)]
+
+    assert [allowed for allowed, _ in results] == [True, True, True, False]
+    assert results[-1][1] == pytest.approx(20.0)
+
+    # Um token volta a cada window/capacity segundos; a janela inteira devolve a rajada toda
+    assert backend.take("login:10.0.0.1", 3, 3 / 60, 1010.0)[0] is False
+    assert backend.take("login:10.0.0.1", 3, 3 / 60, 1020.0)[0] is True
+    refilled = [backend.take("login:10.0.0.1", 3, 3 / 60, 1080.0)[0] for _ in range(4)]
+    assert refilled == [True, True, True, False]
+
+
+def test_keys_are_independent(backend):
+    for _ in range(3):
+        backend.take("login:10.0.0.1", 3, 3 / 60, 1000.0)
+
+    assert backend.take("login:10.0.0.1", 3, 3 / 60, 1000.0)[0] is False
+    assert backend.take("login:10.0.0.2", 3, 3 / 60, 1000.0)[0] is True
+    assert backend.take("register:10.0.0.1", 3, 3 / 60, 1000.0)[0] is True
+
+
+def test_sqlite_buckets_are_shared_between_instances(tmp_path):
+    path = str(tmp_path / "rate_limits.db")
+    workers = [RateLimiter(SQLiteBackend(path)), RateLimiter(SQLiteBackend(path))]
+
+    allowed = [workers[i % 2].hit("login:10.0.0.1", 5, 60)[0] for i in range(7)]
+
+    assert allowed == [True] * 5 + [False] * 2
+
+
+def test_memory_backend_evicts_idle_keys():
+    backend = MemoryBackend(max_keys=3)
+    for i in range(10):
+        backend.take(f"k{i}", 2, 2 / 60, 1000.0)
+
+    assert len(backend) == 3
+
+
+def test_limit_is_reported_once_per_key_per_window(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(rate_limiter_module.time, "monotonic", lambda: clock[0])
+    throttle = LimitReportThrottle()
+
+    assert throttle.should_report("login:10.0.0.1", 60)
+    assert not throttle.should_report("login:10.0.0.1", 60)
+    assert throttle.should_report("login:10.0.0.2", 60)
+    clock[0] += 59
+    assert not throttle.should_report("login:10.0.0.1", 60)
+    clock[0] += 1
+    assert throttle.should_report("login:10.0.0.1", 60)
+
+
+def test_middleware_returns_429_and_reports_once():
+    reports = []
+    app = FastAPI()
+
+    @app.post("/auth/login")
+    def login():
+        return {"ok": True}
+
+    @app.get("/livre")
+    def free():
+        return {"ok": True}
+
+    app.add_middleware(
+        RateLimitMiddleware,
+        limiter=RateLimiter(MemoryBackend()),
+        rules=[RateLimitRule("teste-middleware", "POST", "/auth/login", 3, 60)],
+        on_limit=lambda client_ip, rule: reports.append((client_ip, rule.name)),
+    )
+    client = TestClient(app)
+
+    codes = [client.post("/auth/login").status_code for _ in range(6)]
+    limited = client.post("/auth/login")
+
+    assert codes == [200, 200, 200, 429, 429, 429]
+    assert limited.json() == {"detail": rate_limiter_module.RATE_LIMIT_MESSAGE}
+    assert int(limited.headers["retry-after"]) >= 1
+    assert reports == [("testclient", "teste-middleware")]
+    assert all(client.get("/livre").status_code == 200 for _ in range(5))
+
+
+def test_app_limits_login_and_audits_once(client, app_db, monkeypatch):
+    monkeypatch.setattr(rate_limiter, "backend", MemoryBackend())
+    monkeypatch.setattr(rate_limiter_module, "limit_reports", LimitReportThrottle())
+
+    codes = [
+        client.post("/auth/login", data={"username": "ninguem", "password": "errada"}).status_code
+        for _ in range(RATE_LIMIT_REQUESTS + 5)
+    ]
+
+    assert codes == [401] * RATE_LIMIT_REQUESTS + [429] * 5
+    app_db.audit_writer.flush()
+    actions = [log["action"] for log in app_db.get_audit_logs(100)]
+    assert actions.count("SECURITY_RATE_LIMIT_EXCEEDED") == 1
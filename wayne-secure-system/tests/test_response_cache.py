@@ -0,0 +1,86 @@
+import pytest
+from fastapi.responses import JSONResponse
+from starlette.requests import Request
+
+from response_cache import ResponseCache, response_cache
+
+
+def make_request(if_none_match=None) -> Request:
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers, "query_string": b""})
+
+
+@pytest.fixture(autouse=True)
+def clear_global_cache():
+    response_cache.clear()
+    yield
+    response_cache.clear()
+
+
+def test_etag_depends_on_key_and_version():
+    etag = ResponseCache.etag("dashboard:lucius", "abc-1")
+
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag == ResponseCache.etag("dashboard:lucius", "abc-1")
+    assert etag != ResponseCache.etag("dashboard:lucius", "abc-2")
+    assert etag != ResponseCache.etag("dashboard:alfred", "abc-1")
+
+
+def test_respond_reuses_body_until_version_changes():
+    cache = ResponseCache(ttl=60)
+    builds = []
+
+    def build():
+        builds.append(1)
+        return JSONResponse({"build": len(builds)})
+
+    first = cache.respond(make_request(), "chave", "v1", build)
+    second = cache.respond(make_request(), "chave", "v1", build)
+    third = cache.respond(make_request(), "chave", "v2", build)
+
+    assert first.body == second.body
+    assert first.headers["etag"] == second.headers["etag"] != third.headers["etag"]
+    assert len(builds) == 2
+
+
+@pytest.mark.parametrize("if_none_match", ["{etag}", "W/{etag}", '"outro", {etag}', "*"])
+def test_matching_if_none_match_returns_304_without_building(if_none_match):
+    cache = ResponseCache()
+    etag = ResponseCache.etag("chave", "v1")
+
+    response = cache.respond(
+        make_request(if_none_match.format(etag=etag)), "chave", "v1", lambda: pytest.fail("build chamado")
+    )
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert not response.body
+
+
+def test_errors_are_not_cached():
+    cache = ResponseCache()
+
+    response = cache.respond(make_request(), "chave", "v1", lambda: JSONResponse({}, status_code=400))
+
+    assert response.status_code == 400
+    assert "etag" not in response.headers
+    assert len(cache) == 0
+
+
+def test_dashboard_etag_changes_after_a_write(client, admin_token, app_db):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    first = client.get("/dashboard/", headers=headers)
+    etag = first.headers["etag"]
+
+    unchanged = client.get("/dashboard/", headers={**headers, "If-None-Match": etag})
+    assert unchanged.status_code == 304
+
+    generation = app_db.get_data_generation()
+    app_db.add_resource("batcaverna", "base", "", "active", "lucius")
+    assert app_db.get_data_generation() != generation
+
+    changed = client.get("/dashboard/", headers={**headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    stats = changed.json()["data"]["dashboard_stats"]
+    assert stats != first.json()["data"]["dashboard_stats"]
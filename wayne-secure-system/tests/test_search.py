@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+
+@pytest.fixture
+def search_db(db):
+    if not db.full_text_search:
+        pytest.skip("SQLite sem FTS5: a busca usa LIKE")
+    return db
+
+
+def alert_ids(db, query, **options):
+    return [item["id"] for item in db.search_alerts(query, **options)["items"]]
+
+
+def page_all(search, limit, order):
+    ids, cursor = [], None
+    while True:
+        page = search(limit=limit, cursor=cursor, order=order)
+        ids += [item["id"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            return ids
+
+
+def test_alert_index_follows_insert_update_and_delete(search_db):
+    alert_id = search_db.add_alert("INTRUSAO", "Movimento suspeito na torre", "ALTO", subject="torre")
+    assert alert_ids(search_db, "torre") == [alert_id]
+
+    with search_db.writer() as conn:
+        conn.execute("UPDATE alerts SET message = 'Movimento suspeito na caverna' WHERE id = ?", (alert_id,))
+    assert alert_ids(search_db, "torre") == []
+    assert alert_ids(search_db, "caverna") == [alert_id]
+
+    with search_db.writer() as conn:
+        conn.execute("DELETE FROM alerts WHERE id = ?", (alert_id,))
+    assert alert_ids(search_db, "caverna") == []
+
+
+def test_audit_index_follows_inserts_rotation_and_archival(search_db):
+    old = (datetime.now(timezone.utc) - timedelta(days=100)).strftime("%Y-%m-%d %H:%M:%S")
+    search_db._write_audit_batch([("alfred", "LOGOUT", None, None, "saída pela passagem secreta", old, None, None)])
+    search_db.log_audit("lucius", "VIEW_AUDIT_LOGS", details="consulta da passagem norte")
+
+    assert len(search_db.search_audit_logs("passagem")["items"]) == 2
+
+    search_db.maintain_audit_partitions(retention_months=0)
+    assert len(search_db.search_audit_logs("passagem")["items"]) == 2
+
+    # Partição arquivada sai do banco e do índice
+    assert search_db.maintain_audit_partitions(retention_months=1)["archived_partitions"] >= 1
+    assert [item["username"] for item in search_db.search_audit_logs("passagem")["items"]] == ["lucius"]
+
+
+def test_results_carry_highlighted_snippets(search_db):
+    search_db.add_alert("ACESSO_NEGADO", "Intrusão detectada na Torre Wayne", "ALTO")
+
+    item, = search_db.search_alerts("intrusao torre")["items"]
+
+    assert item["highlight"]["message"] == "<mark>Intrusão</mark> detectada na <mark>Torre</mark> Wayne"
+    assert item["highlight"]["alert_type"] == "ACESSO_NEGADO"
+    assert item["rank"] is not None
+
+
+def test_prefix_terms_match(search_db):
+    search_db.log_audit("alfred", "LOGOUT", details="restauração do backup noturno")
+
+    assert len(search_db.search_audit_logs("restaur*")["items"]) == 1
+    assert search_db.search_audit_logs("restaur")["items"] == []
+
+
+@pytest.mark.parametrize("order", ["recent", "relevance"])
+def test_cursor_paging_returns_every_match_once(search_db, order):
+    expected = []
+    for i in range(30):
+        expected.append(search_db.add_alert("PERIMETRO", f"Sensor {i} do perímetro " + "gotham " * (i % 4), "BAIXO",
+                                            subject=f"sensor-{i}"))
+        search_db.add_alert("OUTRO", f"Evento {i} sem relação", "BAIXO", subject=f"evento-{i}")
+
+    ids = page_all(lambda **page: search_db.search_alerts("perimetro", **page), 7, order)
+
+    assert sorted(ids) == sorted(expected)
+    assert len(ids) == len(set(ids))
+    if order == "recent":
+        assert ids == sorted(expected, reverse=True)
+
+
+@pytest.mark.parametrize("query", ['"abc', "NEAR(a b", "a OR", "coluna:valor", "-negado", "a AND AND b", "x* *y"])
+def test_fts_operators_in_user_input_are_not_errors(client, admin_token, query):
+    response = client.get("/admin/admin/alerts/search", params={"q": query, "token": admin_token})
+
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("params", [{"q": '"'}, {"q": "***"}, {"q": "()"}, {"q": "torre", "order": "sideways"},
+                                    {"q": "torre", "cursor": "lixo!"}])
+def test_invalid_search_input_is_a_400(client, admin_token, params):
+    audit = client.get("/admin/admin/audit-logs/search", params={**params, "token": admin_token})
+    alerts = client.get("/admin/admin/alerts/search", params={**params, "token": admin_token})
+
+    assert audit.status_code == 400
+    assert alerts.status_code == 400
@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+
+import security_manager
+from auth import create_access_token, get_current_user, hash_password, logout_user
+from session_cache import SessionCache, session_cache
+from models.user import User, UserRole
+
+
+@pytest.fixture
+def token(app_db):
+    app_db.add_user("selina", hash_password("Gato123!"), "user")
+    return create_access_token(data={"username": "selina"})
+
+
+@pytest.fixture
+def expiry_lookups(monkeypatch):
+    """Conta as consultas de sessão ao banco feitas por get_current_user"""
+    calls = []
+    original = security_manager.SecurityManager.get_session_expiry
+
+    def counting(token):
+        calls.append(token)
+        return original(token)
+
+    monkeypatch.setattr(security_manager.SecurityManager, "get_session_expiry", staticmethod(counting))
+    return calls
+
+
+def test_cache_hit_skips_session_lookup(token, expiry_lookups):
+    first = get_current_user(token)
+    second = get_current_user(token)
+
+    assert first.username == second.username == "selina"
+    assert len(expiry_lookups) == 1
+    assert len(session_cache) == 1
+
+
+def test_logout_invalidates_cached_session(token, expiry_lookups):
+    get_current_user(token)
+
+    assert logout_user(token)
+
+    with pytest.raises(HTTPException) as error:
+        get_current_user(token)
+    assert error.value.status_code == 401
+    assert len(expiry_lookups) == 2
+
+
+def test_expired_session_is_rejected(token, app_db):
+    # O JWT ainda vale; só a sessão no banco expirou (há um minuto, no mesmo dia)
+    token_hash = security_manager.SecurityManager.hash_token(token)
+    app_db.invalidate_session(token_hash)
+    app_db.add_session("selina", token_hash, datetime.now(timezone.utc) - timedelta(minutes=1))
+
+    with pytest.raises(HTTPException) as error:
+        get_current_user(token)
+    assert error.value.status_code == 401
+
+
+def test_cache_entry_expires_with_session():
+    cache = SessionCache(ttl=60)
+    user = User(username="selina", password="x", role=UserRole("user"))
+
+    cache.set("expirada", user, datetime.now(timezone.utc) - timedelta(seconds=1))
+    cache.set("valida", user, datetime.now(timezone.utc) + timedelta(minutes=5))
+
+    assert cache.get("expirada") is None
+    assert cache.get("valida") is user
+
+
+def test_restore_from_backup_clears_cache(token, app_db, expiry_lookups):
+    backup = app_db.create_backup("manual")
+    get_current_user(token)
+    assert len(session_cache) == 1
+
+    assert security_manager.BackupManager.restore_from_backup(backup)
+
+    assert len(session_cache) == 0
+    get_current_user(token)
+    assert len(expiry_lookups) == 2
@@ -0,0 +1,62 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List
+from fastapi.responses import StreamingResponse
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+def validate_format(export_format: str):
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Formato inválido: {export_format} (use {' ou '.join(EXPORT_FORMATS)})")
+
+def ndjson_chunks(chunks: Iterable[List[Dict]]) -> Iterator[bytes]:
+    """Uma linha JSON por registro, um bloco de bytes por lote"""
+    for rows in chunks:
+        yield "".join(json.dumps(row, ensure_ascii=False, default=str) + "\n" for row in rows).encode("utf-8")
+
+def csv_chunks(chunks: Iterable[List[Dict]]) -> Iterator[bytes]:
+    """CSV com cabeçalho tirado das chaves do primeiro registro (exportação vazia gera arquivo vazio)"""
+    writer = None
+    buffer = io.StringIO()
+    for rows in chunks:
+        if not rows:
+            continue
+        if writer is None:
+            writer = csv.DictWriter(buffer, fieldnames=list(rows[0]), lineterminator="\n")
+            writer.writeheader()
+        writer.writerows(rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+def gzip_chunks(data: Iterable[bytes]) -> Iterator[bytes]:
+    """Comprime o fluxo em formato gzip sem acumular o conteúdo"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in data:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+def export_response(chunks: Iterable[List[Dict]], export_format: str, compress: bool,
+                    basename: str) -> StreamingResponse:
+    """Resposta em fluxo com os lotes de registros em NDJSON ou CSV, opcionalmente em gzip"""
+    validate_format(export_format)
+    data = ndjson_chunks(chunks) if export_format == "ndjson" else csv_chunks(chunks)
+    filename = f"{basename}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{export_format}"
+    media_type = EXPORT_FORMATS[export_format]
+    if compress:
+        data = gzip_chunks(data)
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        data,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
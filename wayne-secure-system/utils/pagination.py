@@ -0,0 +1,33 @@
+import base64
+import json
+from typing import Any, Tuple
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+def encode_cursor(sort_value: Any, row_id: int) -> str:
+    """Codifica a posição (valor de ordenação, id) da última linha de uma página"""
+    raw = json.dumps([sort_value, row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def _is_scalar(value: Any) -> bool:
+    return value is None or isinstance(value, (str, int, float))
+
+def decode_cursor(cursor: str, parts: int = 1) -> Tuple[Any, int]:
+    """
+    Decodifica um cursor; levanta ValueError se for inválido. Com parts > 1 o valor de
+    ordenação é uma lista de parts escalares (ex.: [rank, piso] da busca por relevância)
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        # O valor vai direto para a consulta: só escalares, nunca listas ou objetos aninhados
+        if parts == 1:
+            valid = _is_scalar(sort_value)
+        else:
+            valid = isinstance(sort_value, list) and len(sort_value) == parts and all(map(_is_scalar, sort_value))
+        if not valid:
+            raise TypeError(sort_value)
+        return sort_value, int(row_id)
+    except Exception:
+        raise ValueError("Cursor de paginação inválido")
@@ -13,3 +13,15 @@ def error_response(message="Ocorreu um erro", status_code=400, data=None):
         "message": message,
         "data": data
     }, status_code=status_code)
+
+
+def paginated_response(items, next_cursor=None, message="Operação realizada com sucesso"):
+    return JSONResponse(content={
+        "success": True,
+        "message": message,
+        "data": items,
+        "pagination": {
+            "count": len(items),
+            "next_cursor": next_cursor
+        }
+    })